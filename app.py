@@ -1,77 +1,436 @@
 import requests
-from bs4 import BeautifulSoup
-from collections import deque
-import time
+from collections import OrderedDict
+from itertools import islice
+import gzip
 import json
 import os
+import queue
+import shutil
+import threading
+import time
+from contextlib import nullcontext
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from flask import Flask, Response, render_template, request, jsonify
 import urllib3
+import numpy as np
+from search_index import SearchIndex
+from indexer import IncrementalIndexer, parse_version
+from positional_index import SUGGEST_LIMIT, PositionalIndex, is_structured_query, make_snippet, match_text
+from link_graph import GRAPH_MERGE_MIN_PAGES, GRAPH_MERGE_RATIO, GRAPH_REBUILD_RATIO, LinkGraph
+from fetcher import PageFetcher, default_fetcher
+from page_parser import get_parse_pool, parse_page
+from frontier import BestFirstFrontier, BfsFrontier, DfsFrontier, TraversalTree, link_priority, tokenize
+from urlnorm import canonicalize, localize_url
+from jobs import CrawlJobManager
+from partition import crawl_partitioned, new_run_dir
+from result_cache import ResultCache, SearchResultStore
+from crawl_log import SearchLog, configure_logging, logger
+from dedup import SIMHASH_DISTANCE, DuplicateIndex, hamming_distance, simhash
+import metrics
+import shared_dir
+from storage import CachedPage, compact_metadata, import_json_cache, open_store
 
 # Disable SSL warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 app = Flask(__name__)
+configure_logging()
 
 # File untuk menyimpan cache
-CACHE_FILE = "crawl_cache.json"
+CACHE_FILE = "crawl_cache.json"  # Format lama, di-import otomatis ke database
+CACHE_DB_FILE = "crawl_cache.db"
+CACHE_BACKEND = "sqlite"  # 'sqlite' (WAL, tulis per halaman) atau 'json' (format lama)
 
 class WebCrawlerCache:
-    def __init__(self, cache_file=CACHE_FILE):
-        self.cache_file = cache_file
-        self.cache_data = self.load_cache()
+    def __init__(self, cache_file=None, backend=CACHE_BACKEND, legacy_file=CACHE_FILE):
+        self.backend = backend
+        self.cache_file = cache_file or (CACHE_FILE if backend == "json" else CACHE_DB_FILE)
+        self.legacy_file = legacy_file
+        # Import format lama hanya jika database belum ada saat start
+        self.import_legacy = (backend != "json" and legacy_file and os.path.exists(legacy_file)
+                              and not os.path.exists(self.cache_file))
+        self.store = open_store(self.cache_file, self.backend)
+        # Metadata halaman di-load saat pertama dipakai, bukan saat import (lihat cache_data)
+        self._cache_data = None
+        self.load_lock = threading.RLock()
+        # Dipegang selama perubahan lokal ditulis ke cache_data dan store; save_cache memegangnya
+        # agar snapshot tidak memuat halaman yang belum di-flush
+        self.write_lock = threading.RLock()
+        # (epoch, generation) store yang sudah tercermin di cache_data (lihat refresh)
+        self.store_state = None
         self.save_counter = 0  # Counter untuk auto-save periodik
         self.save_frequency = 5  # Save setiap 5 URLs dalam fresh mode
-        
+        # LRU kecil untuk content halaman yang sering diakses (sisanya tetap terkompresi di disk)
+        self.content_cache = OrderedDict()
+        self.content_cache_size = 256
+        self.content_lock = threading.Lock()
+        # Naik setiap kali isi cache berubah (lokal atau dari worker lain), hanya berlaku di proses ini
+        self.generation = 0
+        # Index LSH SimHash halaman kanonik untuk deteksi near-duplicate saat store
+        self.duplicates = DuplicateIndex()
+        self.duplicates_lock = threading.Lock()
+        self.duplicate_count = 0  # Dihitung inkremental agar statistik tidak scan semua URL
+        self.duplicate_groups = {}  # URL kanonik -> set URL duplikat yang menunjuk ke sana
+        # IncrementalIndexer yang menerima halaman baru/berubah/terhapus (dipasang setelah index dibuat)
+        self.indexer = None
+        # LinkGraph yang mencatat URL halaman baru/berubah/terhapus untuk update delta
+        self.link_graph = None
+    
+    @property
+    def cache_data(self):
+        data = self._cache_data
+        if data is None:
+            data = self.load_cache()
+        return data
+    
+    @cache_data.setter
+    def cache_data(self, data):
+        self._cache_data = data
+    
+    @property
+    def is_loaded(self):
+        return self._cache_data is not None
+    
     def load_cache(self):
-        """Load cache dari file JSON"""
-        if os.path.exists(self.cache_file):
-            try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"Error loading cache: {e}")
-                return {"urls": {}, "metadata": {}}
-        return {"urls": {}, "metadata": {}}
+        """Load metadata cache dari storage (sekali, dipanggil otomatis saat cache_data pertama dipakai)"""
+        with self.load_lock:
+            if self._cache_data is not None:
+                return self._cache_data
+            # Migrasi otomatis dari crawl_cache.json lama ke backend baru
+            if self.import_legacy:
+                import_json_cache(self.legacy_file, self.store)
+                self.import_legacy = False
+            with metrics.timed("cache_load"):
+                data = self.store.load()
+            self.store_state = (data.pop("epoch"), data.pop("generation"))
+            with self.duplicates_lock:
+                for url, meta in data["urls"].items():
+                    if meta.get("duplicate_of"):
+                        self._link_duplicate(url, None, meta)
+                    elif meta.get("simhash") is not None:
+                        self.duplicates.add(url, meta["simhash"])
+            self._cache_data = data
+        return data
+    
+    def _apply(self, url, meta):
+        """Pasang metadata halaman yang ditulis worker lain"""
+        previous = self._cache_data["urls"].get(url)
+        with self.duplicates_lock:
+            if meta.get("duplicate_of") or meta.get("simhash") is None:
+                self.duplicates.remove(url)
+            else:
+                self.duplicates.add(url, meta["simhash"])
+            self._link_duplicate(url, previous, meta)
+        self._cache_data["urls"][url] = meta
+        with self.content_lock:
+            self.content_cache.pop(url, None)
+    
+    def _forget(self, url):
+        """Buang metadata halaman yang dihapus dari memory"""
+        meta = self._cache_data["urls"].pop(url, None)
+        with self.duplicates_lock:
+            self.duplicates.remove(url)
+            self._link_duplicate(url, meta, None)
+        with self.content_lock:
+            self.content_cache.pop(url, None)
+        return meta
+    
+    def _link_duplicate(self, url, previous, meta):
+        """Update duplicate_groups dan duplicate_count saat pointer duplicate_of berubah (duplicates_lock dipegang)"""
+        old = previous.get("duplicate_of") if previous else None
+        new = meta.get("duplicate_of") if meta else None
+        if old == new:
+            return
+        if old:
+            members = self.duplicate_groups.get(old)
+            if members is not None:
+                members.discard(url)
+                if not members:
+                    del self.duplicate_groups[old]
+            self.duplicate_count -= 1
+        if new:
+            self.duplicate_groups.setdefault(new, set()).add(url)
+            self.duplicate_count += 1
+    
+    def refresh(self):
+        """Ambil perubahan yang di-commit worker lain sejak load/refresh terakhir.
+
+        Hanya baris dengan generation lebih baru yang dibaca; jika epoch
+        berubah (cache dikosongkan worker lain) metadata di-load ulang penuh.
+        Tidak melakukan apa-apa sebelum cache_data pertama kali di-load.
+        """
+        if not self.is_loaded:
+            return False
+        state = self.store.state()
+        if state == self.store_state:
+            return False
+        with self.load_lock:
+            if state[0] != self.store_state[0]:
+                with self.duplicates_lock:
+                    self.duplicates.clear()
+                    self.duplicate_groups.clear()
+                self.duplicate_count = 0
+                with self.content_lock:
+                    self.content_cache.clear()
+                self._cache_data = None
+                self.load_cache()
+                if self.indexer is not None:
+                    self.indexer.reset()
+            else:
+                with metrics.timed("cache_refresh"):
+                    changes = self.store.changes_since(self.store_state[1])
+                    urls = self._cache_data["urls"]
+                    for url, meta in changes["urls"].items():
+                        # Versi lokal yang belum di-flush lebih baru dari versi di store
+                        if not self.store.is_pending(url):
+                            # Halaman yang ditulis proses ini sendiri sudah masuk indexer saat store_content
+                            if urls.get(url) != meta:
+                                if self.indexer is not None:
+                                    self.indexer.add(url)
+                                if self.link_graph is not None:
+                                    self.link_graph.note_change(url)
+                            self._apply(url, meta)
+                    for url in changes["deleted"]:
+                        if url in urls and not self.store.is_pending(url):
+                            self._forget(url)
+                            if self.indexer is not None:
+                                self.indexer.remove(url)
+                            if self.link_graph is not None:
+                                self.link_graph.note_change(url)
+                    local = self._cache_data.get("metadata", {})
+                    if changes["metadata"].get("last_updated", "") >= local.get("last_updated", ""):
+                        self._cache_data["metadata"] = changes["metadata"]
+                self.store_state = (changes["epoch"], changes["generation"])
+            self.generation += 1
+        return True
     
     def save_cache(self):
-        """Simpan cache ke file JSON"""
+        """Commit perubahan cache ke storage"""
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache_data, f, ensure_ascii=False, indent=2)
-            print(f"Cache saved to {self.cache_file}")
+            with metrics.timed("cache_save"):
+                # Flush, refresh dan salinan metadata atomik terhadap penulisan lokal:
+                # isi snapshot persis sama dengan yang sudah di-commit sampai store_state
+                with self.write_lock:
+                    self.store.set_metadata(self.cache_data.get("metadata", {}))
+                    self.store.flush()
+                    self.refresh()
+                    with self.load_lock:
+                        urls = dict(self.cache_data["urls"])
+                        state = self.store_state
+                self.store.save_snapshot(urls, *state)
+            logger.info(f"Cache saved to {self.cache_file}")
         except Exception as e:
-            print(f"Error saving cache: {e}")
+            logger.error(f"Error saving cache: {e}")
     
     def get_cached_content(self, url):
         """Ambil konten dari cache"""
-        return self.cache_data["urls"].get(url)
+        meta = self.cache_data["urls"].get(url)
+        if meta is None:
+            return None
+        return CachedPage(url, meta, self.load_content)
+    
+    def canonical_url(self, url):
+        """URL dokumen kanonik untuk halaman near-duplicate (URL itu sendiri jika bukan duplikat)"""
+        urls = self.cache_data["urls"]
+        meta = urls.get(url)
+        hops = 0
+        while meta is not None and meta.get("duplicate_of") and hops < 8:
+            url = meta["duplicate_of"]
+            meta = urls.get(url)
+            hops += 1
+        return url
+    
+    def load_content(self, url):
+        """Ambil content halaman dari LRU atau decompress dari storage"""
+        # Duplikat tidak menyimpan content sendiri, ambil dari dokumen kanonik
+        url = self.canonical_url(url)
+        with self.content_lock:
+            content = self.content_cache.get(url)
+            if content is not None:
+                self.content_cache.move_to_end(url)
+                return content
+        with metrics.timed("cache_read"):
+            content = self.store.get_content(url)
+        self._remember_content(url, content)
+        return content
     
-    def store_content(self, url, content, title="", links=None, auto_save=False):
-        """Simpan konten ke cache"""
-        self.cache_data["urls"][url] = {
-            "content": content,
+    def _remember_content(self, url, content):
+        with self.content_lock:
+            self.content_cache[url] = content
+            self.content_cache.move_to_end(url)
+            while len(self.content_cache) > self.content_cache_size:
+                self.content_cache.popitem(last=False)
+    
+    def iter_contents(self):
+        """Stream (url, content) semua halaman di cache"""
+        return self.store.iter_contents()
+    
+    def store_content(self, url, content, title="", links=None, auto_save=False, etag=None, last_modified=None):
+        """Simpan konten ke cache.
+
+        Near-duplicate dari halaman yang sudah ada disimpan sebagai pointer
+        (duplicate_of) tanpa content; return URL kanonik tersebut atau None.
+        """
+        with metrics.timed("dedup"):
+            fingerprint = simhash(content)
+        duplicate_of = self._deduplicate(url, fingerprint)
+        record = {
+            "content": "" if duplicate_of else content,
             "title": title,
             "links": links or [],
             "timestamp": datetime.now().isoformat(),
-            "content_length": len(content)
+            "content_length": len(content),
+            "etag": etag,
+            "last_modified": last_modified,
+            "simhash": fingerprint,
+            "duplicate_of": duplicate_of
         }
+        self._put_record(url, record, content)
         
         # Auto-save cache if requested (untuk fresh mode)
         if auto_save:
             self.save_counter += 1
-            # Save every N URLs untuk mengurangi I/O overhead
+            # Commit every N URLs untuk mengurangi I/O overhead
             if self.save_counter % self.save_frequency == 0:
-                self.save_cache()
-                print(f"[AUTO-SAVE] Cache auto-saved after {self.save_counter} URLs")
+                self.store.flush()
+                logger.debug(f"[AUTO-SAVE] Cache auto-saved after {self.save_counter} URLs")
+        return duplicate_of
+    
+    def _deduplicate(self, url, fingerprint):
+        """Daftarkan fingerprint halaman; return URL kanonik jika halaman ini near-duplicate"""
+        # Index duplikat baru terisi saat metadata di-load
+        if not self.is_loaded:
+            self.load_cache()
+        duplicate_of = None
+        with self.duplicates_lock:
+            if fingerprint is not None:
+                duplicate_of = self.duplicates.find(fingerprint, exclude=url)
+            if fingerprint is not None and duplicate_of is None:
+                self.duplicates.add(url, fingerprint)
+            else:
+                self.duplicates.remove(url)
+        return duplicate_of
+    
+    def _put_record(self, url, record, content=None):
+        with self.write_lock:
+            previous = self.cache_data["urls"].get(url)
+            if previous is not None and not previous.get("duplicate_of") and not self._same_document(previous, record):
+                self._rehome_duplicates(url)
+            self.generation += 1
+            meta = compact_metadata(record)
+            with self.duplicates_lock:
+                self._link_duplicate(url, previous, meta)
+            # Di memory hanya metadata ringkas; content terkompresi di storage
+            self.cache_data["urls"][url] = meta
+            if content is not None:
+                self._remember_content(url, content)
+            # Tulis satu baris ke storage (commit dibatch oleh backend)
+            with metrics.timed("cache_write"):
+                self.store.put(url, record)
+        if self.indexer is not None:
+            self.indexer.add(url, record["content"])
+        if self.link_graph is not None:
+            self.link_graph.note_change(url)
+    
+    @staticmethod
+    def _same_document(previous, record):
+        """True jika record baru masih near-duplicate dari dokumen kanonik lama (pointer duplikatnya tetap valid)"""
+        if record["duplicate_of"] or previous.get("simhash") is None or record["simhash"] is None:
+            return False
+        return hamming_distance(previous["simhash"], record["simhash"]) <= SIMHASH_DISTANCE
+    
+    def _rehome_duplicates(self, url):
+        """Jadikan salah satu duplikat url kanonik sebelum url berubah isi atau dihapus.
+
+        Content duplikat tidak pernah disimpan, jadi duplikat pertama mewarisi
+        content lama url (near-duplicate-nya) dan duplikat lain menunjuk ke sana.
+        """
+        with self.duplicates_lock:
+            members = sorted(self.duplicate_groups.get(url, ()))
+        if not members:
+            return
+        content = self.store.get_content(url)
+        urls = self.cache_data["urls"]
+        heir = members[0]
+        meta = urls[heir]
+        with self.duplicates_lock:
+            self.duplicates.add(heir, meta["simhash"])
+        self._put_record(heir, dict(meta, links=list(meta["links"]), content=content, duplicate_of=None), content)
+        for member in members[1:]:
+            meta = urls[member]
+            self._put_record(member, dict(meta, links=list(meta["links"]), content="", duplicate_of=heir))
+        logger.debug(f"[DEDUP] {len(members)} duplicate(s) of {url} re-homed to {heir}")
+    
+    def merge_shard(self, store):
+        """Salin semua halaman dari store shard crawl terpartisi; return jumlah halaman.
+
+        Near-duplicate dicek ulang terhadap seluruh cache memakai simhash yang
+        tersimpan, karena tiap shard hanya men-dedup halamannya sendiri.
+        """
+        duplicates = []
+        count = 0
+        for url, record in store.iter_records():
+            count += 1
+            if record["duplicate_of"]:
+                duplicates.append((url, record))
+                continue
+            duplicate_of = self._deduplicate(url, record["simhash"])
+            content = record["content"]
+            if duplicate_of:
+                record = dict(record, content="", duplicate_of=duplicate_of)
+            self._put_record(url, record, content)
+        # Dokumen kanonik di shard yang sama mungkin ternyata duplikat halaman shard lain
+        for url, record in duplicates:
+            with self.duplicates_lock:
+                self.duplicates.remove(url)
+            self._put_record(url, dict(record, duplicate_of=self.canonical_url(record["duplicate_of"])))
+        return count
+    
+    def delete_page(self, url):
+        """Hapus satu halaman dari cache; index dan worker lain melihatnya lewat tombstone"""
+        if not self.is_loaded:
+            self.load_cache()
+        with self.write_lock:
+            meta = self.cache_data["urls"].get(url)
+            if meta is None:
+                return False
+            if not meta.get("duplicate_of"):
+                self._rehome_duplicates(url)
+            self._forget(url)
+            self.generation += 1
+            self.store.delete(url)
+        if self.indexer is not None:
+            self.indexer.remove(url)
+        if self.link_graph is not None:
+            self.link_graph.note_change(url)
+        return True
+    
+    def conditional_headers(self, url):
+        """Header conditional request dari validator HTTP yang tersimpan"""
+        meta = self.cache_data["urls"].get(url)
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+    
+    def touch(self, url):
+        """Tandai halaman masih valid (HTTP 304) tanpa menulis ulang isinya"""
+        meta = self.cache_data["urls"].get(url)
+        if meta is not None:
+            timestamp = datetime.now().isoformat()
+            meta["timestamp"] = timestamp
+            self.store.touch(url, timestamp)
     
     def get_cache_stats(self):
         """Dapatkan statistik cache"""
         return {
             "total_urls": len(self.cache_data["urls"]),
-            "cache_size_mb": os.path.getsize(self.cache_file) / 1024 / 1024 if os.path.exists(self.cache_file) else 0,
+            "cache_size_mb": self.store.size_bytes() / 1024 / 1024,
+            "resident_documents": len(self.content_cache),
+            "duplicate_pages": self.duplicate_count,
             "last_updated": self.cache_data.get("metadata", {}).get("last_updated", "Never")
         }
     
@@ -85,278 +444,427 @@ class WebCrawlerCache:
             "total_urls": len(self.cache_data["urls"])
         }
     
+    def cache_version(self):
+        """Versi isi cache (epoch:generation store), sama di semua worker; dipakai untuk mendeteksi index yang basi"""
+        if not self.is_loaded:
+            self.load_cache()
+        # Halaman yang masih dibuffer ikut masuk index, jadi commit dulu
+        self.store.flush()
+        self.refresh()
+        return "%d:%d" % self.store_state
+    
     def clear_cache(self):
         """Hapus semua cache"""
+        self.import_legacy = False
         self.cache_data = {"urls": {}, "metadata": {}}
-        if os.path.exists(self.cache_file):
-            os.remove(self.cache_file)
+        self.generation += 1
+        with self.duplicates_lock:
+            self.duplicates.clear()
+            self.duplicate_groups.clear()
+        self.duplicate_count = 0
+        with self.content_lock:
+            self.content_cache.clear()
+        self.store.clear()
+        self.store_state = self.store.state()
+        if self.indexer is not None:
+            self.indexer.reset()
 
 # Initialize cache
 cache_manager = WebCrawlerCache()
 
+# Process pool parser dibuat saat start, bukan saat thread fetch pertama men-submit halaman
+parse_pool = get_parse_pool()
+
+# Metric crawler; gauge dengan function dihitung saat /metrics dibaca
+pages_visited = metrics.counter("crawler_pages_visited_total", "Pages visited by traversals", ("source",))
+frontier_size = metrics.gauge("crawler_frontier_size", "Entries in the frontier of the most recent traversal step")
+prefetch_pending = metrics.gauge("crawler_prefetch_pending", "Prefetched fetches not yet consumed")
+metrics.gauge("crawler_cached_pages", "Pages in the cache",
+              function=lambda: len(cache_manager.cache_data["urls"]) if cache_manager.is_loaded else 0)
+metrics.gauge("crawler_store_size_bytes", "Size of the cache store on disk", function=lambda: cache_manager.store.size_bytes())
+
+# Index TF-IDF korpus yang dibangun dari cache
+search_index = SearchIndex()
+
+# Positional index untuk frase, prefix/wildcard, autocomplete dan snippet
+positional_index = PositionalIndex()
+
+# Halaman yang disimpan/dihapus langsung masuk kedua index sebagai segment in-memory;
+# segment di-merge ke index di disk oleh thread background
+indexer = IncrementalIndexer(cache_manager, [search_index, positional_index])
+cache_manager.indexer = indexer
+
+# Term di luar vocabulary TF-IDF diskor dari document/term frequency positional index
+search_index.term_index = positional_index
+
+# Link graph CSR dari halaman di cache untuk traversal cache mode
+link_graph = LinkGraph()
+cache_manager.link_graph = link_graph
+link_graph_lock = threading.Lock()
+link_graph_merging = threading.Event()
+
+def ensure_link_graph():
+    """Link graph yang mencakup isi cache saat ini.
+
+    Halaman yang berubah sejak update terakhir dipasang sebagai delta;
+    thread background melipat delta dan mempublikasikan graph jika delta
+    sudah besar. Build penuh hanya jika graph belum ada, dari epoch lain,
+    atau perubahannya terlalu banyak. Graph yang sudah dipublikasikan worker
+    lain cukup di-load lalu ditambah perubahan setelahnya; lock file
+    memastikan hanya satu worker yang membangun.
+    """
+    version = cache_manager.cache_version()
+    if link_graph.is_built and link_graph.source_version == version and not link_graph.changes:
+        return link_graph
+    with link_graph_lock:
+        # Diambil setelah cache_version: refresh di dalamnya ikut mencatat perubahan worker lain
+        changes = link_graph.take_changes()
+        if not update_link_graph(changes, version):
+            with shared_dir.file_lock(link_graph.graph_dir):
+                if not (link_graph.load() and update_link_graph(changes, version)):
+                    with metrics.timed("graph_build"):
+                        link_graph.build(
+                            ((url, meta.get("links", ())) for url, meta in list(cache_manager.cache_data["urls"].items())),
+                            version
+                        )
+                        link_graph.save()
+        if link_graph.delta_pages >= max(GRAPH_MERGE_MIN_PAGES, GRAPH_MERGE_RATIO * link_graph.cached_count):
+            start_link_graph_merge()
+    return link_graph
+
+def update_link_graph(changes, version):
+    """Kejar graph ke versi cache dengan delta: halaman yang dicatat plus yang berubah di store sejak versi graph.
+
+    Return False jika graph belum ada, dari epoch lain, atau perubahannya
+    terlalu banyak (lebih murah build penuh).
+    """
+    if not link_graph.is_built:
+        return False
+    state = parse_version(link_graph.source_version)
+    current = parse_version(version)
+    if state is None or state[0] != current[0]:
+        return False
+    changes = set(changes)
+    if state[1] < current[1]:
+        # Graph dari disk (atau worker lain) lebih lama dari cache, seperti IncrementalIndexer._catch_up
+        store_changes = cache_manager.store.changes_since(state[1])
+        changes.update(store_changes["urls"])
+        changes.update(store_changes["deleted"])
+    if len(changes) > GRAPH_REBUILD_RATIO * max(link_graph.cached_count, GRAPH_MERGE_MIN_PAGES):
+        return False
+    urls = cache_manager.cache_data["urls"]
+    with metrics.timed("graph_update"):
+        link_graph.apply(((url, urls[url].get("links", ()) if url in urls else None) for url in changes), version)
+    return True
+
+def start_link_graph_merge():
+    """Lipat delta link graph dan publikasikan di thread background (satu merge sekaligus)"""
+    if link_graph_merging.is_set():
+        return
+    link_graph_merging.set()
+    threading.Thread(target=merge_link_graph, name="graph-merge", daemon=True).start()
+
+def merge_link_graph():
+    try:
+        with link_graph_lock:
+            with metrics.timed("graph_merge"):
+                link_graph.merge()
+        with shared_dir.file_lock(link_graph.graph_dir):
+            link_graph.save()
+    except Exception as e:
+        logger.error(f"Error merging link graph: {e}")
+    finally:
+        link_graph_merging.clear()
+
+# Cache hasil /search untuk request cache mode yang berulang
+result_cache = ResultCache()
+
+# Hasil lengkap pencarian terakhir untuk pagination hits/links/log
+search_results = SearchResultStore()
+
+# Ukuran response /search: top-k hits dan halaman pertama links/log
+SEARCH_TOP_K = 50
+LINKS_PAGE_SIZE = 200
+LOG_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+
+# Response JSON minimal sebesar ini dikompresi gzip jika client mendukung
+GZIP_MIN_BYTES = 1024
+GZIP_LEVEL = 6
+
+def ensure_search_index():
+    """Index TF-IDF yang mencakup isi cache saat ini.
+
+    Versi dari disk (atau worker lain) di-load lalu ditambah perubahan
+    setelahnya; build penuh hanya jika belum ada index atau perubahannya
+    terlalu banyak (lihat IncrementalIndexer.sync).
+    """
+    indexer.sync()
+    return search_index
+
+def ensure_positional_index():
+    """Positional index yang mencakup isi cache saat ini (lihat ensure_search_index)"""
+    indexer.sync()
+    return positional_index
+
+# Warm-up di background setelah boot: metadata cache, index dan link graph
+warm_up_done = threading.Event()
+warm_up_lock = threading.Lock()
+warm_up_thread = None
+
+def warm_up():
+    """Load (atau bangun ulang) semua struktur yang dipakai /search sebelum melayani traffic"""
+    try:
+        with metrics.timed("warm_up"):
+            if cache_manager.cache_data["urls"]:
+                ensure_search_index()
+                ensure_positional_index()
+                ensure_link_graph()
+        logger.info(f"Warm-up complete: {len(cache_manager.cache_data['urls'])} cached pages")
+    except Exception as e:
+        # Struktur yang gagal di-load tetap di-load/dibangun saat dipakai pertama kali
+        logger.error(f"Error during warm-up: {e}")
+    finally:
+        warm_up_done.set()
+
+def start_warm_up():
+    """Jalankan warm_up() sekali di thread background"""
+    global warm_up_thread
+    with warm_up_lock:
+        if warm_up_thread is None:
+            warm_up_thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+            warm_up_thread.start()
+    return warm_up_done
+
 def get_clean_text_from_html(content):
     """Bersihkan HTML dan kembalikan teks bersih"""
-    soup = BeautifulSoup(content, 'html.parser')
-    for tag in soup(['script', 'style', 'header', 'footer', 'nav']):
-        tag.decompose()
-    return soup.get_text(separator=' ', strip=True)
+    return parse_page(content)["content"]
 
-def get_page_content(url, use_english, use_cache=True):
-    """Ambil konten halaman dengan opsi cache"""
-    if use_english:
-        url = url.replace("https://www.ui.ac.id", "https://www.ui.ac.id/en")
+def process_page(url, use_english, use_cache=True, fetcher=None, revalidate=False):
+    """Fetch sekali, parse sekali, simpan ke cache; kembalikan title, content dan links.
+
+    Dengan revalidate=True halaman yang sudah di-cache diminta dengan conditional
+    request; jika server menjawab 304, versi cache dipakai tanpa parse ulang.
+    """
+    url = localize_url(canonicalize(url) or url, use_english)
+    fetcher = fetcher or default_fetcher
     
     # Jika menggunakan cache, cek dulu di cache
     if use_cache:
         cached = cache_manager.get_cached_content(url)
         if cached:
-            print(f"[CACHE-HIT] {url}")
-            return cached["content"], cached["title"], cached.get("links", [])
+            logger.debug("[CACHE-HIT] %s", url)
+            return cached
     
     # Fetch dari internet
     try:
-        print(f"[FETCHING] {url}")
-        response = requests.get(url, timeout=10, verify=False)
+        logger.debug("[FETCHING] %s", url)
+        headers = cache_manager.conditional_headers(url) if revalidate else None
+        with metrics.timed("fetch_wait"):
+            response = fetcher.fetch(url, headers)
+        if response.status_code == 304 and revalidate:
+            cached = cache_manager.get_cached_content(url)
+            if cached:
+                logger.debug("[NOT-MODIFIED] %s", url)
+                cache_manager.touch(url)
+                return cached
         if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            title = soup.title.string if soup.title else ""
-            clean_text = get_clean_text_from_html(response.content)
-            
-            # Extract all links that contain 'ui.ac.id'
-            links = [a['href'] for a in soup.find_all('a', href=True) if 'ui.ac.id' in a['href']]
+            # Hasil parse dari process pool jika fetcher memakainya
+            parsed = getattr(response, "parsed", None)
+            page = None
+            with metrics.timed("parse"):
+                if parsed is not None:
+                    try:
+                        page = parsed.result()
+                    except Exception as e:
+                        logger.warning(f"Parse pool failed for {url}: {e}; parsing in thread")
+                if page is None:
+                    # Link relatif di-resolve terhadap URL akhir (setelah redirect)
+                    page = parse_page(response.content, base_url=response.url)
             
             # Simpan ke cache - auto save jika fresh mode
             auto_save = not use_cache  # Auto-save hanya jika fresh mode
-            cache_manager.store_content(url, clean_text, title, links, auto_save)
-            return clean_text, title, links
+            page["duplicate_of"] = cache_manager.store_content(
+                url, page["content"], page["title"], page["links"], auto_save,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified")
+            )
+            return page
     except requests.RequestException as e:
-        print(f"Error fetching {url}: {e}")
+        logger.warning(f"Error fetching {url}: {e}")
     
+    return None
+
+def get_page_content(url, use_english, use_cache=True, fetcher=None):
+    """Ambil konten halaman dengan opsi cache"""
+    page = process_page(url, use_english, use_cache, fetcher)
+    if page:
+        return page["content"], page["title"], page.get("links", [])
     return "", "", []
 
-def get_links(url, use_english, use_cache=True):
+def get_links(url, use_english, use_cache=True, fetcher=None):
     """Ambil semua link dari halaman dengan opsi cache"""
-    if use_english:
-        url = url.replace("https://www.ui.ac.id", "https://www.ui.ac.id/en")
-    
-    # Jika menggunakan cache, cek dulu di cache
-    if use_cache:
-        cached = cache_manager.get_cached_content(url)
-        if cached and "links" in cached:
-            print(f"[CACHE-HIT-LINKS] {url}")
-            return cached["links"]
-    
-    # Fetch dari internet
-    try:
-        print(f"[FETCHING-LINKS] {url}")
-        response = requests.get(url, timeout=10, verify=False)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            links = [a['href'] for a in soup.find_all('a', href=True) if 'ui.ac.id' in a['href']]
-            
-            # Jika belum ada content di cache, simpan sekalian
-            if not cache_manager.get_cached_content(url):
-                title = soup.title.string if soup.title else ""
-                clean_text = get_clean_text_from_html(response.content)
-                auto_save = not use_cache  # Auto-save jika fresh mode
-                cache_manager.store_content(url, clean_text, title, links, auto_save)
-            else:
-                # Update hanya links jika content sudah ada
-                existing = cache_manager.get_cached_content(url)
-                existing["links"] = links
-                auto_save = not use_cache
-                if auto_save:
-                    cache_manager.save_cache()
-            
-            return links
-    except requests.RequestException as e:
-        print(f"Error fetching {url}: {e}")
+    page = process_page(url, use_english, use_cache, fetcher)
+    if page:
+        return page.get("links", [])
     return []
 
-def search_keyword_in_page(url, keyword, use_english, use_cache=True):
+def search_keyword_in_page(url, keyword, use_english, use_cache=True, fetcher=None):
     """Cari keyword di halaman dengan memoization dan TF-IDF, return similarity score"""
     if not keyword.strip():
         return False, 0.0
     
-    # Jika menggunakan cache, ambil content dari cache
+    # Jika menggunakan cache, ambil dari cache; jika fresh mode, ambil dari web
     if use_cache:
-        cached_data = cache_manager.get_cached_content(url)
-        if cached_data:
-            content = cached_data.get("content", "")
-            if not content:
-                return False, 0.0
-        else:
-            return False, 0.0
+        page = cache_manager.get_cached_content(url)
     else:
-        # Jika fresh mode, ambil dari web
-        content, title, links = get_page_content(url, use_english, use_cache)
-        if not content:
-            return False, 0.0
+        page = process_page(url, use_english, use_cache, fetcher)
     
+    return score_content(url, page, keyword, use_index=use_cache)
+
+def score_content(url, page, keyword, use_index=True):
+    """Hitung similarity TF-IDF antara halaman dan keyword.
+
+    Content halaman hanya di-load jika URL belum ada di index. Keyword
+    dengan frase ("...") atau wildcard (*, ?) harus cocok di positional
+    index; skornya dihitung dari term hasil ekspansi.
+    """
+    if not page or not keyword.strip():
+        return False, 0.0
+    
+    structured = is_structured_query(keyword)
     # Gunakan TF-IDF untuk pencarian yang lebih akurat
     try:
-        vectorizer = TfidfVectorizer(stop_words='english')
-        tfidf = vectorizer.fit_transform([content, keyword])
-        similarity = cosine_similarity(tfidf[0:1], tfidf[1:2])
-        similarity_score = similarity[0][0]
-        print(f"[{url}] TF-IDF similarity: {similarity_score:.4f}")
-        return similarity_score > 0.01, similarity_score
+        query = positional_index.expand_query(keyword) if structured else keyword
+        # Halaman yang sudah ter-index cukup lookup skor dari satu sparse product per query
+        similarity_score = search_index.score(url, query) if use_index else None
+        if similarity_score is None:
+            content = page.get("content", "")
+            if not content:
+                return False, 0.0
+            similarity_score = search_index.score_text(content, query)
+        is_found = keyword_matches(url, page, keyword, use_index) if structured else similarity_score > 0.01
+        logger.debug("[%s] TF-IDF similarity: %.4f", url, similarity_score)
+        return is_found, similarity_score
     except:
-        # Fallback ke pencarian sederhana
-        is_found = keyword.lower() in content.lower()
+        # Fallback ke pencocokan term/frase (tokenisasi sama dengan positional index)
+        is_found = keyword_matches(url, page, keyword, use_index)
         fallback_score = 0.1 if is_found else 0.0
-        print(f"[{url}] Fallback similarity: {fallback_score:.4f}")
+        logger.debug("[%s] Fallback similarity: %.4f", url, fallback_score)
         return is_found, fallback_score
 
-def bfs(start_url, max_depth, keyword="", use_english=False, use_cache=True, progress_callback=None):
-    """BFS dengan opsi cache dan memoization"""
-    visited = set()
-    queue = deque([(start_url, 0, [])])
-    all_links = set()
-    keyword_found_urls = set()
-    search_log = []
-    path_info = {}
-    similarity_scores = {}
+def keyword_matches(url, page, keyword, use_index=True):
+    """Semua term/frase keyword ada di halaman: dari positional index, atau dari content jika belum ter-index"""
+    found = positional_index.contains(url, keyword) if use_index else None
+    if found is None:
+        found = match_text(keyword, page.get("content", ""))
+    return found
 
-    visited_count = 0
-    cache_hits = 0
-    cache_misses = 0
-    
-    cache_mode = "[CACHE MODE]" if use_cache else "[FRESH MODE]"
-    search_log.append(f"{cache_mode} Starting BFS crawling from {start_url}")
-    
-    while queue:
-        current_url, depth, path = queue.popleft()
-        
-        if max_depth != -1 and depth > max_depth:
+def prefetch_frontier(fetcher, frontier, use_english, use_cache, limit=None):
+    """Prefetch URL berikutnya di frontier agar fetch berjalan paralel (maksimal limit URL)"""
+    tree = frontier.tree
+    urls = []
+    max_urls = fetcher.max_pending if limit is None else min(limit, fetcher.max_pending)
+    # Batasi scan agar frontier besar tidak di-iterasi penuh setiap fetch
+    for node in islice(frontier.upcoming(), fetcher.max_pending * 8):
+        if len(urls) >= max_urls:
+            break
+        if tree.visited[node]:
             continue
-        
-        if current_url not in visited:
-            visited.add(current_url)
-            visited_count += 1
-            
-            # Jika menggunakan cache mode, cek apakah URL sudah ada di cache
-            if use_cache:
-                cached_data = cache_manager.get_cached_content(current_url)
-                if cached_data:
-                    cache_hits += 1
-                    log_entry = f"[CACHE-HIT] (Depth {depth}): {current_url}"
-                    search_log.append(log_entry)
-                    print(log_entry)
-                    
-                    # Ambil data dari cache tanpa network request
-                    content = cached_data.get("content", "")
-                    links = cached_data.get("links", [])
-                    
-                    # Update progress
-                    if progress_callback:
-                        progress_callback({
-                            'status': 'cache_hit',
-                            'url': current_url,
-                            'depth': depth,
-                            'visited_count': visited_count,
-                            'cache_hits': cache_hits,
-                            'log': log_entry
-                        })
-                    
-                    # Cek keyword dari cache menggunakan TF-IDF
-                    if keyword:
-                        is_found, similarity_score = search_keyword_in_page(current_url, keyword, use_english, use_cache)
-                        if is_found:
-                            log_entry = f"Keyword '{keyword}' found in cache: {current_url} (Similarity: {similarity_score:.4f})"
-                            search_log.append(log_entry)
-                            print(log_entry)
-                            keyword_found_urls.add(current_url)
-                            path_with_current = path + [current_url]
-                            path_info[current_url] = path_with_current
-                            similarity_scores[current_url] = similarity_score
-                            path_log = f"Path to keyword: {' -> '.join(path_with_current)}"
-                            search_log.append(path_log)
-                            print(path_log)
-                            
-                            if progress_callback:
-                                progress_callback({
-                                    'status': 'found',
-                                    'url': current_url,
-                                    'path': path_with_current,
-                                    'similarity_score': similarity_score,
-                                    'log': log_entry
-                                })
-                    
-                    # Tambahkan links dari cache
-                    all_links.update(links)
-                    
-                    # Tambahkan link yang belum dikunjungi ke dalam antrian
-                    for link in links:
-                        if link not in visited:
-                            queue.append((link, depth + 1, path + [current_url]))
-                    
-                    # Tidak perlu sleep karena tidak ada network request
-                    continue
-            
-            # Jika tidak ada di cache atau fresh mode, lakukan network request
-            cache_misses += 1
-            log_entry = f"[FETCHING] (Depth {depth}): {current_url}"
-            search_log.append(log_entry)
-            print(log_entry)
-            
-            # Update progress jika callback diberikan
-            if progress_callback:
-                progress_callback({
-                    'status': 'fetching',
-                    'url': current_url,
-                    'depth': depth,
-                    'visited_count': visited_count,
-                    'cache_misses': cache_misses,
-                    'log': log_entry,
-                    'cache_mode': use_cache
-                })
-            
-            # Mencari kata kunci di halaman
-            if keyword:
-                is_found, similarity_score = search_keyword_in_page(current_url, keyword, use_english, use_cache)
-                if is_found:
-                    log_entry = f"Keyword '{keyword}' found at: {current_url} (Similarity: {similarity_score:.4f})"
-                    search_log.append(log_entry)
-                    print(log_entry)
-                    keyword_found_urls.add(current_url)
-                    path_with_current = path + [current_url]
-                    path_info[current_url] = path_with_current
-                    similarity_scores[current_url] = similarity_score
-                    path_log = f"Path to keyword: {' -> '.join(path_with_current)}"
-                    search_log.append(path_log)
-                    print(path_log)
-                    
-                    if progress_callback:
-                        progress_callback({
-                            'status': 'found',
-                            'url': current_url,
-                            'path': path_with_current,
-                            'similarity_score': similarity_score,
-                            'log': log_entry
-                        })
-
-            links = get_links(current_url, use_english, use_cache)
-            all_links.update(links)
-            
-            # Tambahkan link yang belum dikunjungi ke dalam antrian
-            for link in links:
-                if link not in visited:
-                    queue.append((link, depth + 1, path + [current_url]))
+        url = localize_url(tree.urls[node], use_english)
+        if use_cache and cache_manager.get_cached_content(url):
+            continue
+        urls.append(url)
+    fetcher.prefetch(urls)
 
-            # Sleep hanya untuk network request (fresh mode atau cache miss)
-            time.sleep(0.2)
+# Frontier untuk setiap algoritma traversal
+FRONTIERS = {
+    "bfs": BfsFrontier,
+    "dfs": DfsFrontier,
+    "best": BestFirstFrontier,  # Crawl terfokus: link paling menjanjikan untuk keyword dulu
+}
 
-    # Simpan cache setelah crawling selesai (hanya jika mode fresh)
-    if not use_cache:
-        cache_manager.update_metadata(start_url, "bfs", max_depth)
-        cache_manager.save_cache()
+def graph_traverse(start_url, max_depth, keyword="", algorithm="bfs", progress_callback=None):
+    """Traversal cache mode langsung di link graph CSR.
+
+    Hasil sama dengan traverse() dalam cache mode. Return None jika ada halaman
+    terjangkau yang belum di-cache (perlu fetch), sehingga traversal biasa dipakai.
+    """
+    graph = ensure_link_graph()
+    start = graph.node_ids.get(start_url)
+    if start is None or start >= len(graph.cached) or not graph.cached[start]:
+        return None
+    with metrics.timed("traverse_graph"):
+        if algorithm == "dfs":
+            order, depth, parent = graph.dfs(start, max_depth)
+        else:
+            order, depth, parent = graph.bfs(start, max_depth)
+    if order.max() >= len(graph.cached) or not graph.cached[order].all():
+        return None
     
-    # Log statistik cache
-    if use_cache:
-        cache_stats_log = f"Cache Performance - Hits: {cache_hits}, Misses: {cache_misses}, Hit Ratio: {cache_hits/(cache_hits+cache_misses)*100:.1f}%"
-        search_log.append(cache_stats_log)
-        print(cache_stats_log)
+    scores = None
+    if keyword.strip():
+        index = ensure_search_index()
+        structured = is_structured_query(keyword)
+        positional = ensure_positional_index() if structured else None
+        query = positional.expand_query(keyword) if structured else keyword
+        # Skor dan doc id dari keadaan index yang sama (segment baru bisa masuk kapan saja)
+        with index.locked_scores(query) as query_scores:
+            if query_scores is None:
+                return None
+            doc_ids = graph.doc_ids(index.url_ids, (index.source_version, index.revision),
+                                    cache_manager.canonical_url)[order]
+        # Dokumen yang masuk index setelah skor dihitung belum punya skor
+        scored = (doc_ids >= 0) & (doc_ids < len(query_scores))
+        scores = np.zeros(len(doc_ids), dtype=np.float64)
+        scores[scored] = query_scores[doc_ids[scored]]
+        if structured:
+            # Frase/wildcard: halaman ditemukan jika cocok di positional index, skor tetap TF-IDF
+            matched = positional.match_urls(keyword)
+            found = np.fromiter((cache_manager.canonical_url(graph.urls[node]) in matched for node in order.tolist()),
+                                dtype=bool, count=len(order))
+        else:
+            found = scores > 0.01
+    
+    urls = graph.urls
+    all_links = set(urls[node] for node in np.unique(graph.neighbors(order)[0]))
+    keyword_found_urls = set()
+    path_info = {}
+    similarity_scores = {}
+    duplicate_groups = {}
+    search_log = SearchLog()
+    search_log.append(f"[CACHE MODE] Starting {algorithm.upper()} crawling from {start_url}")
+    for i, node in enumerate(order.tolist()):
+        url = urls[node]
+        search_log.debug(f"[CACHE-HIT] (Depth {depth[node]}): {url}")
+        if scores is None or not found[i]:
+            continue
+        canonical = cache_manager.canonical_url(url)
+        if canonical in duplicate_groups:
+            search_log.debug(f"[DUPLICATE] {url} is a near-duplicate of {duplicate_groups[canonical]}")
+            continue
+        duplicate_groups[canonical] = url
+        similarity_score = float(scores[i])
+        keyword_found_urls.add(url)
+        path_with_current = graph.path(parent, node)
+        path_info[url] = path_with_current
+        similarity_scores[url] = similarity_score
+        log_entry = f"Keyword '{keyword}' found in cache: {url} (Similarity: {similarity_score:.4f})"
+        search_log.debug(log_entry)
+        search_log.debug(f"Path to keyword: {' -> '.join(path_with_current)}")
+        if progress_callback:
+            progress_callback({
+                'status': 'found',
+                'url': url,
+                'path': path_with_current,
+                'similarity_score': similarity_score,
+                'log': log_entry
+            })
+    
+    visited_count = len(order)
+    pages_visited.labels("cache").inc(visited_count)
+    search_log.append(f"Cache Performance - Hits: {visited_count}, Misses: 0, Hit Ratio: 100.0%")
+    logger.info(f"[GRAPH] {algorithm.upper()} from {start_url}: {visited_count} pages, {len(keyword_found_urls)} matches")
     
     if progress_callback:
         progress_callback({
@@ -364,103 +872,152 @@ def bfs(start_url, max_depth, keyword="", use_english=False, use_cache=True, pro
             'visited_count': visited_count,
             'all_links_count': len(all_links),
             'keyword_found_count': len(keyword_found_urls),
-            'cache_hits': cache_hits if use_cache else 0,
-            'cache_misses': cache_misses
+            'cache_hits': visited_count,
+            'cache_misses': 0
         })
-        
+    
     return all_links, keyword_found_urls, search_log, path_info, similarity_scores
 
-def dfs(start_url, max_depth, keyword="", use_english=False, use_cache=True, progress_callback=None):
-    """DFS dengan opsi cache dan memoization"""
-    visited = set()
-    stack = [(start_url, 0, [])]
-    all_links = set()
-    keyword_found_urls = set()
-    search_log = []
-    path_info = {}
-    similarity_scores = {}
+# Checkpoint state traversal setiap N halaman (untuk job yang bisa di-resume)
+CHECKPOINT_EVERY = 50
+
+def traverse(start_url, max_depth, keyword="", use_english=False, use_cache=True, progress_callback=None,
+             algorithm="bfs", should_stop=None, checkpoint=None, resume_state=None, revalidate=False,
+             max_fetches=None, stop_after=None):
+    """Traversal BFS/DFS/best-first dengan opsi cache dan memoization.
 
-    visited_count = 0
-    cache_hits = 0
-    cache_misses = 0
+    should_stop() dicek sebelum setiap halaman, checkpoint(state) dipanggil
+    setiap CHECKPOINT_EVERY halaman, dan resume_state melanjutkan traversal
+    dari checkpoint sebelumnya. revalidate=True (fresh mode) mengirim
+    conditional request untuk halaman yang sudah di-cache. max_fetches
+    membatasi jumlah network fetch dan stop_after menghentikan traversal
+    setelah sejumlah halaman cocok dengan keyword.
+    """
+    start_url = canonicalize(start_url) or start_url
+    # Cache mode tanpa checkpoint: coba traversal langsung di link graph
+    if (use_cache and not revalidate and not use_english and resume_state is None and checkpoint is None
+            and algorithm in ("bfs", "dfs") and not stop_after):
+        result = graph_traverse(start_url, max_depth, keyword, algorithm, progress_callback)
+        if result is not None:
+            return result
+    if revalidate:
+        use_cache = False
+        cache_mode = "[REVALIDATE MODE]"
+    else:
+        cache_mode = "[CACHE MODE]" if use_cache else "[FRESH MODE]"
+    start_generation = cache_manager.generation
     
-    cache_mode = "[CACHE MODE]" if use_cache else "[FRESH MODE]"
-    search_log.append(f"{cache_mode} Starting DFS crawling from {start_url}")
+    if resume_state:
+        # Lanjutkan dari checkpoint: frontier, visited dan hasil sementara
+        tree = TraversalTree.from_dict(resume_state["tree"])
+        frontier = FRONTIERS[algorithm](tree, max_depth)
+        frontier.restore(resume_state["frontier"])
+        all_links = set(resume_state["all_links"])
+        keyword_found_urls = set(resume_state["keyword_found_urls"])
+        search_log = SearchLog.from_dict(resume_state["search_log"])
+        path_info = resume_state["path_info"]
+        similarity_scores = resume_state["similarity_scores"]
+        duplicate_groups = resume_state.get("duplicate_groups", {})
+        visited_count = resume_state["visited_count"]
+        cache_hits = resume_state["cache_hits"]
+        cache_misses = resume_state["cache_misses"]
+        search_log.append(f"{cache_mode} Resuming {algorithm.upper()} crawling from checkpoint ({visited_count} pages visited)")
+    else:
+        # Frontier hanya menyimpan node id; parent/depth disimpan per node di tree
+        tree = TraversalTree()
+        frontier = FRONTIERS[algorithm](tree, max_depth)
+        frontier.push(start_url, -1, 0)
+        all_links = set()
+        keyword_found_urls = set()
+        search_log = SearchLog()
+        path_info = {}
+        similarity_scores = {}
+        duplicate_groups = {}  # URL kanonik -> URL hasil yang mewakili grup duplikat
+
+        visited_count = 0
+        cache_hits = 0
+        cache_misses = 0
+        
+        search_log.append(f"{cache_mode} Starting {algorithm.upper()} crawling from {start_url}")
+    fetcher = PageFetcher(
+        conditional_headers=cache_manager.conditional_headers if revalidate else None,
+        parse_pool=parse_pool
+    )
     
-    while stack:
-        current_url, depth, path = stack.pop()
+    def export_state():
+        # Pastikan halaman yang sudah di-crawl ikut ter-commit sebelum checkpoint
+        cache_manager.store.flush()
+        return {
+            "algorithm": algorithm,
+            "tree": tree.to_dict(),
+            "frontier": frontier.snapshot(),
+            "all_links": list(all_links),
+            "keyword_found_urls": list(keyword_found_urls),
+            "search_log": search_log.to_dict(),
+            "path_info": path_info,
+            "similarity_scores": similarity_scores,
+            "duplicate_groups": duplicate_groups,
+            "visited_count": visited_count,
+            "cache_hits": cache_hits,
+            "cache_misses": cache_misses
+        }
+    
+    if keyword and use_cache:
+        ensure_search_index()
+        ensure_positional_index()
+    canonical_scores = {}
+    # Term keyword untuk prioritas link best-first
+    keyword_terms = tokenize(keyword) if algorithm == "best" else None
+    
+    while True:
+        if should_stop and should_stop():
+            search_log.append(f"Crawling stopped after {visited_count} pages")
+            if checkpoint:
+                checkpoint(export_state())
+            break
+        if max_fetches and cache_misses >= max_fetches:
+            search_log.append(f"Fetch budget of {max_fetches} pages reached after {visited_count} pages")
+            break
+        if stop_after and len(keyword_found_urls) >= stop_after:
+            search_log.append(f"Found {len(keyword_found_urls)} matching pages, stopping early")
+            break
         
-        if max_depth != -1 and depth > max_depth:
-            continue
+        node = frontier.pop()
+        if node is None:
+            break
+        current_url = tree.urls[node]
+        depth = tree.depth[node]
+        visited_count += 1
+        # Key cache sama dengan yang dipakai process_page (termasuk versi English)
+        cache_key = localize_url(current_url, use_english)
         
-        if current_url not in visited:
-            visited.add(current_url)
-            visited_count += 1
-            
-            # Jika menggunakan cache mode, cek apakah URL sudah ada di cache
-            if use_cache:
-                cached_data = cache_manager.get_cached_content(current_url)
-                if cached_data:
-                    cache_hits += 1
-                    log_entry = f"[CACHE-HIT] (Depth {depth}): {current_url}"
-                    search_log.append(log_entry)
-                    print(log_entry)
-                    
-                    # Ambil data dari cache tanpa network request
-                    content = cached_data.get("content", "")
-                    links = cached_data.get("links", [])
-                    
-                    # Update progress
-                    if progress_callback:
-                        progress_callback({
-                            'status': 'cache_hit',
-                            'url': current_url,
-                            'depth': depth,
-                            'visited_count': visited_count,
-                            'cache_hits': cache_hits,
-                            'log': log_entry
-                        })
-                    
-                    # Cek keyword dari cache menggunakan TF-IDF
-                    if keyword:
-                        is_found, similarity_score = search_keyword_in_page(current_url, keyword, use_english, use_cache)
-                        if is_found:
-                            log_entry = f"Keyword '{keyword}' found in cache: {current_url} (Similarity: {similarity_score:.4f})"
-                            search_log.append(log_entry)
-                            print(log_entry)
-                            keyword_found_urls.add(current_url)
-                            path_with_current = path + [current_url]
-                            path_info[current_url] = path_with_current
-                            similarity_scores[current_url] = similarity_score
-                            path_log = f"Path to keyword: {' -> '.join(path_with_current)}"
-                            search_log.append(path_log)
-                            print(path_log)
-                            
-                            if progress_callback:
-                                progress_callback({
-                                    'status': 'found',
-                                    'url': current_url,
-                                    'path': path_with_current,
-                                    'similarity_score': similarity_score,
-                                    'log': log_entry
-                                })
-                    
-                    # Tambahkan links dari cache
-                    all_links.update(links)
-                    
-                    # Tambahkan link yang belum dikunjungi ke dalam stack (urutan terbalik agar traversal DFS benar)
-                    for link in reversed(links):
-                        if link not in visited:
-                            stack.append((link, depth + 1, path + [current_url]))
-                    
-                    # Tidak perlu sleep karena tidak ada network request
-                    continue
+        # Jika menggunakan cache mode, cek apakah URL sudah ada di cache
+        page = cache_manager.get_cached_content(cache_key) if use_cache else None
+        frontier_size.set(len(frontier))
+        if page:
+            cache_hits += 1
+            pages_visited.labels("cache").inc()
+            found_label = "found in cache:"
+            log_entry = f"[CACHE-HIT] (Depth {depth}): {current_url}"
+            search_log.debug(log_entry)
             
+            # Update progress
+            if progress_callback:
+                progress_callback({
+                    'status': 'cache_hit',
+                    'url': current_url,
+                    'depth': depth,
+                    'visited_count': visited_count,
+                    'cache_hits': cache_hits,
+                    'log': log_entry
+                })
+        else:
             # Jika tidak ada di cache atau fresh mode, lakukan network request
             cache_misses += 1
+            pages_visited.labels("fetch").inc()
+            found_label = "found at:"
             log_entry = f"[FETCHING] (Depth {depth}): {current_url}"
-            search_log.append(log_entry)
-            print(log_entry)
+            search_log.debug(log_entry)
             
             # Update progress jika callback diberikan
             if progress_callback:
@@ -474,51 +1031,83 @@ def dfs(start_url, max_depth, keyword="", use_english=False, use_cache=True, pro
                     'cache_mode': use_cache
                 })
             
-            # Mencari kata kunci di halaman
-            if keyword:
-                is_found, similarity_score = search_keyword_in_page(current_url, keyword, use_english, use_cache)
-                if is_found:
-                    log_entry = f"Keyword '{keyword}' found at: {current_url} (Similarity: {similarity_score:.4f})"
-                    search_log.append(log_entry)
-                    print(log_entry)
-                    keyword_found_urls.add(current_url)
-                    path_with_current = path + [current_url]
-                    path_info[current_url] = path_with_current
-                    similarity_scores[current_url] = similarity_score
-                    path_log = f"Path to keyword: {' -> '.join(path_with_current)}"
-                    search_log.append(path_log)
-                    print(path_log)
-                    
-                    if progress_callback:
-                        progress_callback({
-                            'status': 'found',
-                            'url': current_url,
-                            'path': path_with_current,
-                            'similarity_score': similarity_score,
-                            'log': log_entry
-                        })
-
-            links = get_links(current_url, use_english, use_cache)
-            all_links.update(links)
+            # Fetch URL berikutnya di frontier secara paralel selagi halaman ini diproses
+            prefetch_frontier(fetcher, frontier, use_english, use_cache,
+                              max_fetches - cache_misses if max_fetches else None)
+            prefetch_pending.set(fetcher.pending_count())
             
-            # Tambahkan link yang belum dikunjungi ke dalam stack (urutan terbalik agar traversal DFS benar)
-            for link in reversed(links):
-                if link not in visited:
-                    stack.append((link, depth + 1, path + [current_url]))
-
-            # Sleep hanya untuk network request (fresh mode atau cache miss)
-            time.sleep(0.2)
+            # Satu kali fetch + parse untuk keyword dan links
+            page = process_page(current_url, use_english, use_cache, fetcher, revalidate)
+        
+        # Ambil links tanpa network request tambahan (content di-load hanya jika perlu)
+        links = page.get("links", []) if page else []
+        
+        # Mencari kata kunci di halaman menggunakan TF-IDF
+        similarity_score = 0.0
+        if keyword:
+            # Near-duplicate memakai skor dokumen kanoniknya (dihitung sekali per grup)
+            canonical = cache_manager.canonical_url(cache_key)
+            if canonical in canonical_scores:
+                is_found, similarity_score = canonical_scores[canonical]
+            else:
+                with metrics.timed("score"):
+                    is_found, similarity_score = score_content(canonical, page, keyword, use_index=use_cache)
+                canonical_scores[canonical] = (is_found, similarity_score)
+            if is_found and canonical in duplicate_groups:
+                # Hanya URL pertama dari satu grup duplikat yang masuk hasil
+                search_log.debug(f"[DUPLICATE] {current_url} is a near-duplicate of {duplicate_groups[canonical]}")
+            elif is_found:
+                duplicate_groups[canonical] = current_url
+                log_entry = f"Keyword '{keyword}' {found_label} {current_url} (Similarity: {similarity_score:.4f})"
+                search_log.debug(log_entry)
+                keyword_found_urls.add(current_url)
+                # Path dibangun dari parent pointer hanya untuk URL yang cocok
+                path_with_current = tree.path(node)
+                path_info[current_url] = path_with_current
+                similarity_scores[current_url] = similarity_score
+                path_log = f"Path to keyword: {' -> '.join(path_with_current)}"
+                search_log.debug(path_log)
+                
+                if progress_callback:
+                    progress_callback({
+                        'status': 'found',
+                        'url': current_url,
+                        'path': path_with_current,
+                        'similarity_score': similarity_score,
+                        'log': log_entry
+                    })
+        
+        all_links.update(links)
+        
+        # Tambahkan link yang belum dikunjungi ke frontier
+        priorities = None
+        if keyword_terms is not None:
+            anchors = page.get("anchors") if page else None
+            priorities = [
+                link_priority(link, anchors[i] if anchors else "", similarity_score, depth + 1, keyword_terms)
+                for i, link in enumerate(links)
+            ]
+        frontier.push_links(links, node, depth + 1, priorities)
+        
+        if checkpoint and visited_count % CHECKPOINT_EVERY == 0:
+            checkpoint(export_state())
 
+    fetcher.close()
+    
     # Simpan cache setelah crawling selesai (hanya jika mode fresh)
-    if not use_cache:
-        cache_manager.update_metadata(start_url, "dfs", max_depth)
+    # Revalidasi yang semuanya 304 tidak mengubah cache, jadi index tidak perlu dibangun ulang
+    if not use_cache and cache_manager.generation != start_generation:
+        cache_manager.update_metadata(start_url, algorithm, max_depth)
+        cache_manager.save_cache()
+        ensure_search_index()
+        ensure_positional_index()
+    elif not use_cache:
         cache_manager.save_cache()
     
     # Log statistik cache
     if use_cache:
-        cache_stats_log = f"Cache Performance - Hits: {cache_hits}, Misses: {cache_misses}, Hit Ratio: {cache_hits/(cache_hits+cache_misses)*100:.1f}%"
+        cache_stats_log = f"Cache Performance - Hits: {cache_hits}, Misses: {cache_misses}, Hit Ratio: {cache_hits/max(cache_hits+cache_misses, 1)*100:.1f}%"
         search_log.append(cache_stats_log)
-        print(cache_stats_log)
     
     if progress_callback:
         progress_callback({
@@ -532,6 +1121,52 @@ def dfs(start_url, max_depth, keyword="", use_english=False, use_cache=True, pro
         
     return all_links, keyword_found_urls, search_log, path_info, similarity_scores
 
+def bfs(start_url, max_depth, keyword="", use_english=False, use_cache=True, progress_callback=None):
+    """BFS dengan opsi cache dan memoization"""
+    return traverse(start_url, max_depth, keyword, use_english, use_cache, progress_callback, algorithm="bfs")
+
+def dfs(start_url, max_depth, keyword="", use_english=False, use_cache=True, progress_callback=None):
+    """DFS dengan opsi cache dan memoization"""
+    return traverse(start_url, max_depth, keyword, use_english, use_cache, progress_callback, algorithm="dfs")
+
+def partitioned_crawl(start_url, max_depth, workers, use_english=False, progress_callback=None, should_stop=None):
+    """Crawl fresh dengan beberapa proses worker (lihat partition.py), lalu gabungkan shard ke cache.
+
+    Return ringkasan: jumlah halaman per worker, halaman yang digabung dan durasi.
+    """
+    run_dir = new_run_dir()
+    started = time.perf_counter()
+    merged = 0
+    try:
+        with metrics.timed("partition_crawl"):
+            shards, statuses = crawl_partitioned(start_url, max_depth, workers, use_english, run_dir,
+                                                 should_stop=should_stop, progress_callback=progress_callback)
+        crawled = time.perf_counter()
+        with metrics.timed("shard_merge"):
+            for shard in shards:
+                path = os.path.join(shard, cache_manager.cache_file)
+                if not os.path.exists(path):
+                    continue
+                store = open_store(path, cache_manager.backend)
+                try:
+                    merged += cache_manager.merge_shard(store)
+                finally:
+                    store.close()
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    cache_manager.update_metadata(canonicalize(start_url) or start_url, "partitioned", max_depth)
+    cache_manager.save_cache()
+    ensure_search_index()
+    ensure_positional_index()
+    logger.info(f"[PARTITIONED] Merged {merged} pages from {len(shards)} shards")
+    return {
+        'workers': workers,
+        'pages_per_worker': [status.get("pages", 0) for status in statuses],
+        'merged_pages': merged,
+        'crawl_seconds': crawled - started,
+        'merge_seconds': time.perf_counter() - crawled
+    }
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -539,58 +1174,500 @@ def index():
 @app.route('/cache-stats')
 def cache_stats():
     """Endpoint untuk mendapatkan statistik cache"""
-    return jsonify(cache_manager.get_cache_stats())
+    cache_manager.refresh()
+    stats = cache_manager.get_cache_stats()
+    stats["result_cache"] = result_cache.stats()
+    return jsonify(stats)
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: 503 selama warm-up (dimulai oleh probe pertama), 200 setelah selesai"""
+    if start_warm_up().is_set():
+        return jsonify({"status": "ready", "cached_pages": len(cache_manager.cache_data["urls"])})
+    return jsonify({"status": "warming_up"}), 503
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Metric dalam format Prometheus"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
 
 @app.route('/clear-cache', methods=['POST'])
 def clear_cache():
     """Endpoint untuk menghapus cache"""
     cache_manager.clear_cache()
+    search_index.clear()
+    positional_index.clear()
+    link_graph.clear()
+    result_cache.clear()
+    search_results.clear()
     return jsonify({"status": "success", "message": "Cache cleared successfully"})
 
-@app.route('/search', methods=['POST'])
-def search():
-    data = request.json
-    start_url = data.get('start_url', 'https://www.ui.ac.id')
-    max_depth = int(data.get('max_depth', -1))
-    keyword = data.get('keyword', '')
-    use_english = data.get('use_english', False)
-    algorithm = data.get('algorithm', 'bfs')
-    use_cache = data.get('use_cache', True)
-    
-    # Pilih algoritma yang akan digunakan
-    if algorithm.lower() == 'dfs':
-        all_links, keyword_found_urls, search_log, path_info, similarity_scores = dfs(
-            start_url, 
-            max_depth, 
-            keyword, 
-            use_english,
-            use_cache
-        )
-    else:
-        all_links, keyword_found_urls, search_log, path_info, similarity_scores = bfs(
-            start_url, 
-            max_depth, 
-            keyword, 
-            use_english,
-            use_cache
+def parse_search_params(data):
+    """Ambil parameter pencarian dari payload request"""
+    return {
+        'start_url': data.get('start_url', 'https://www.ui.ac.id'),
+        'max_depth': int(data.get('max_depth', -1)),
+        'keyword': data.get('keyword', ''),
+        'use_english': data.get('use_english', False),
+        'algorithm': data.get('algorithm', 'bfs'),
+        'use_cache': data.get('use_cache', True),
+        'revalidate': data.get('revalidate', False),
+        'max_fetches': int(data['max_fetches']) if data.get('max_fetches') else None,
+        'stop_after': int(data['stop_after']) if data.get('stop_after') else None,
+        'partitions': max(1, int(data.get('partitions') or 1)),
+        'k': max(1, min(int(data.get('k') or SEARCH_TOP_K), MAX_PAGE_SIZE)),
+        'timings': bool(data.get('timings', False))
+    }
+
+def run_search(params, progress_callback=None, **traverse_options):
+    """Jalankan traversal dan susun hasil lengkap pencarian (lihat search_response)"""
+    algorithm = params['algorithm']
+    use_cache = params['use_cache']
+    traversal_algorithm = algorithm.lower() if algorithm.lower() in FRONTIERS else 'bfs'
+    # Breakdown durasi per tahap untuk request ini jika diminta
+    collector = metrics.collect_timings() if params.get('timings') else nullcontext()
+    # Crawl fresh terpartisi: worker mengisi cache, lalu hasil dihitung dengan traversal cache mode
+    partitioned = None
+    partitions = params.get('partitions', 1)
+    # Event 'complete' traversal membawa jumlah halaman yang dikunjungi ("URLs Crawled")
+    completion = {}
+    
+    def track_progress(event):
+        if event.get('status') == 'complete':
+            completion.update(event)
+        if progress_callback:
+            progress_callback(event)
+    
+    with collector as timings:
+        if partitions > 1 and not use_cache and traverse_options.get('resume_state') is None:
+            partitioned = partitioned_crawl(
+                params['start_url'], params['max_depth'], partitions, params['use_english'],
+                progress_callback, traverse_options.get('should_stop')
+            )
+            # Checkpoint traversal cache mode tidak berguna untuk resume crawl terpartisi
+            traverse_options.pop('checkpoint', None)
+        # Pilih algoritma yang akan digunakan
+        with metrics.timed("traverse"):
+            all_links, keyword_found_urls, search_log, path_info, similarity_scores = traverse(
+                params['start_url'],
+                params['max_depth'],
+                params['keyword'],
+                params['use_english'],
+                use_cache or partitioned is not None,
+                track_progress,
+                algorithm=traversal_algorithm,
+                revalidate=params.get('revalidate', False) and partitioned is None,
+                max_fetches=params.get('max_fetches'),
+                stop_after=params.get('stop_after'),
+                **traverse_options
+            )
+    if partitioned is not None:
+        search_log.append(
+            f"[PARTITIONED] {partitioned['workers']} workers crawled {sum(partitioned['pages_per_worker'])} pages "
+            f"in {partitioned['crawl_seconds']:.2f}s (per worker: {partitioned['pages_per_worker']}), "
+            f"merged {partitioned['merged_pages']} pages in {partitioned['merge_seconds']:.2f}s"
         )
-      # Sort keyword_found_urls by similarity score (highest first)
+    # Sort keyword_found_urls by similarity score (highest first)
     sorted_keyword_found_urls = sorted(
         list(keyword_found_urls), 
         key=lambda url: similarity_scores.get(url, 0), 
         reverse=True
     )
     
-    return jsonify({
+    result = {
+        'keyword': params['keyword'],
         'all_links': list(all_links),
         'keyword_found_urls': sorted_keyword_found_urls,
         'search_log': search_log,
+        'visited_count': completion.get('visited_count', 0),
         'path_info': path_info,
         'similarity_scores': similarity_scores,
         'algorithm': algorithm,
-        'cache_used': use_cache,
+        'cache_used': use_cache and not params.get('revalidate', False),
+        'revalidated': params.get('revalidate', False),
         'cache_stats': cache_manager.get_cache_stats()
+    }
+    if partitioned is not None:
+        result['partitioned'] = partitioned
+    if timings is not None:
+        result['timings'] = timings
+    return result
+
+def page_items(items, cursor, limit):
+    """Satu halaman list mulai offset cursor; return (items, next_cursor atau None)"""
+    end = cursor + limit
+    return items[cursor:end], (end if end < len(items) else None)
+
+def hit_snippets(keyword, urls):
+    """Snippet hits dengan highlight dari offset di positional index (content hanya di-slice)"""
+    if not keyword.strip() or not urls:
+        return {}
+    index = ensure_positional_index()
+    snippets = {}
+    for url in urls:
+        # Near-duplicate memakai content dokumen kanoniknya
+        canonical = cache_manager.canonical_url(url)
+        spans = index.spans(canonical, keyword)
+        if spans:
+            snippets[url] = make_snippet(cache_manager.load_content(canonical), spans)
+    return snippets
+
+def hit_entries(result, urls):
+    snippets = hit_snippets(result.get('keyword', ''), urls)
+    return [
+        {'url': url, 'similarity_score': result['similarity_scores'].get(url, 0), 'path': result['path_info'].get(url, []),
+         'snippet': snippets.get(url)}
+        for url in urls
+    ]
+
+def search_response(result, params):
+    """Payload /search berukuran tetap: top-k hits dan halaman pertama links/log.
+
+    Hasil lengkap disimpan di search_results; halaman berikutnya diambil lewat
+    /search/<search_id>/hits, /links dan /log dengan cursor dari payload ini.
+    """
+    k = params.get('k', SEARCH_TOP_K)
+    hits, hits_cursor = page_items(result['keyword_found_urls'], 0, k)
+    links, links_cursor = page_items(result['all_links'], 0, LINKS_PAGE_SIZE)
+    search_log = result['search_log']
+    log_lines, log_cursor = search_log.page(0, LOG_PAGE_SIZE)
+    payload = {
+        'search_id': search_results.add(result),
+        'keyword_found_urls': hits,
+        'path_info': {url: result['path_info'][url] for url in hits},
+        'similarity_scores': {url: result['similarity_scores'][url] for url in hits},
+        'snippets': hit_snippets(result['keyword'], hits),
+        'found_total': len(result['keyword_found_urls']),
+        'hits_cursor': hits_cursor,
+        'all_links': links,
+        'links_total': len(result['all_links']),
+        'links_cursor': links_cursor,
+        'search_log': log_lines,
+        'visited_count': result.get('visited_count', 0),
+        'log_total': search_log.total,
+        'log_dropped': search_log.dropped,
+        'log_cursor': log_cursor,
+        'algorithm': result['algorithm'],
+        'cache_used': result['cache_used'],
+        'revalidated': result['revalidated'],
+        'cache_stats': result['cache_stats']
+    }
+    if 'timings' in result:
+        payload['timings'] = result['timings']
+    return payload
+
+def result_cache_key(params):
+    """Key result cache dari parameter yang dinormalisasi; None jika hasil tidak boleh di-cache.
+
+    Hanya cache mode yang di-cache: fresh crawl, revalidasi dan request dengan
+    breakdown timing selalu dijalankan.
+    """
+    if not params['use_cache'] or params.get('revalidate') or params.get('timings'):
+        return None
+    use_english = bool(params['use_english'])
+    start_url = canonicalize(params['start_url']) or params['start_url']
+    return ResultCache.make_key({
+        'start_url': localize_url(start_url, use_english),
+        'max_depth': params['max_depth'],
+        'keyword': params['keyword'],
+        'use_english': use_english,
+        'algorithm': params['algorithm'],
+        'max_fetches': params.get('max_fetches'),
+        'stop_after': params.get('stop_after'),
+        'k': params.get('k', SEARCH_TOP_K)
+    })
+
+def encode_result(result):
+    return json.dumps(result, ensure_ascii=False).encode('utf-8')
+
+def pack_search(payload, result):
+    """Entri result cache: search_id, body payload dan hasil lengkap (JSON) dalam satu blob.
+
+    Hasil lengkap ikut disimpan agar search_id di body tetap bisa dipakai
+    untuk pagination selama entri cache hidup, walaupun search_results
+    (yang lebih kecil) sudah membuangnya. Entri bisa dibaca dari spill di
+    RESULT_CACHE_DIR, jadi formatnya JSON (bukan pickle) agar memuatnya
+    tidak pernah menjalankan kode.
+    """
+    body = encode_result(payload)
+    full = encode_result(dict(result, search_log=result['search_log'].to_dict()))
+    return b"%s\n%d\n%s%s" % (payload['search_id'].encode('ascii'), len(body), body, full)
+
+def unpack_search(entry):
+    """Body /search dari entri result cache; hasil lengkap didaftarkan ulang jika sudah terbuang"""
+    first = entry.index(b"\n")
+    second = entry.index(b"\n", first + 1)
+    end = second + 1 + int(entry[first + 1:second])
+    search_id = entry[:first].decode('ascii')
+    if search_results.get(search_id) is None:
+        result = json.loads(entry[end:])
+        result['search_log'] = SearchLog.from_dict(result['search_log'])
+        search_results.add(result, search_id)
+    return entry[second + 1:end]
+
+def json_response(body, status=200):
+    """Response dari JSON ter-encode; dikompresi gzip jika client mengirim Accept-Encoding: gzip"""
+    headers = {'Vary': 'Accept-Encoding'}
+    if len(body) >= GZIP_MIN_BYTES and request.accept_encodings['gzip']:
+        body = gzip.compress(body, GZIP_LEVEL)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(body, status=status, mimetype='application/json', headers=headers)
+
+@app.route('/search', methods=['POST'])
+def search():
+    params = parse_search_params(request.json)
+    key = result_cache_key(params)
+    # Perubahan dari worker lain dulu, lalu generation dicatat sebelum crawl:
+    # jika cache berubah selama crawl, entri langsung basi
+    cache_manager.refresh()
+    generation = cache_manager.generation
+    with metrics.timed("search_request"):
+        entry = result_cache.get(key, generation) if key else None
+        if entry is not None:
+            body = unpack_search(entry)
+        else:
+            result = run_search(params)
+            payload = search_response(result, params)
+            body = encode_result(payload)
+            if key:
+                result_cache.put(key, generation, pack_search(payload, result))
+    return json_response(body)
+
+def search_page(search_id, page, fields=()):
+    """Ambil satu halaman hasil pencarian tersimpan; page(result, cursor, limit) -> (items, next_cursor, total).
+
+    fields: key ringkasan hasil yang ikut dikirim bersama halaman.
+    """
+    result = search_results.get(search_id)
+    if result is None:
+        return json_response(encode_result({"status": "error", "message": "Search result expired, run the search again"}), 404)
+    try:
+        cursor = max(0, int(request.args.get('cursor', 0)))
+        limit = max(1, min(int(request.args.get('limit', LINKS_PAGE_SIZE)), MAX_PAGE_SIZE))
+    except ValueError:
+        return json_response(encode_result({"status": "error", "message": "Invalid cursor or limit"}), 400)
+    items, next_cursor, total = page(result, cursor, limit)
+    payload = {
+        'search_id': search_id,
+        'items': items,
+        'next_cursor': next_cursor,
+        'total': total
+    }
+    payload.update((field, result.get(field)) for field in fields)
+    return json_response(encode_result(payload))
+
+@app.route('/search/<search_id>/hits')
+def search_hits(search_id):
+    """Hits berikutnya (urut similarity) beserta skor dan path"""
+    def page(result, cursor, limit):
+        urls, next_cursor = page_items(result['keyword_found_urls'], cursor, limit)
+        return hit_entries(result, urls), next_cursor, len(result['keyword_found_urls'])
+    return search_page(search_id, page)
+
+@app.route('/search/<search_id>/links')
+def search_links(search_id):
+    def page(result, cursor, limit):
+        links, next_cursor = page_items(result['all_links'], cursor, limit)
+        return links, next_cursor, len(result['all_links'])
+    return search_page(search_id, page)
+
+@app.route('/search/<search_id>/log')
+def search_log_page(search_id):
+    """Baris log berikutnya; cursor adalah nomor urut baris (baris yang sudah terbuang dilewati)"""
+    def page(result, cursor, limit):
+        lines, next_cursor = result['search_log'].page(cursor, limit)
+        return lines, next_cursor, result['search_log'].total
+    return search_page(search_id, page, fields=('visited_count',))
+
+@app.route('/search/stream', methods=['POST'])
+def search_stream():
+    """Streaming hasil pencarian sebagai NDJSON (satu event JSON per baris).
+
+    Event progress dari traversal ('fetching', 'cache_hit', 'found', 'complete')
+    dikirim begitu terjadi; event terakhir 'result' berisi payload sama seperti /search.
+    """
+    params = parse_search_params(request.json)
+    key = result_cache_key(params)
+    cache_manager.refresh()
+    generation = cache_manager.generation
+    entry = result_cache.get(key, generation) if key else None
+    if entry is not None:
+        return Response([b'{"status": "result", "result": ' + unpack_search(entry) + b'}\n'],
+                        mimetype='application/x-ndjson')
+    events = queue.Queue()
+    
+    def worker():
+        try:
+            result = run_search(params, events.put)
+            payload = search_response(result, params)
+            if key:
+                result_cache.put(key, generation, pack_search(payload, result))
+            events.put({'status': 'result', 'result': payload})
+        except Exception as e:
+            logger.error(f"Error during streaming search: {e}")
+            events.put({'status': 'error', 'message': str(e)})
+        events.put(None)
+    
+    threading.Thread(target=worker, daemon=True).start()
+    
+    def generate():
+        while True:
+            event = events.get()
+            if event is None:
+                break
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+    
+    return Response(generate(), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # Matikan buffering di reverse proxy (nginx)
+    })
+
+def run_crawl_job(job, resume_state, checkpoint):
+    """Runner untuk CrawlJobManager: crawl di background dengan cancel dan checkpoint"""
+    result = run_search(
+        job.params,
+        progress_callback=job.add_event,
+        should_stop=job.should_stop,
+        checkpoint=checkpoint,
+        resume_state=resume_state
+    )
+    # Ringkasan saja; daftar link lengkap tetap ada di cache dan index
+    return {
+        'all_links_count': len(result['all_links']),
+        'keyword_found_urls': result['keyword_found_urls'],
+        'similarity_scores': result['similarity_scores'],
+        'path_info': result['path_info'],
+        'algorithm': result['algorithm'],
+        'cache_stats': result['cache_stats']
+    }
+
+job_manager = CrawlJobManager(run_crawl_job)
+
+def job_not_found():
+    return jsonify({"status": "error", "message": "Job not found"}), 404
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Submit crawl job di background, kembalikan job id"""
+    data = request.json or {}
+    params = parse_search_params(data)
+    # Job crawl default-nya fresh mode (mengisi cache dan index)
+    params['use_cache'] = data.get('use_cache', False)
+    job = job_manager.submit(params)
+    return jsonify({"status": "success", "job_id": job.id, "job": job.to_dict()}), 202
+
+@app.route('/jobs', methods=['GET'])
+def list_jobs():
+    return jsonify({"jobs": [job.to_dict() for job in job_manager.list()]})
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return job_not_found()
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Stream event progress job sebagai NDJSON sampai job selesai"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return job_not_found()
+    since = int(request.args.get('since', 0))
+    
+    def generate():
+        seq = since
+        while True:
+            # Job bisa dijalankan worker lain; manager membaca event-nya dari disk
+            events, current = job_manager.events_since(job_id, seq, timeout=15)
+            for event in events:
+                seq = event['seq']
+                yield json.dumps(event, ensure_ascii=False) + "\n"
+            if current is None:
+                break
+            if current.finished and current.event_seq <= seq:
+                yield json.dumps({'status': 'job_' + current.status, 'job': current.to_dict()}, ensure_ascii=False) + "\n"
+                break
+    
+    return Response(generate(), mimetype='application/x-ndjson', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
     })
 
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return job_not_found()
+    return jsonify({"status": "success", "message": "Cancellation requested", "job": job.to_dict()})
+
+@app.route('/jobs/<job_id>/resume', methods=['POST'])
+def resume_job(job_id):
+    job = job_manager.resume(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": "Job not found or not resumable"}), 400
+    return jsonify({"status": "success", "job_id": job.id, "job": job.to_dict()}), 202
+
+@app.route('/query', methods=['POST'])
+def query():
+    """Cari keyword langsung di index (tanpa crawling).
+
+    Keyword biasa diurutkan dengan TF-IDF. Frase ("...") dan wildcard
+    (prefix*, ?) dicocokkan di positional index dan diurutkan menurut
+    jumlah kemunculan. Setiap hasil membawa snippet ter-highlight.
+    """
+    data = request.json or {}
+    keyword = data.get('keyword', '')
+    try:
+        k = max(1, min(int(data.get('k', 10)), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "Invalid k"}), 400
+    if not keyword.strip():
+        return jsonify({"results": [], "keyword": keyword})
+    index = ensure_search_index()
+    positional = ensure_positional_index()
+    if is_structured_query(keyword):
+        expanded = positional.expand_query(keyword)
+        results = [
+            {"url": url, "similarity_score": index.score(url, expanded) or 0.0, "matches": count, "spans": spans}
+            for url, count, spans in positional.search(keyword, k)
+        ]
+    else:
+        results = [
+            {"url": url, "similarity_score": score, "spans": positional.spans(url, keyword)}
+            for url, score in index.top_k(keyword, k)
+        ]
+    for entry in results:
+        spans = entry.pop("spans")
+        entry["snippet"] = make_snippet(cache_manager.load_content(entry["url"]), spans) if spans else None
+    return jsonify({
+        "keyword": keyword,
+        "results": results,
+        "index_documents": search_index.document_count
+    })
+
+@app.route('/delete-page', methods=['POST'])
+def delete_page():
+    """Hapus satu halaman dari cache dan index tanpa rebuild"""
+    url = (request.json or {}).get('url', '')
+    url = canonicalize(url) or url
+    if not cache_manager.delete_page(url):
+        return jsonify({"status": "error", "message": "URL not in cache"}), 404
+    return jsonify({"status": "success", "url": url})
+
+@app.route('/suggest')
+def suggest():
+    """Autocomplete: lengkapi kata terakhir q dari term dictionary positional index.
+
+    Tidak memeriksa/membangun ulang index agar tetap cepat per ketikan;
+    memakai versi index yang terakhir di-load atau dibangun.
+    """
+    text = request.args.get('q', '')
+    k = min(max(request.args.get('k', SUGGEST_LIMIT, type=int), 1), MAX_PAGE_SIZE)
+    with metrics.timed("suggest"):
+        suggestions = positional_index.suggest(text, k)
+    return jsonify({"query": text, "suggestions": suggestions})
+
 if __name__ == '__main__':
+    start_warm_up()
     app.run(debug=True)
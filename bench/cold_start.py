@@ -0,0 +1,128 @@
+"""Regression check waktu cold start worker.
+
+Usage (dari root repo):
+    python -m bench.cold_start --pages 5000 --max-import-seconds 1.0
+
+Membuat cache sintetis (metadata, index TF-IDF dan link graph) di direktori
+sementara, lalu mengukur di proses baru: waktu import app dan waktu sampai
+/ready mengembalikan 200. Exit code 1 jika import melebihi batas atau modul
+berat (scikit-learn, scipy) sudah ter-import saat import app.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from bench.synthetic_site import SyntheticSite  # noqa: E402
+
+BASE_URL = "https://bench.local"
+HEAVY_MODULES = ("sklearn", "scipy")
+
+# Dijalankan di proses baru dengan cwd = workdir
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+heavy = [name for name in %r if name in sys.modules]
+client = app.app.test_client()
+while client.get('/ready').status_code != 200:
+    time.sleep(0.005)
+ready = time.perf_counter()
+print(json.dumps({"import_seconds": imported - started, "ready_seconds": ready - started, "heavy_modules": heavy}))
+""" % (HEAVY_MODULES,)
+
+
+def prepare_cache(workdir, site):
+    """Isi cache di workdir seperti hasil crawl: halaman, snapshot, index (TF-IDF dan positional) dan link graph"""
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            import app
+            app.logger.setLevel("WARNING")
+            for page in range(site.pages):
+                links = [f"{BASE_URL}/p{link}" for link in site.links(page)]
+                app.cache_manager.store_content(f"{BASE_URL}/p{page}", site.text(page), f"Page {page}", links)
+            app.cache_manager.update_metadata(f"{BASE_URL}/p0", "bfs", -1)
+            app.cache_manager.save_cache()
+            app.ensure_search_index()
+            app.ensure_positional_index()
+            app.ensure_link_graph()
+            app.cache_manager.store.close()
+    finally:
+        os.chdir(cwd)
+
+
+def probe(workdir):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=workdir, env=env, check=True,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    ).stdout.decode()
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ukur waktu cold start worker terhadap cache sintetis")
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--fanout", type=int, default=8)
+    parser.add_argument("--page-words", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--max-import-seconds", type=float, default=1.0)
+    parser.add_argument("--max-ready-seconds", type=float, help="Batas waktu sampai /ready (default: tidak dicek)")
+    parser.add_argument("--workdir", help="Direktori cache (default: direktori sementara)")
+    parser.add_argument("--output", help="Tulis hasil JSON ke file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    temporary = args.workdir is None
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="crawler-cold-start-"))
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        site = SyntheticSite(pages=args.pages, fanout=args.fanout, page_words=args.page_words, seed=args.seed)
+        prepare_cache(workdir, site)
+        runs = [probe(workdir) for _ in range(args.runs)]
+    finally:
+        if temporary:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    import_seconds = float(np.median([run["import_seconds"] for run in runs]))
+    ready_seconds = float(np.median([run["ready_seconds"] for run in runs]))
+    heavy_modules = sorted({name for run in runs for name in run["heavy_modules"]})
+    failures = []
+    if import_seconds > args.max_import_seconds:
+        failures.append(f"import took {import_seconds:.3f}s (limit {args.max_import_seconds}s)")
+    if args.max_ready_seconds is not None and ready_seconds > args.max_ready_seconds:
+        failures.append(f"ready took {ready_seconds:.3f}s (limit {args.max_ready_seconds}s)")
+    if heavy_modules:
+        failures.append(f"heavy modules imported eagerly: {', '.join(heavy_modules)}")
+
+    report = {
+        "pages": args.pages,
+        "runs": runs,
+        "import_seconds": import_seconds,
+        "ready_seconds": ready_seconds,
+        "failures": failures,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
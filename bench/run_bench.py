@@ -0,0 +1,259 @@
+"""Benchmark crawler dan /search terhadap situs sintetis lokal.
+
+Usage (dari root repo):
+    python -m bench.run_bench --pages 500 --latency 0.02 --output bench_result.json
+
+Hasil ditulis sebagai JSON agar bisa dibandingkan antar commit.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from bench.server import SyntheticSiteServer  # noqa: E402
+from bench.synthetic_site import KEYWORD, SyntheticSite  # noqa: E402
+
+ALGORITHMS = ("bfs", "dfs")
+QUERY_KEYWORDS = (KEYWORD, "medicine", "campus library", "research journal", "alumni community")
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def peak_rss_mb():
+    # ru_maxrss dalam KB di Linux, byte di macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def latency_summary(samples):
+    samples_ms = np.asarray(samples) * 1000
+    return {
+        "count": len(samples),
+        "mean_ms": float(samples_ms.mean()),
+        "p50_ms": float(np.percentile(samples_ms, 50)),
+        "p95_ms": float(np.percentile(samples_ms, 95)),
+        "p99_ms": float(np.percentile(samples_ms, 99)),
+    }
+
+
+def run_crawl(app, start_url, args, algorithm, use_cache):
+    """Satu traversal; return waktu dan jumlah halaman yang dikunjungi"""
+    progress = {}
+
+    def on_progress(event):
+        if event.get("status") == "complete":
+            progress.update(event)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        all_links, found, _, _, _ = app.traverse(
+            start_url, args.max_depth, args.keyword, use_cache=use_cache,
+            progress_callback=on_progress, algorithm=algorithm
+        )
+        elapsed = time.perf_counter() - started
+    pages = progress.get("visited_count", 0)
+    return {
+        "seconds": elapsed,
+        "pages": pages,
+        "pages_per_second": pages / elapsed if elapsed else None,
+        "found": len(found),
+        "links": len(all_links),
+    }
+
+
+def run_partitioned(app, start_url, args, workers):
+    """Crawl fresh terpartisi (proses worker + merge shard); return waktu dan jumlah halaman"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        summary = app.partitioned_crawl(start_url, args.max_depth, workers)
+        elapsed = time.perf_counter() - started
+    pages = sum(summary["pages_per_worker"])
+    return {
+        "seconds": elapsed,
+        "pages": pages,
+        "pages_per_second": pages / elapsed if elapsed else None,
+        "crawl_seconds": summary["crawl_seconds"],
+        "merge_seconds": summary["merge_seconds"],
+        "pages_per_worker": summary["pages_per_worker"],
+    }
+
+
+def reset_caches(app):
+    with contextlib.redirect_stdout(io.StringIO()):
+        app.cache_manager.clear_cache()
+        app.search_index.clear()
+        app.positional_index.clear()
+        app.link_graph.clear()
+        app.result_cache.clear()
+
+
+def run_queries(app, client, payloads, clear_result_cache):
+    samples = []
+    for payload in payloads:
+        if clear_result_cache:
+            app.result_cache.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            started = time.perf_counter()
+            response = client.post("/search", json=payload)
+            samples.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise RuntimeError(f"/search returned {response.status_code}")
+    return latency_summary(samples)
+
+
+def run_benchmark(args):
+    site = SyntheticSite(
+        pages=args.pages, fanout=args.fanout, page_words=args.page_words,
+        duplicate_ratio=args.duplicate_ratio, seed=args.seed
+    )
+    server = SyntheticSiteServer(
+        site, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed
+    ).start()
+
+    # app membuat file cache relatif terhadap cwd, jadi import setelah pindah ke workdir
+    os.chdir(args.workdir)
+    import urlnorm
+    urlnorm.SCOPE_HOST_SUFFIXES = urlnorm.SCOPE_HOST_SUFFIXES + ("127.0.0.1",)
+    import fetcher
+    fetcher.politeness.rate = args.host_rate
+    fetcher.politeness.burst = max(1, int(args.host_rate))
+    if args.max_per_host:
+        fetcher.politeness.max_per_host = args.max_per_host
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+    # Log per crawl tidak relevan untuk benchmark
+    app.logger.setLevel("WARNING")
+
+    start_url = server.base_url + "/p0"
+    client = app.app.test_client()
+    results = {"crawl": {"fresh": {}, "cache": {}}, "search": {}}
+    try:
+        for algorithm in ALGORITHMS:
+            reset_caches(app)
+            results["crawl"]["fresh"][algorithm] = run_crawl(app, start_url, args, algorithm, use_cache=False)
+        if args.partitions:
+            results["crawl"]["partitioned"] = {}
+            for workers in args.partitions:
+                reset_caches(app)
+                results["crawl"]["partitioned"][str(workers)] = run_partitioned(app, start_url, args, workers)
+
+        # Cache terisi crawl fresh terakhir; ukur traversal cache mode
+        for algorithm in ALGORITHMS:
+            runs = [run_crawl(app, start_url, args, algorithm, use_cache=True) for _ in range(args.repeat)]
+            best = min(runs, key=lambda run: run["seconds"])
+            best["runs"] = len(runs)
+            best["median_seconds"] = float(np.median([run["seconds"] for run in runs]))
+            results["crawl"]["cache"][algorithm] = best
+
+        payloads = [
+            {"start_url": start_url, "max_depth": args.max_depth, "keyword": keyword,
+             "algorithm": ALGORITHMS[i % len(ALGORITHMS)], "use_cache": True}
+            for i, keyword in enumerate(QUERY_KEYWORDS * args.queries)
+        ]
+        results["search"]["cache_cold"] = run_queries(app, client, payloads, clear_result_cache=True)
+        results["search"]["cache_warm"] = run_queries(app, client, payloads, clear_result_cache=False)
+        results["search"]["fresh"] = run_queries(
+            app, client,
+            [dict(payloads[0], use_cache=False) for _ in range(args.fresh_queries)],
+            clear_result_cache=True
+        )
+
+        stats = app.cache_manager.get_cache_stats()
+        results.update({
+            "cache_size_mb": stats["cache_size_mb"],
+            "cached_pages": stats["total_urls"],
+            "duplicate_pages": stats.get("duplicate_pages"),
+            "server": {"requests": server.requests, "errors": server.errors},
+            "peak_rss_mb": peak_rss_mb(),
+        })
+    finally:
+        server.stop()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark crawler terhadap situs sintetis lokal")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--fanout", type=int, default=8)
+    parser.add_argument("--page-words", type=int, default=300)
+    parser.add_argument("--duplicate-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latency server per request (detik)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variasi latency +/- (detik)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Peluang response 500")
+    parser.add_argument("--host-rate", type=float, default=1000.0, help="Rate limit fetcher per host (req/s)")
+    parser.add_argument("--max-per-host", type=int, help="Koneksi bersamaan per host (default: MAX_PER_HOST fetcher)")
+    parser.add_argument("--max-depth", type=int, default=-1)
+    parser.add_argument("--partitions", type=lambda value: [int(n) for n in value.split(",") if n],
+                        default=[], help="Jumlah worker crawl terpartisi yang diukur, dipisah koma (mis. 1,2,4)")
+    parser.add_argument("--keyword", default=KEYWORD)
+    parser.add_argument("--repeat", type=int, default=3, help="Pengulangan traversal cache mode")
+    parser.add_argument("--queries", type=int, default=20, help="Pengulangan set query /search cache mode")
+    parser.add_argument("--fresh-queries", type=int, default=1, help="Jumlah /search fresh mode")
+    parser.add_argument("--workdir", help="Direktori cache benchmark (default: direktori sementara)")
+    parser.add_argument("--keep", action="store_true", help="Jangan hapus workdir setelah selesai")
+    parser.add_argument("--output", help="Tulis hasil JSON ke file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    temporary = args.workdir is None
+    args.workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="crawler-bench-"))
+    os.makedirs(args.workdir, exist_ok=True)
+    output = os.path.abspath(args.output) if args.output else None
+    cwd = os.getcwd()
+    try:
+        results = run_benchmark(args)
+    finally:
+        os.chdir(cwd)
+        if temporary and not args.keep:
+            shutil.rmtree(args.workdir, ignore_errors=True)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "config": {
+            "site": {
+                "pages": args.pages, "fanout": args.fanout, "page_words": args.page_words,
+                "duplicate_ratio": args.duplicate_ratio, "seed": args.seed
+            },
+            "server": {"latency": args.latency, "jitter": args.jitter, "error_rate": args.error_rate},
+            "host_rate": args.host_rate,
+            "max_per_host": args.max_per_host,
+            "max_depth": args.max_depth,
+            "partitions": args.partitions,
+            "keyword": args.keyword,
+        },
+        **results,
+    }
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return report
+
+
+if __name__ == '__main__':
+    main()
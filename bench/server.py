@@ -0,0 +1,85 @@
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_PAGE_RE = re.compile(r"^/p(\d+)$")
+
+
+class SyntheticSiteServer:
+    """HTTP server lokal untuk SyntheticSite dengan latency dan error yang bisa diatur.
+
+    latency: detik per request (rata-rata), jitter: variasi +/- detik,
+    error_rate: peluang response 500.
+    """
+
+    def __init__(self, site, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=1):
+        self.site = site
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def handle(self, handler):
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+
+        match = _PAGE_RE.match(handler.path.split("?", 1)[0])
+        body = self.site.render(int(match.group(1))) if match else None
+        if failed:
+            status, body = 500, "<html><body>Internal Server Error</body></html>"
+        elif body is None:
+            status, body = 404, "<html><body>Not Found</body></html>"
+        else:
+            status = 200
+        data = body.encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "text/html; charset=utf-8")
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,71 @@
+import random
+
+# Kosakata halaman sintetis; KEYWORD hanya muncul di sebagian halaman
+VOCABULARY = (
+    "universitas indonesia research faculty student campus library medicine engineering law "
+    "economics computer science admission international program lecture seminar laboratory "
+    "journal community alumni graduate undergraduate department building schedule registration"
+).split()
+KEYWORD = "scholarship"
+
+
+class SyntheticSite:
+    """Situs sintetis deterministik: halaman /p0 .. /p{pages-1}.
+
+    Isi setiap halaman dihitung dari seed + nomor halaman, sehingga tidak perlu
+    disimpan di memory. duplicate_ratio bagian halaman adalah salinan (dengan
+    sedikit perubahan) dari halaman lain, meniru mirror dan listing berulang.
+    """
+
+    def __init__(self, pages=500, fanout=8, page_words=300, duplicate_ratio=0.1,
+                 keyword_ratio=0.05, seed=1):
+        self.pages = pages
+        self.fanout = fanout
+        self.page_words = page_words
+        self.duplicate_ratio = duplicate_ratio
+        self.keyword_ratio = keyword_ratio
+        self.seed = seed
+
+    def _rng(self, page, salt=0):
+        return random.Random(self.seed * 1_000_003 + page * 31 + salt)
+
+    def source_page(self, page):
+        """Halaman asal isi teks (berbeda jika halaman adalah duplikat)"""
+        rng = self._rng(page, 1)
+        if page > 0 and rng.random() < self.duplicate_ratio:
+            return rng.randrange(page)
+        return page
+
+    def text(self, page):
+        source = self.source_page(page)
+        rng = self._rng(source, 2)
+        words = [rng.choice(VOCABULARY) for _ in range(self.page_words)]
+        if rng.random() < self.keyword_ratio:
+            for _ in range(max(1, self.page_words // 50)):
+                words[rng.randrange(len(words))] = KEYWORD
+        if source != page:
+            # Duplikat tidak identik persis: satu kata diganti
+            words[self._rng(page, 3).randrange(len(words))] = "mirror"
+        return ' '.join(words)
+
+    def links(self, page):
+        # Duplikat memakai daftar link halaman asalnya (mirror)
+        rng = self._rng(self.source_page(page), 4)
+        # Link ke halaman berikutnya menjamin semua halaman terjangkau dari /p0
+        links = [(page + 1) % self.pages]
+        links.extend(rng.randrange(self.pages) for _ in range(self.fanout - 1))
+        return links
+
+    def render(self, page):
+        """HTML halaman, atau None jika nomor halaman di luar situs"""
+        if not 0 <= page < self.pages:
+            return None
+        anchors = ''.join(f'<li><a href="/p{link}">Page {link}</a></li>' for link in self.links(page))
+        return (
+            f"<html><head><title>Synthetic page {page}</title>"
+            f"<script>var page = {page};</script></head><body>"
+            f"<nav><a href=\"/p0\">Home</a></nav>"
+            f"<h1>Page {page}</h1><p>{self.text(page)}</p>"
+            f"<ul>{anchors}</ul>"
+            f"<footer>Synthetic site footer</footer></body></html>"
+        )
@@ -0,0 +1,75 @@
+import logging
+from collections import deque
+from itertools import islice
+
+# Level log crawler di console ('DEBUG' menampilkan setiap halaman yang dikunjungi)
+LOG_LEVEL = "INFO"
+LOG_FORMAT = "%(asctime)s %(levelname)s %(message)s"
+
+# Jumlah baris log terakhir yang disimpan per pencarian
+SEARCH_LOG_LIMIT = 2000
+
+logger = logging.getLogger("crawler")
+
+
+def configure_logging(level=LOG_LEVEL):
+    """Pasang handler console untuk logger crawler (sekali saja)"""
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(level)
+    return logger
+
+
+class SearchLog:
+    """Log satu pencarian: ring buffer baris terakhir, diteruskan juga ke logger.
+
+    Setiap baris punya nomor urut absolut (0, 1, 2, ...); baris lama yang
+    terdorong keluar dari buffer dihitung di dropped. Cursor pagination
+    memakai nomor urut ini sehingga tetap valid selama buffer bergeser.
+    """
+
+    def __init__(self, lines=(), capacity=SEARCH_LOG_LIMIT, total=None):
+        self.lines = deque(lines, maxlen=capacity)
+        self.total = len(self.lines) if total is None else total
+
+    def append(self, message, level=logging.INFO):
+        self.lines.append(message)
+        self.total += 1
+        if logger.isEnabledFor(level):
+            logger.log(level, message)
+
+    def debug(self, message):
+        self.append(message, logging.DEBUG)
+
+    @property
+    def dropped(self):
+        return self.total - len(self.lines)
+
+    def page(self, cursor=0, limit=100):
+        """Baris mulai nomor urut cursor; return (lines, next_cursor atau None)"""
+        start = max(cursor, self.dropped)
+        lines = list(islice(self.lines, start - self.dropped, start - self.dropped + limit))
+        end = start + len(lines)
+        return lines, (end if end < self.total else None)
+
+    def to_dict(self):
+        return {"lines": list(self.lines), "total": self.total}
+
+    @classmethod
+    def from_dict(cls, data):
+        # Checkpoint lama menyimpan search_log sebagai list biasa
+        if isinstance(data, list):
+            return cls(data, total=len(data))
+        return cls(data["lines"], total=data["total"])
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __getitem__(self, index):
+        return self.lines[index]
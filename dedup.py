@@ -0,0 +1,89 @@
+import hashlib
+import re
+
+import numpy as np
+
+# Near-duplicate: jarak Hamming SimHash maksimal SIMHASH_DISTANCE bit
+SIMHASH_BITS = 64
+SIMHASH_DISTANCE = 3
+SHINGLE_SIZE = 3         # Jumlah kata per shingle
+DEDUP_MIN_TOKENS = 20    # Halaman yang terlalu pendek tidak di-dedup
+
+# LSH: SimHash dipecah menjadi band; dengan SIMHASH_DISTANCE + 1 band, dua hash
+# yang berjarak <= SIMHASH_DISTANCE pasti sama persis di minimal satu band
+LSH_BANDS = SIMHASH_DISTANCE + 1
+_BAND_BITS = SIMHASH_BITS // LSH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def simhash(text):
+    """SimHash 64-bit dari shingle kata, None jika teks terlalu pendek"""
+    tokens = _TOKEN_RE.findall(text.lower()) if text else []
+    if len(tokens) < DEDUP_MIN_TOKENS:
+        return None
+    shingles = set(' '.join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1))
+    hashes = np.frombuffer(
+        b"".join(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest() for shingle in shingles),
+        dtype="<u8"
+    )
+    # Bit i SimHash = 1 jika mayoritas shingle punya bit i = 1
+    bits = (hashes[:, None] >> np.arange(SIMHASH_BITS, dtype=np.uint64)) & np.uint64(1)
+    majority = bits.sum(axis=0) * 2 > len(hashes)
+    return int(np.packbits(majority[::-1]).view(">u8")[0])
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class DuplicateIndex:
+    """Index LSH SimHash dokumen kanonik untuk mencari near-duplicate saat store"""
+
+    def __init__(self, max_distance=SIMHASH_DISTANCE):
+        self.max_distance = max_distance
+        self.fingerprints = {}  # url -> simhash
+        self.bands = [{} for _ in range(LSH_BANDS)]  # nilai band -> set url
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+    @staticmethod
+    def _band_values(fingerprint):
+        return [(fingerprint >> (band * _BAND_BITS)) & _BAND_MASK for band in range(LSH_BANDS)]
+
+    def find(self, fingerprint, exclude=None):
+        """URL kanonik yang near-duplicate dengan fingerprint, None jika tidak ada"""
+        best = None
+        best_distance = self.max_distance + 1
+        for band, value in zip(self.bands, self._band_values(fingerprint)):
+            for url in band.get(value, ()):
+                if url == exclude:
+                    continue
+                distance = hamming_distance(fingerprint, self.fingerprints[url])
+                if distance < best_distance or (distance == best_distance and best is not None and url < best):
+                    best, best_distance = url, distance
+        return best
+
+    def add(self, url, fingerprint):
+        self.remove(url)
+        self.fingerprints[url] = fingerprint
+        for band, value in zip(self.bands, self._band_values(fingerprint)):
+            band.setdefault(value, set()).add(url)
+
+    def remove(self, url):
+        fingerprint = self.fingerprints.pop(url, None)
+        if fingerprint is None:
+            return
+        for band, value in zip(self.bands, self._band_values(fingerprint)):
+            urls = band.get(value)
+            if urls is not None:
+                urls.discard(url)
+                if not urls:
+                    del band[value]
+
+    def clear(self):
+        self.fingerprints.clear()
+        for band in self.bands:
+            band.clear()
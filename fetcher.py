@@ -0,0 +1,178 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# Konfigurasi fetch konkuren
+MAX_WORKERS = 8          # Jumlah request in-flight per crawl
+MAX_PER_HOST = 4         # Batas koneksi bersamaan ke satu host
+HOST_RATE = 5.0          # Token per detik per host
+HOST_BURST = 5           # Kapasitas token bucket per host
+REQUEST_TIMEOUT = 10
+
+# Connection pool HTTP (keep-alive) yang dipakai bersama semua fetch
+POOL_CONNECTIONS = 16    # Jumlah host yang pool-nya disimpan
+POOL_MAXSIZE = 32        # Koneksi per host yang dipertahankan
+
+
+def create_session():
+    """Session HTTP dengan connection pooling dan kompresi"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate"})
+    session.verify = False
+    return session
+
+
+http_session = create_session()
+
+fetch_responses = metrics.counter("crawler_fetch_responses_total", "HTTP responses received", ("status",))
+fetch_errors = metrics.counter("crawler_fetch_errors_total", "Fetches that failed with a network error")
+fetch_bytes = metrics.counter("crawler_fetch_bytes_total", "Response body bytes fetched")
+
+
+class TokenBucket:
+    """Rate limiter token bucket (thread-safe)"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Tunggu sampai ada token lalu ambil satu"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostPoliteness:
+    """Batas konkurensi dan rate limit per host, dipakai bersama oleh semua crawl"""
+
+    def __init__(self, max_per_host=MAX_PER_HOST, rate=HOST_RATE, burst=HOST_BURST):
+        self.max_per_host = max_per_host
+        self.rate = rate
+        self.burst = burst
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host_state(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = (threading.BoundedSemaphore(self.max_per_host), TokenBucket(self.rate, self.burst))
+                self._hosts[host] = state
+            return state
+
+    @contextmanager
+    def slot(self, url):
+        """Ambil slot koneksi + token untuk host dari URL"""
+        semaphore, bucket = self._host_state(urlsplit(url).netloc.lower())
+        with semaphore:
+            bucket.acquire()
+            yield
+
+
+# Politeness global agar beberapa crawl paralel tetap sopan ke host yang sama
+politeness = HostPoliteness()
+
+
+class PageFetcher:
+    """Fetch halaman secara konkuren dengan thread pool.
+
+    Traversal tetap memproses URL satu per satu (urutan BFS/DFS tidak berubah),
+    sementara URL berikutnya di frontier di-prefetch di background.
+    conditional_headers(url) (opsional) memberi header If-None-Match /
+    If-Modified-Since untuk revalidasi halaman yang sudah di-cache.
+    Dengan parse_pool, response 200 langsung diteruskan ke process pool parser
+    dari thread fetch; hasilnya ada di response.parsed (Future).
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_pending=None, host_politeness=None,
+                 session=None, conditional_headers=None, parse_pool=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 2
+        self.politeness = host_politeness or politeness
+        self.session = session or http_session
+        self.conditional_headers = conditional_headers
+        self.parse_pool = parse_pool
+        self._executor = None
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def _get(self, url, headers=None):
+        if headers is None and self.conditional_headers:
+            headers = self.conditional_headers(url)
+        with self.politeness.slot(url):
+            try:
+                with metrics.timed("fetch"):
+                    response = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            except requests.RequestException:
+                fetch_errors.inc()
+                raise
+        fetch_responses.labels(str(response.status_code)).inc()
+        fetch_bytes.inc(len(response.content))
+        if self.parse_pool is not None and response.status_code == 200:
+            # Slot host sudah dilepas; submit bisa menunggu jika antrian parser penuh
+            response.parsed = self.parse_pool.submit(response.content, response.url)
+        return response
+
+    def prefetch(self, urls):
+        """Jadwalkan fetch background untuk URL yang belum pending"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="fetch")
+            for url in urls:
+                if len(self._pending) >= self.max_pending:
+                    break
+                if url not in self._pending:
+                    self._pending[url] = self._executor.submit(self._get, url)
+
+    def fetch(self, url, headers=None):
+        """Ambil response; pakai hasil prefetch jika ada, jika tidak fetch langsung"""
+        with self._lock:
+            future = self._pending.pop(url, None)
+        if future is not None:
+            return future.result()
+        return self._get(url, headers)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def close(self):
+        """Batalkan prefetch yang tidak terpakai dan matikan thread pool"""
+        with self._lock:
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Fetcher tanpa prefetch untuk pemanggilan di luar traversal
+default_fetcher = PageFetcher(max_workers=1)
@@ -0,0 +1,258 @@
+import heapq
+import re
+from array import array
+from collections import deque
+from itertools import count
+from urllib.parse import urlsplit
+
+from urlnorm import fingerprint
+
+
+class TraversalTree:
+    """Tabel URL <-> node id dengan parent pointer dan depth per node.
+
+    Frontier cukup menyimpan node id (int); path ke sebuah URL dibangun ulang
+    dari parent pointer hanya saat dibutuhkan. Lookup URL memakai fingerprint
+    64-bit dari URL kanonik.
+    """
+
+    def __init__(self):
+        self.urls = []
+        self.ids = {}  # fingerprint -> node id
+        self.parent = array('i')
+        self.depth = array('i')
+        self.visited = bytearray()
+
+    def __len__(self):
+        return len(self.urls)
+
+    def __contains__(self, url):
+        return fingerprint(url) in self.ids
+
+    def node_id(self, url):
+        """Ambil id URL, daftarkan sebagai node baru jika belum ada"""
+        key = fingerprint(url)
+        node = self.ids.get(key)
+        if node is None:
+            node = len(self.urls)
+            self.ids[key] = node
+            self.urls.append(url)
+            self.parent.append(-1)
+            self.depth.append(0)
+            self.visited.append(0)
+        return node
+
+    def to_dict(self):
+        """State tree untuk checkpoint (serializable ke JSON)"""
+        return {
+            "urls": self.urls,
+            "parent": self.parent.tolist(),
+            "depth": self.depth.tolist(),
+            "visited": [node for node, flag in enumerate(self.visited) if flag]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        tree = cls()
+        for url in data["urls"]:
+            tree.node_id(url)
+        tree.parent = array('i', data["parent"])
+        tree.depth = array('i', data["depth"])
+        for node in data["visited"]:
+            tree.visited[node] = 1
+        return tree
+
+    def path(self, node):
+        """Bangun path dari root ke node lewat parent pointer"""
+        path = []
+        while node != -1:
+            path.append(self.urls[node])
+            node = self.parent[node]
+        path.reverse()
+        return path
+
+
+class BfsFrontier:
+    """Queue BFS berisi node id; dedup saat enqueue sehingga satu URL masuk queue sekali"""
+
+    def __init__(self, tree, max_depth=-1):
+        self.tree = tree
+        self.max_depth = max_depth
+        self.queue = deque()
+
+    def __len__(self):
+        return len(self.queue)
+
+    def push(self, url, parent, depth):
+        if self.max_depth != -1 and depth > self.max_depth:
+            return
+        tree = self.tree
+        if url in tree:
+            return
+        node = tree.node_id(url)
+        tree.parent[node] = parent
+        tree.depth[node] = depth
+        self.queue.append(node)
+
+    def push_links(self, links, parent, depth, priorities=None):
+        for link in links:
+            self.push(link, parent, depth)
+
+    def pop(self):
+        """Ambil node berikutnya, None jika frontier habis"""
+        if not self.queue:
+            return None
+        node = self.queue.popleft()
+        self.tree.visited[node] = 1
+        return node
+
+    def upcoming(self):
+        """Node id yang akan di-pop berikutnya, sesuai urutan"""
+        return iter(self.queue)
+
+    def snapshot(self):
+        return list(self.queue)
+
+    def restore(self, nodes):
+        self.queue.extend(nodes)
+
+
+class DfsFrontier:
+    """Stack DFS berisi node id.
+
+    Push ulang URL yang belum dikunjungi menimpa parent/depth-nya; entri lama di
+    bawah stack dilewati saat di-pop karena node sudah dikunjungi lewat entri
+    yang lebih baru. Urutan kunjungan sama dengan DFS berbasis path.
+    """
+
+    def __init__(self, tree, max_depth=-1):
+        self.tree = tree
+        self.max_depth = max_depth
+        self.stack = array('i')
+
+    def __len__(self):
+        # Termasuk entri basi yang akan dilewati saat di-pop
+        return len(self.stack)
+
+    def push(self, url, parent, depth):
+        if self.max_depth != -1 and depth > self.max_depth:
+            return
+        tree = self.tree
+        node = tree.node_id(url)
+        if tree.visited[node]:
+            return
+        tree.parent[node] = parent
+        tree.depth[node] = depth
+        self.stack.append(node)
+
+    def push_links(self, links, parent, depth, priorities=None):
+        # Urutan terbalik agar link pertama dikunjungi lebih dulu
+        for link in reversed(links):
+            self.push(link, parent, depth)
+
+    def pop(self):
+        """Ambil node berikutnya yang belum dikunjungi, None jika frontier habis"""
+        stack = self.stack
+        visited = self.tree.visited
+        while stack:
+            node = stack.pop()
+            if not visited[node]:
+                visited[node] = 1
+                return node
+        return None
+
+    def upcoming(self):
+        """Node id yang akan di-pop berikutnya, sesuai urutan"""
+        return reversed(self.stack)
+
+    def snapshot(self):
+        return self.stack.tolist()
+
+    def restore(self, nodes):
+        self.stack.extend(nodes)
+
+
+# Bobot prioritas link untuk crawl best-first
+ANCHOR_WEIGHT = 2.0      # Term keyword di teks anchor
+URL_WEIGHT = 1.0         # Term keyword di path/query URL
+PARENT_WEIGHT = 1.0      # Similarity halaman asal terhadap keyword
+DEPTH_PENALTY = 0.05     # Per level kedalaman, agar yang dekat menang saat seri
+
+# Jumlah entri teratas heap yang di-scan untuk prefetch
+UPCOMING_SCAN = 128
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return set(_TOKEN_RE.findall(text.lower())) if text else set()
+
+
+def link_priority(url, anchor, parent_score, depth, terms):
+    """Skor seberapa menjanjikan sebuah link untuk keyword (terms: set token keyword)"""
+    priority = PARENT_WEIGHT * parent_score - DEPTH_PENALTY * depth
+    if terms:
+        parts = urlsplit(url)
+        priority += ANCHOR_WEIGHT * len(terms & tokenize(anchor)) / len(terms)
+        priority += URL_WEIGHT * len(terms & tokenize(parts.path + " " + parts.query)) / len(terms)
+    return priority
+
+
+class BestFirstFrontier:
+    """Priority queue node id untuk crawl terfokus (prioritas tertinggi di-pop dulu).
+
+    Link yang ditemukan lagi dengan prioritas lebih tinggi di-push ulang dan
+    menimpa parent/depth-nya; entri lama dilewati saat di-pop. Prioritas seri
+    di-pop sesuai urutan push.
+    """
+
+    def __init__(self, tree, max_depth=-1):
+        self.tree = tree
+        self.max_depth = max_depth
+        self.heap = []
+        self.priority = {}  # node id -> prioritas terbaik yang pernah di-push
+        self._seq = count()
+
+    def __len__(self):
+        return len(self.priority)
+
+    def push(self, url, parent, depth, priority=0.0):
+        if self.max_depth != -1 and depth > self.max_depth:
+            return
+        tree = self.tree
+        node = tree.node_id(url)
+        if tree.visited[node] or priority <= self.priority.get(node, float("-inf")):
+            return
+        tree.parent[node] = parent
+        tree.depth[node] = depth
+        self.priority[node] = priority
+        heapq.heappush(self.heap, (-priority, next(self._seq), node))
+
+    def push_links(self, links, parent, depth, priorities=None):
+        for i, link in enumerate(links):
+            self.push(link, parent, depth, priorities[i] if priorities else 0.0)
+
+    def pop(self):
+        """Ambil node dengan prioritas tertinggi yang belum dikunjungi, None jika habis"""
+        heap = self.heap
+        visited = self.tree.visited
+        while heap:
+            neg_priority, _, node = heapq.heappop(heap)
+            if visited[node] or -neg_priority < self.priority[node]:
+                continue
+            visited[node] = 1
+            del self.priority[node]
+            return node
+        return None
+
+    def upcoming(self):
+        """Perkiraan node berikutnya (entri teratas heap, bisa berisi entri basi)"""
+        return (entry[2] for entry in heapq.nsmallest(UPCOMING_SCAN, self.heap))
+
+    def snapshot(self):
+        return [[node, priority] for node, priority in self.priority.items()]
+
+    def restore(self, entries):
+        for node, priority in entries:
+            self.priority[node] = priority
+            heapq.heappush(self.heap, (-priority, next(self._seq), node))
@@ -0,0 +1,312 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+import metrics
+import shared_dir
+from crawl_log import logger
+
+# Dokumen pending di-seal menjadi segment in-memory setiap sebanyak ini (atau saat pencarian)
+SEGMENT_DOCS = 64
+# Segment in-memory digabung menjadi satu jika jumlahnya mencapai ini
+MERGE_SEGMENTS = 8
+# Merge ke disk jika dokumen segment + tombstone >= MERGE_RATIO x dokumen base (minimal MERGE_MIN_DOCS)
+MERGE_RATIO = 0.1
+MERGE_MIN_DOCS = 256
+# Index yang tidak bisa di-merge persis (TF-IDF) di-fit ulang jika korpus tumbuh sebesar rasio ini
+REFIT_RATIO = 0.2
+# Periode thread merge (detik)
+MERGE_INTERVAL = 5.0
+
+
+def parse_version(version):
+    """'epoch:generation' -> (epoch, generation), None jika format lain"""
+    try:
+        epoch, generation = version.split(":")
+        return int(epoch), int(generation)
+    except (AttributeError, ValueError):
+        return None
+
+
+class Segment:
+    """Dokumen yang ditambahkan sekaligus ke index, in-memory sampai di-merge ke disk.
+
+    touched berisi semua URL yang diganti atau dihapus oleh segment ini; versi
+    lamanya di base atau di segment sebelumnya menjadi tombstone. data adalah
+    struktur index milik segment (bentuknya tergantung index).
+    """
+
+    __slots__ = ("urls", "touched", "data")
+
+    def __init__(self, urls, touched, data):
+        self.urls = urls
+        self.touched = touched
+        self.data = data
+
+
+class SegmentedIndex:
+    """Bagian bersama index yang ditambah per segment: doc id global, URL terbaru dan tombstone.
+
+    Doc id 0..base_docs-1 milik base (hasil build penuh atau load dari disk),
+    sisanya milik segment secara berurutan. Dokumen yang diganti atau dihapus
+    hanya ditandai mati di live sampai merge berikutnya membuangnya.
+
+    Subclass menyediakan lock, make_segment(documents), combine_segments(segments)
+    dan merged(count, live), plus build/load/save/clear seperti biasa.
+    """
+
+    # Nama tahap metric (<name>_build, <name>_merge)
+    name = "index"
+    # False jika merge mengubah hasil (misalnya IDF tidak di-fit ulang), lihat REFIT_RATIO
+    exact_merge = True
+
+    def reset_docs(self, urls=()):
+        self.urls = list(urls)
+        self.url_ids = {url: i for i, url in enumerate(self.urls)}
+        self.live = np.ones(len(self.urls), dtype=bool)
+        self.base_docs = len(self.urls)
+        self.dead_docs = 0
+        self.segments = []
+        # base_revision berubah setiap base diganti, revision setiap isi index berubah
+        self.base_revision = getattr(self, "base_revision", 0) + 1
+        self.revision = getattr(self, "revision", 0) + 1
+
+    @property
+    def segment_docs(self):
+        return len(self.urls) - self.base_docs
+
+    @property
+    def document_count(self):
+        """Jumlah dokumen hidup"""
+        return len(self.url_ids)
+
+    def replay(self, segment):
+        """Pasang segment: versi lama URL-nya jadi tombstone, dokumennya mendapat doc id baru"""
+        with self.lock:
+            for url in segment.touched:
+                doc_id = self.url_ids.pop(url, None)
+                if doc_id is not None:
+                    self.live[doc_id] = False
+                    self.dead_docs += 1
+            start = len(self.urls)
+            live = np.ones(len(segment.urls), dtype=bool)
+            # URL yang muncul lebih dari sekali (segment gabungan): hanya yang terakhir hidup
+            last = {url: i for i, url in enumerate(segment.urls)}
+            if len(last) < len(segment.urls):
+                live[[i for i, url in enumerate(segment.urls) if last[url] != i]] = False
+                self.dead_docs += len(segment.urls) - len(last)
+            self.urls.extend(segment.urls)
+            self.url_ids.update((url, start + i) for url, i in last.items())
+            self.live = np.concatenate([self.live, live])
+            self.segments.append(segment)
+            self.revision += 1
+
+    def add_documents(self, documents):
+        """Tambah, ganti atau hapus (content kosong) dokumen sebagai satu segment baru.
+
+        Return False jika index belum bisa menerima segment (perlu build penuh).
+        """
+        documents = list(documents)
+        if not documents:
+            return True
+        segment = self.make_segment(documents)
+        if segment is None:
+            return False
+        self.replay(segment)
+        return True
+
+    def compact_segments(self):
+        """Gabungkan semua segment in-memory menjadi satu; doc id tidak berubah"""
+        with self.lock:
+            if len(self.segments) < 2:
+                return
+            self.segments = [self.combine_segments(self.segments)]
+            self.revision += 1
+
+
+class IncrementalIndexer:
+    """Umpan perubahan halaman ke index secara inkremental (gaya LSM).
+
+    store_content (dan refresh dari worker lain) memanggil add(). Dokumen
+    pending di-seal menjadi segment in-memory yang langsung ikut dicari;
+    sync() men-seal semuanya sebelum pencarian. Thread background
+    menggabungkan segment kecil dan me-merge segment ke index di disk jika
+    sudah cukup besar atau tombstone cukup banyak, sehingga dokumen basi dan
+    terhapus ikut dibuang. Index yang merge-nya tidak persis (TF-IDF) di-fit
+    ulang dari seluruh cache jika korpus sudah tumbuh REFIT_RATIO.
+    """
+
+    def __init__(self, cache, indexes, interval=MERGE_INTERVAL):
+        self.cache = cache
+        self.indexes = indexes
+        self.interval = interval
+        self.pending = OrderedDict()  # url -> content (None = ambil dari store saat seal)
+        self.pending_lock = threading.Lock()
+        self.lock = threading.RLock()
+        # Index yang sudah mengejar isi store sejak load/build terakhir
+        self.current = set()
+        self.wake = threading.Event()
+        self.thread = None
+        self.thread_lock = threading.Lock()
+
+    def add(self, url, content=None):
+        """Catat halaman baru/berubah; content kosong berarti halaman dihapus dari index"""
+        with self.pending_lock:
+            self.pending[url] = content
+            self.pending.move_to_end(url)
+            full = len(self.pending) >= SEGMENT_DOCS
+        if full:
+            self.start()
+            self.wake.set()
+
+    def remove(self, url):
+        self.add(url, "")
+
+    def reset(self):
+        """Lupakan pending dan status index (cache dikosongkan); sync berikutnya load/build ulang"""
+        with self.lock:
+            with self.pending_lock:
+                self.pending.clear()
+            self.current.clear()
+
+    def _take_pending(self):
+        with self.pending_lock:
+            pending, self.pending = self.pending, OrderedDict()
+        return pending
+
+    def _apply(self, pending, indexes):
+        if not pending or not indexes:
+            return
+        with metrics.timed("index_seal"):
+            store = self.cache.store
+            documents = [(url, store.get_content(url) if content is None else content)
+                         for url, content in pending.items()]
+            for index in indexes:
+                if not index.add_documents(documents):
+                    self.current.discard(index)
+
+    def seal(self):
+        """Jadikan dokumen pending satu segment di setiap index yang sudah up to date"""
+        with self.lock:
+            # Index yang belum current akan mengejar dari store, pending tidak diperlukan
+            self._apply(self._take_pending(), [index for index in self.indexes if index in self.current])
+
+    def sync(self):
+        """Pastikan semua index mencakup isi cache saat ini; return versi cache ('epoch:generation').
+
+        Dipanggil sebelum pencarian: index yang belum pernah di-load/dibangun
+        (atau dari epoch lain) mengejar dari store, lalu pending di-seal.
+        """
+        self.start()
+        with self.lock:
+            # Pending diambil sebelum store di-flush: isinya pasti sudah tercakup versi di bawah
+            pending = self._take_pending()
+            version = self.cache.cache_version()
+            epoch = parse_version(version)[0]
+            current = []
+            for index in self.indexes:
+                index_state = parse_version(index.source_version) if index in self.current else None
+                if index_state is not None and index_state[0] == epoch:
+                    current.append(index)
+                else:
+                    self._catch_up(index, version)
+            self._apply(pending, current)
+            self.seal()
+            for index in self.indexes:
+                if index in self.current:
+                    index.source_version = version
+        return version
+
+    def _catch_up(self, index, version):
+        """Load versi index terbaru dari disk lalu tambahkan perubahan store setelahnya; build jika perlu"""
+        epoch, _ = parse_version(version)
+        self.current.discard(index)
+        index.pending_load = False
+        with shared_dir.file_lock(index.index_dir):
+            base = parse_version(index.source_version) if index.load() else None
+            if base is not None and base[0] == epoch:
+                changes = self.cache.store.changes_since(base[1])
+                urls = list(changes["urls"]) + changes["deleted"]
+                # Perubahan yang terlalu banyak lebih murah dibangun ulang sekaligus
+                if len(urls) <= REFIT_RATIO * max(index.document_count, MERGE_MIN_DOCS):
+                    store = self.cache.store
+                    if index.add_documents((url, store.get_content(url)) for url in urls):
+                        self.current.add(index)
+                        return
+            with metrics.timed(f"{index.name}_build"):
+                index.build(self.cache.iter_contents(), version)
+                index.save()
+        if index.is_built:
+            self.current.add(index)
+
+    def start(self):
+        """Jalankan thread merge sekali"""
+        with self.thread_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name="indexer", daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            try:
+                self.maintain()
+            except Exception as e:
+                logger.error(f"Error maintaining index: {e}")
+
+    def maintain(self):
+        """Seal pending, gabungkan segment kecil, merge ke disk jika segment/tombstone sudah banyak"""
+        self.seal()
+        for index in list(self.current):
+            if len(index.segments) >= MERGE_SEGMENTS:
+                index.compact_segments()
+            if index.segment_docs + index.dead_docs >= max(MERGE_MIN_DOCS, MERGE_RATIO * index.base_docs):
+                self.merge(index)
+
+    def merge(self, index):
+        """Tulis base + segment (tanpa dokumen mati) sebagai versi baru di disk, lalu pakai versi itu.
+
+        Pencarian tetap berjalan selama merge; segment yang ditambahkan selama
+        merge dipasang ulang di atas base baru.
+        """
+        with index.lock:
+            base_revision = index.base_revision
+            count = len(index.segments)
+            live = index.live.copy()
+            version = index.source_version
+        refit = not index.exact_merge and index.document_count >= (1 + REFIT_RATIO) * max(index.fitted_docs, 1)
+        with metrics.timed(f"{index.name}_merge"):
+            if refit:
+                merged = type(index)(index.index_dir).build(self.cache.iter_contents(), version)
+            else:
+                merged = index.merged(count, live)
+        if not merged.is_built:
+            return
+        # Publish dan load versi baru di bawah file lock (urutan lock sama dengan _catch_up):
+        # worker lain tidak bisa menghapus versi ini sebelum di-load
+        with self.lock, shared_dir.file_lock(index.index_dir):
+            path = merged.save()
+            if path is None:
+                return
+            with index.lock:
+                # Base diganti (load/build ulang) selama merge: hasil merge tetap valid di disk
+                if index.base_revision != base_revision or index not in self.current:
+                    return
+                later = index.segments[count:]
+                current_version = index.source_version
+                # Versi yang baru ditulis (bukan CURRENT, yang bisa saja milik worker lain)
+                if not index.load(path):
+                    self.current.discard(index)
+                    return
+                index.source_version = current_version
+                store = self.cache.store
+                for segment in later:
+                    if refit:
+                        # Vocabulary berubah: vektor segment dihitung ulang dari content terbaru
+                        index.add_documents((url, store.get_content(url)) for url in segment.touched)
+                    else:
+                        index.replay(segment)
+        logger.info(f"Merged {index.name}: {index.document_count} documents"
+                    f"{' (refit)' if refit else ''}, {len(later)} segments kept")
@@ -0,0 +1,361 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from crawl_log import logger
+from shared_dir import file_lock
+
+# Direktori status dan checkpoint job crawl
+JOBS_DIR = "crawl_jobs"
+MAX_JOB_WORKERS = 2
+MAX_JOB_EVENTS = 1000
+# Periode cek event/status job yang dijalankan worker lain (detik)
+JOB_POLL_INTERVAL = 0.5
+
+# Status akhir: job tidak lagi berjalan
+FINISHED_STATUSES = ("completed", "cancelled", "failed", "interrupted")
+
+
+def _write_json_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def process_owner():
+    """Identitas proses ini sebagai pemilik job"""
+    return {"host": socket.gethostname(), "pid": os.getpid()}
+
+
+class CrawlJob:
+    """Satu job crawl di background beserta progress, event dan flag cancel.
+
+    owner adalah proses yang menjalankan job. Pemilik menambahkan setiap
+    event ke events_path agar worker lain bisa men-stream-nya, dan berhenti
+    jika cancel_path dibuat oleh worker lain (lihat should_stop).
+    """
+
+    def __init__(self, params, job_id=None):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.params = params
+        self.status = "queued"
+        self.created_at = datetime.now().isoformat()
+        self.updated_at = self.created_at
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.resumed = 0
+        self.owner = None
+        self.events_path = None
+        self.cancel_path = None
+        self.cancel_event = threading.Event()
+        self.events = deque(maxlen=MAX_JOB_EVENTS)
+        self.event_seq = 0
+        self.changed = threading.Condition()
+
+    def add_event(self, event):
+        """Simpan event progress dan bangunkan pembaca stream"""
+        with self.changed:
+            self.event_seq += 1
+            event = dict(event, seq=self.event_seq)
+            self.events.append(event)
+            if self.events_path is not None:
+                try:
+                    with open(self.events_path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(event, ensure_ascii=False) + "\n")
+                except OSError as e:
+                    logger.error(f"Error writing events for job {self.id}: {e}")
+            if event.get('status') in ('fetching', 'cache_hit', 'complete'):
+                self.progress = {k: v for k, v in event.items() if k not in ('log', 'status')}
+            self.updated_at = datetime.now().isoformat()
+            self.changed.notify_all()
+
+    def set_status(self, status, **fields):
+        with self.changed:
+            self.status = status
+            for key, value in fields.items():
+                setattr(self, key, value)
+            self.updated_at = datetime.now().isoformat()
+            self.changed.notify_all()
+
+    def events_since(self, seq, timeout=None):
+        """Ambil event dengan seq > seq; tunggu sampai ada event baru atau job selesai"""
+        with self.changed:
+            if self.event_seq <= seq and self.status not in FINISHED_STATUSES:
+                self.changed.wait(timeout)
+            return [event for event in self.events if event['seq'] > seq]
+
+    def should_stop(self):
+        """True jika cancel diminta, di proses ini atau lewat cancel_path dari worker lain"""
+        if not self.cancel_event.is_set() and self.cancel_path is not None and os.path.exists(self.cancel_path):
+            self.cancel_event.set()
+        return self.cancel_event.is_set()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "params": self.params,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "resumed": self.resumed,
+            "event_seq": self.event_seq,
+            "owner": self.owner
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        job = cls(data["params"], job_id=data["job_id"])
+        job.status = data.get("status", "interrupted")
+        job.created_at = data.get("created_at", job.created_at)
+        job.updated_at = data.get("updated_at", job.updated_at)
+        job.progress = data.get("progress", {})
+        job.result = data.get("result")
+        job.error = data.get("error")
+        job.resumed = data.get("resumed", 0)
+        job.event_seq = data.get("event_seq", 0)
+        job.owner = data.get("owner")
+        return job
+
+
+class CrawlJobManager:
+    """Jalankan job crawl di thread pool, simpan status dan checkpoint ke disk.
+
+    runner(job, resume_state, checkpoint) menjalankan crawl; checkpoint(state)
+    dipanggil berkala oleh runner agar job yang terputus bisa dilanjutkan.
+
+    File job di jobs_dir (dijaga file_lock) adalah registry bersama semua
+    worker: job yang dijalankan worker lain dibaca dari disk, dan job yang
+    belum selesai hanya ditandai interrupted jika proses pemiliknya sudah
+    mati. resume mengambil alih kepemilikan di bawah lock, jadi satu job
+    tidak pernah berjalan dua kali.
+    """
+
+    def __init__(self, runner, jobs_dir=JOBS_DIR, max_workers=MAX_JOB_WORKERS):
+        self.runner = runner
+        self.jobs_dir = jobs_dir
+        self.jobs = {}  # Job yang dijalankan proses ini
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="crawl-job")
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def _job_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _checkpoint_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.checkpoint.json")
+
+    def _events_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.events.jsonl")
+
+    def _cancel_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.cancel")
+
+    def _local(self, job_id):
+        """Job yang sedang dijalankan proses ini, None jika bukan"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+        return job if job is not None and not job.finished else None
+
+    def _owner_alive(self, job):
+        """False jika proses pemilik job sudah mati; pemilik di host lain dianggap hidup"""
+        owner = job.owner
+        if not owner:
+            return False
+        if owner.get("host") != socket.gethostname():
+            return True
+        if owner.get("pid") == os.getpid():
+            # PID sama tapi tidak ada di registry lokal: milik proses sebelumnya
+            with self.lock:
+                return job.id in self.jobs
+        try:
+            os.kill(owner["pid"], 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _read_job(self, job_id):
+        """Job dari disk (file_lock dipegang); job yang pemiliknya mati ditandai interrupted"""
+        data = _read_json(self._job_path(job_id))
+        if data is None:
+            return None
+        try:
+            job = CrawlJob.from_dict(data)
+        except Exception as e:
+            logger.error(f"Error loading job {job_id}: {e}")
+            return None
+        if not job.finished and not self._owner_alive(job):
+            job.status = "interrupted"
+            _write_json_atomic(self._job_path(job.id), job.to_dict())
+        return job
+
+    def save_job(self, job):
+        try:
+            with file_lock(self.jobs_dir):
+                current = _read_json(self._job_path(job.id))
+                # Job sudah diambil alih worker lain (proses ini sempat dianggap mati)
+                if current is not None and current.get("owner") != job.owner:
+                    return
+                _write_json_atomic(self._job_path(job.id), job.to_dict())
+        except Exception as e:
+            logger.error(f"Error saving job {job.id}: {e}")
+
+    def save_checkpoint(self, job, state):
+        """Simpan state frontier/visited job ke disk"""
+        try:
+            _write_json_atomic(self._checkpoint_path(job.id), state)
+            self.save_job(job)
+        except Exception as e:
+            logger.error(f"Error saving checkpoint for job {job.id}: {e}")
+
+    def load_checkpoint(self, job_id):
+        path = self._checkpoint_path(job_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _adopt(self, job):
+        """Jadikan proses ini pemilik job dan daftarkan di registry lokal"""
+        job.owner = process_owner()
+        job.events_path = self._events_path(job.id)
+        job.cancel_path = self._cancel_path(job.id)
+        with self.lock:
+            self.jobs[job.id] = job
+
+    def submit(self, params):
+        """Daftarkan job baru dan jalankan di background"""
+        job = CrawlJob(params)
+        self._adopt(job)
+        self.save_job(job)
+        self.executor.submit(self._run, job, None)
+        return job
+
+    def resume(self, job_id):
+        """Lanjutkan job yang dibatalkan/terputus dari checkpoint terakhir.
+
+        None jika job tidak ada, sudah selesai, atau masih berjalan di worker lain.
+        """
+        with file_lock(self.jobs_dir):
+            job = self._read_job(job_id)
+            if job is None or not job.finished or job.status == "completed":
+                return None
+            self._adopt(job)
+            job.resumed += 1
+            job.set_status("queued", error=None)
+            if os.path.exists(job.cancel_path):
+                os.remove(job.cancel_path)
+            _write_json_atomic(self._job_path(job.id), job.to_dict())
+        state = self.load_checkpoint(job_id)
+        self.executor.submit(self._run, job, state)
+        return job
+
+    def cancel(self, job_id):
+        job = self._local(job_id)
+        if job is not None:
+            job.cancel_event.set()
+            if job.status == "queued":
+                job.set_status("cancelled")
+                self.save_job(job)
+            return job
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            # Dijalankan worker lain: pemilik berhenti saat melihat file cancel
+            open(self._cancel_path(job_id), 'w').close()
+        return job
+
+    def get(self, job_id):
+        job = self._local(job_id)
+        if job is not None:
+            return job
+        with file_lock(self.jobs_dir):
+            return self._read_job(job_id)
+
+    def list(self):
+        with file_lock(self.jobs_dir):
+            names = [name for name in os.listdir(self.jobs_dir)
+                     if name.endswith(".json") and not name.endswith(".checkpoint.json")]
+            jobs = [self._local(name[:-5]) or self._read_job(name[:-5]) for name in names]
+        return sorted((job for job in jobs if job is not None), key=lambda job: job.created_at)
+
+    def events_since(self, job_id, seq, timeout=None):
+        """(event dengan seq > seq, job) untuk job lokal atau job milik worker lain.
+
+        Event job worker lain dibaca dari file event-nya; tunggu (polling)
+        sampai ada event baru, job selesai atau timeout. job None jika tidak ada.
+        """
+        job = self._local(job_id)
+        if job is not None:
+            return job.events_since(seq, timeout), job
+        deadline = time.monotonic() + (timeout or 0)
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                return [], None
+            events = self._read_events(job_id, seq)
+            if events or job.finished or time.monotonic() >= deadline:
+                return events, job
+            time.sleep(JOB_POLL_INTERVAL)
+
+    def _read_events(self, job_id, seq):
+        events = deque(maxlen=MAX_JOB_EVENTS)
+        try:
+            with open(self._events_path(job_id), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        # Baris terakhir yang sedang ditulis pemilik
+                        break
+                    if event.get('seq', 0) > seq:
+                        events.append(event)
+        except OSError:
+            pass
+        return list(events)
+
+    def _run(self, job, resume_state):
+        if job.should_stop():
+            job.set_status("cancelled")
+            self.save_job(job)
+            return
+        job.set_status("running")
+        self.save_job(job)
+        try:
+            result = self.runner(job, resume_state, lambda state: self.save_checkpoint(job, state))
+            if job.should_stop():
+                job.set_status("cancelled", result=result)
+            else:
+                job.set_status("completed", result=result)
+                # Checkpoint tidak diperlukan lagi setelah job selesai
+                if os.path.exists(self._checkpoint_path(job.id)):
+                    os.remove(self._checkpoint_path(job.id))
+        except Exception as e:
+            logger.error(f"Error running job {job.id}: {e}")
+            job.set_status("failed", error=str(e))
+        if os.path.exists(job.cancel_path):
+            os.remove(job.cancel_path)
+        self.save_job(job)
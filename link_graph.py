@@ -0,0 +1,349 @@
+import json
+import os
+import threading
+from array import array
+
+import numpy as np
+
+import shared_dir
+from crawl_log import logger
+
+# Direktori untuk menyimpan link graph hasil crawl
+GRAPH_DIR = "crawl_graph"
+# Delta dilipat ke CSR dan dipublikasikan jika halaman delta >= GRAPH_MERGE_RATIO x halaman graph
+# (minimal GRAPH_MERGE_MIN_PAGES)
+GRAPH_MERGE_RATIO = 0.1
+GRAPH_MERGE_MIN_PAGES = 256
+# Perubahan sebanyak GRAPH_REBUILD_RATIO x halaman graph lebih murah dibangun ulang penuh
+GRAPH_REBUILD_RATIO = 0.5
+
+
+class LinkGraph:
+    """Link graph halaman di cache sebagai adjacency CSR dengan node id integer.
+
+    Setiap URL (halaman di cache atau target link yang belum di-cache) punya
+    node id; cached[i] menandai node yang halamannya ada di cache. Out-link
+    node i ada di indices[indptr[i]:indptr[i + 1]] dengan urutan sama seperti
+    di halaman, sehingga traversal di graph menghasilkan urutan kunjungan yang
+    sama dengan traversal BFS/DFS biasa.
+
+    Halaman yang berubah setelah build/load dipasang sebagai delta (apply):
+    baris barunya ditulis ke array delta dan starts/counts per node menunjuk
+    ke sana, node id yang sudah ada tidak berubah. merge() melipat delta
+    kembali menjadi satu CSR. Graph tersimpan di-load saat pertama kali
+    dipakai; indptr/indices di-memory-map read-only dari file .npy sehingga
+    dibagi antar worker.
+    """
+
+    def __init__(self, graph_dir=GRAPH_DIR):
+        self.graph_dir = graph_dir
+        self.load_lock = threading.Lock()
+        # URL halaman yang berubah sejak graph terakhir di-update (lihat note_change)
+        self.changes = set()
+        self.changes_lock = threading.Lock()
+        self.revision = 0
+        self.reset()
+        self.pending_load = True
+
+    def reset(self):
+        self.urls = []
+        self.node_ids = {}
+        # (indptr, indices, starts, counts, delta, cached) diganti sekaligus agar
+        # traversal yang sedang berjalan selalu membaca keadaan yang konsisten;
+        # starts/counts/delta None jika tidak ada delta
+        self.adjacency = None
+        self.delta_pages = 0
+        self.source_version = None
+        self.revision += 1
+        self._adjacency_lists = None
+        self._doc_ids = (None, None)
+
+    def ensure_loaded(self):
+        """Load graph dari disk sekali, saat graph pertama kali dipakai"""
+        if self.pending_load:
+            with self.load_lock:
+                if self.pending_load:
+                    self.load()
+                    self.pending_load = False
+        return self
+
+    @property
+    def is_built(self):
+        self.ensure_loaded()
+        return self.adjacency is not None
+
+    @property
+    def cached(self):
+        return self.adjacency[5]
+
+    @property
+    def cached_count(self):
+        return int(np.count_nonzero(self.adjacency[5])) if self.adjacency is not None else 0
+
+    def _set_base(self, urls, indptr, indices, cached, source_version):
+        self.reset()
+        self.urls = urls
+        self.node_ids = {url: i for i, url in enumerate(urls)}
+        self.adjacency = (indptr, indices, None, None, None, cached)
+        self.source_version = source_version
+
+    def build(self, pages, source_version=None):
+        """Bangun CSR dari iterable (url, links) halaman di cache"""
+        pages = list(pages)
+        urls = [url for url, _ in pages]
+        node_ids = {url: i for i, url in enumerate(urls)}
+        indptr = array('q', [0])
+        indices = array('i')
+        for _, links in pages:
+            for link in links:
+                node = node_ids.get(link)
+                if node is None:
+                    node = node_ids[link] = len(urls)
+                    urls.append(link)
+                indices.append(node)
+            indptr.append(len(indices))
+        # Target link yang belum di-cache: baris kosong
+        indptr.extend([len(indices)] * (len(urls) - len(pages)))
+
+        # Graph baru menggantikan graph tersimpan yang belum sempat di-load
+        self.pending_load = False
+        self._set_base(urls, np.frombuffer(indptr, dtype=np.int64), np.frombuffer(indices, dtype=np.int32),
+                       np.arange(len(urls)) < len(pages), source_version)
+        logger.info(f"[GRAPH] Built link graph: {len(pages)} pages, {len(urls)} nodes, {len(indices)} links")
+        return self
+
+    def note_change(self, url):
+        """Catat halaman yang disimpan/dihapus; dipasang sebagai delta pada update berikutnya"""
+        with self.changes_lock:
+            self.changes.add(url)
+
+    def take_changes(self):
+        with self.changes_lock:
+            changes, self.changes = self.changes, set()
+        return changes
+
+    def _node(self, url):
+        node = self.node_ids.get(url)
+        if node is None:
+            node = self.node_ids[url] = len(self.urls)
+            self.urls.append(url)
+        return node
+
+    def apply(self, pages, source_version=None):
+        """Pasang halaman yang berubah sebagai delta: iterable (url, links), links None = halaman dihapus"""
+        indptr, indices, starts, counts, delta, cached = self.adjacency
+        if starts is None:
+            starts = indptr[:-1]
+            counts = np.diff(indptr)
+            delta = np.empty(0, dtype=np.int32)
+        offset = len(indices) + len(delta)
+        rows = {}
+        added = array('i')
+        for url, links in pages:
+            node = self._node(url)
+            if links is None:
+                rows[node] = (0, 0, False)
+                continue
+            start = offset + len(added)
+            added.extend(self._node(link) for link in links)
+            rows[node] = (start, offset + len(added) - start, True)
+        # Array baru (bukan ubah di tempat): traversal yang sedang berjalan tetap memakai yang lama
+        grow = len(self.urls) - len(cached)
+        starts = np.concatenate([starts, np.zeros(grow, dtype=np.int64)])
+        counts = np.concatenate([counts, np.zeros(grow, dtype=np.int64)])
+        cached = np.concatenate([cached, np.zeros(grow, dtype=bool)])
+        if rows:
+            nodes = np.fromiter(rows, dtype=np.int64, count=len(rows))
+            values = list(rows.values())
+            starts[nodes] = [value[0] for value in values]
+            counts[nodes] = [value[1] for value in values]
+            cached[nodes] = [value[2] for value in values]
+        delta = np.concatenate([delta, np.frombuffer(added, dtype=np.int32)])
+        self.adjacency = (indptr, indices, starts, counts, delta, cached)
+        self.delta_pages += len(rows)
+        self.source_version = source_version
+        self.revision += 1
+        self._adjacency_lists = None
+        return self
+
+    def _csr(self):
+        """(indptr, indices, cached) dengan delta sudah dilipat ke dalam CSR"""
+        adjacency = self.adjacency
+        indptr, indices, starts, counts, delta, cached = adjacency
+        if starts is None:
+            return indptr, indices, cached
+        targets, _ = self.neighbors(np.arange(len(cached), dtype=np.int64), adjacency)
+        return np.concatenate([[0], np.cumsum(counts)]), targets, cached
+
+    def merge(self):
+        """Lipat delta menjadi satu CSR baru; node id tidak berubah"""
+        if self.adjacency is None or self.adjacency[2] is None:
+            return self
+        indptr, indices, cached = self._csr()
+        self.adjacency = (indptr, indices, None, None, None, cached)
+        self.delta_pages = 0
+        self._adjacency_lists = None
+        logger.info(f"[GRAPH] Merged link graph delta: {self.cached_count} pages, {len(self.urls)} nodes, {len(indices)} links")
+        return self
+
+    def save(self):
+        """Publikasikan graph sebagai versi baru (meta.json + indptr/indices/cached .npy)"""
+        if not self.is_built:
+            return
+        source_version = self.source_version
+        indptr, indices, cached = self._csr()
+        urls = self.urls[:len(cached)]
+
+        def write(path):
+            with open(os.path.join(path, "meta.json"), 'w', encoding='utf-8') as f:
+                json.dump({
+                    "urls": urls,
+                    "cached_count": int(np.count_nonzero(cached)),
+                    "source_version": source_version
+                }, f, ensure_ascii=False)
+            np.save(os.path.join(path, "indptr.npy"), indptr)
+            np.save(os.path.join(path, "indices.npy"), indices)
+            np.save(os.path.join(path, "cached.npy"), cached)
+
+        try:
+            shared_dir.publish(self.graph_dir, write)
+            logger.info(f"Link graph saved to {self.graph_dir}")
+        except Exception as e:
+            logger.error(f"Error saving link graph: {e}")
+
+    def load(self):
+        """Load versi graph terbaru dari disk jika ada"""
+        path = shared_dir.current_dir(self.graph_dir)
+        if path is None:
+            return False
+        try:
+            with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            indptr = np.load(os.path.join(path, "indptr.npy"), mmap_mode='r')
+            indices = np.load(os.path.join(path, "indices.npy"), mmap_mode='r')
+            cached_path = os.path.join(path, "cached.npy")
+            if os.path.exists(cached_path):
+                cached = np.load(cached_path)
+            else:
+                # Format lama: halaman cache selalu node 0..cached_count-1
+                cached = np.arange(len(meta["urls"])) < meta["cached_count"]
+        except Exception as e:
+            logger.error(f"Error loading link graph: {e}")
+            self.reset()
+            return False
+
+        self._set_base(meta["urls"], indptr, indices, cached, meta.get("source_version"))
+        return True
+
+    def clear(self):
+        self.pending_load = False
+        self.reset()
+        shared_dir.clear(self.graph_dir)
+
+    def neighbors(self, nodes, adjacency=None):
+        """Out-link dari sekumpulan node, digabung sesuai urutan node dan urutan link"""
+        indptr, indices, starts, counts, delta = (adjacency or self.adjacency)[:5]
+        if starts is None:
+            starts = indptr[nodes]
+            counts = indptr[nodes + 1] - starts
+        else:
+            starts = starts[nodes]
+            counts = counts[nodes]
+        total = int(counts.sum())
+        offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(total)
+        if delta is None:
+            return indices[offsets], np.repeat(nodes, counts)
+        # Offset >= len(indices) menunjuk ke baris delta
+        targets = np.empty(total, dtype=np.int32)
+        in_base = offsets < len(indices)
+        targets[in_base] = indices[offsets[in_base]]
+        targets[~in_base] = delta[offsets[~in_base] - len(indices)]
+        return targets, np.repeat(nodes, counts)
+
+    def bfs(self, start, max_depth=-1):
+        """BFS vektor per level dari node start.
+
+        Return (order, depth, parent): urutan kunjungan sama dengan BfsFrontier
+        (dedup saat enqueue), depth -1 untuk node yang tidak terjangkau.
+        """
+        # Satu keadaan graph untuk seluruh traversal walaupun delta baru dipasang di tengah jalan
+        adjacency = self.adjacency
+        depth = np.full(len(adjacency[5]), -1, dtype=np.int32)
+        parent = np.full(len(adjacency[5]), -1, dtype=np.int32)
+        depth[start] = 0
+        frontier = np.array([start], dtype=np.int64)
+        levels = [frontier]
+        level = 0
+        while frontier.size and (max_depth == -1 or level < max_depth):
+            candidates, sources = self.neighbors(frontier, adjacency)
+            unseen = depth[candidates] == -1
+            candidates = candidates[unseen]
+            sources = sources[unseen]
+            # Kemunculan pertama setiap node menentukan urutan dan parent-nya
+            _, first = np.unique(candidates, return_index=True)
+            first.sort()
+            frontier = candidates[first].astype(np.int64)
+            level += 1
+            depth[frontier] = level
+            parent[frontier] = sources[first]
+            levels.append(frontier)
+        return np.concatenate(levels), depth, parent
+
+    def dfs(self, start, max_depth=-1):
+        """DFS dengan stack node id, semantik sama dengan DfsFrontier.
+
+        Return (order, depth, parent) seperti bfs().
+        """
+        lists = self._adjacency_lists
+        if lists is None:
+            indptr, indices, _ = self._csr()
+            lists = self._adjacency_lists = (indptr.tolist(), indices.tolist())
+        indptr, indices = lists
+        size = len(indptr) - 1
+        depth = [0] * size
+        parent = [-1] * size
+        visited = bytearray(size)
+        order = []
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            if visited[node]:
+                continue
+            visited[node] = 1
+            order.append(node)
+            child_depth = depth[node] + 1
+            if max_depth != -1 and child_depth > max_depth:
+                continue
+            # Urutan terbalik agar link pertama dikunjungi lebih dulu
+            for child in reversed(indices[indptr[node]:indptr[node + 1]]):
+                if not visited[child]:
+                    parent[child] = node
+                    depth[child] = child_depth
+                    stack.append(child)
+        return np.array(order, dtype=np.int64), np.array(depth, dtype=np.int32), np.array(parent, dtype=np.int32)
+
+    def path(self, parent, node):
+        """Path URL dari root ke node lewat array parent"""
+        path = []
+        while node != -1:
+            path.append(self.urls[node])
+            node = int(parent[node])
+        path.reverse()
+        return path
+
+    def doc_ids(self, url_ids, version, resolve=None):
+        """Map node id ke doc id di index lain (-1 jika tidak ada atau bukan halaman cache).
+
+        resolve(url) (opsional) memetakan URL ke URL dokumen yang ter-index,
+        misalnya near-duplicate ke dokumen kanoniknya.
+        """
+        version = (version, self.revision)
+        if self._doc_ids[0] != version:
+            cached = self.cached
+            urls = self.urls[:len(cached)]
+            if resolve is not None:
+                urls = map(resolve, urls)
+            ids = np.fromiter((url_ids.get(url, -1) for url in urls), dtype=np.int64, count=len(cached))
+            ids[~cached] = -1
+            self._doc_ids = (version, ids)
+        return self._doc_ids[1]
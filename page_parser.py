@@ -0,0 +1,158 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+
+from bs4 import BeautifulSoup, CData, FeatureNotFound, NavigableString, Tag
+
+import urlnorm
+from crawl_log import logger
+from urlnorm import canonicalize, in_scope
+
+# Backend parser BeautifulSoup: 'html.parser' (bawaan), 'lxml' (cepat) atau 'html5lib'
+PARSER_BACKEND = "html.parser"
+
+# Jumlah proses parser (None = jumlah core, 0 = parse di thread pemanggil)
+PARSE_PROCESSES = None
+# Maksimum response mentah yang menunggu/sedang di-parse (backpressure)
+PARSE_QUEUE_SIZE = None  # default: 2 x jumlah proses
+# Start method proses parser: 'spawn' atau 'forkserver' (bukan 'fork', lihat ParsePool)
+PARSE_START_METHOD = "spawn"
+
+# Tag yang teksnya tidak ikut dalam konten bersih
+SKIP_TAGS = frozenset(['script', 'style', 'header', 'footer', 'nav'])
+
+_TEXT_TYPES = (NavigableString, CData)
+_available_parsers = {}
+
+
+def resolve_parser(parser=None):
+    """Pilih backend parser, fallback ke html.parser jika tidak terpasang"""
+    parser = parser or PARSER_BACKEND
+    if parser not in _available_parsers:
+        try:
+            BeautifulSoup("", parser)
+            _available_parsers[parser] = parser
+        except FeatureNotFound:
+            logger.warning(f"Parser '{parser}' not available, falling back to html.parser")
+            _available_parsers[parser] = "html.parser"
+    return _available_parsers[parser]
+
+
+def parse_page(content, base_url=None, parser=None):
+    """Parse HTML sekali dan ambil title, teks bersih dan links dalam satu tree walk.
+
+    Links di-resolve terhadap base_url, dikanonikalisasi, difilter sesuai scope
+    crawl dan di-dedup (urutan kemunculan pertama dipertahankan). anchors berisi
+    teks anchor untuk setiap link (sejajar dengan links).
+    """
+    soup = BeautifulSoup(content, resolve_parser(parser))
+    title = ""
+    text_parts = []
+    links = []
+    anchors = []
+    seen_links = set()
+
+    base_tag = soup.find('base', href=True)
+    if base_tag:
+        base_url = canonicalize(base_tag['href'], base_url) or base_url
+
+    # Iteratif (bukan rekursif) agar halaman yang sangat dalam tidak kena recursion limit
+    stack = [(child, False) for child in reversed(soup.contents)]
+    while stack:
+        node, skipped = stack.pop()
+        if isinstance(node, Tag):
+            name = node.name
+            if name == 'a':
+                href = node.get('href')
+                link = canonicalize(href, base_url) if href else None
+                if link and link not in seen_links and in_scope(link):
+                    seen_links.add(link)
+                    links.append(link)
+                    anchors.append(node.get_text(" ", strip=True))
+            elif name == 'title' and not title and node.string is not None:
+                title = str(node.string)
+            skipped = skipped or name in SKIP_TAGS
+            stack.extend((child, skipped) for child in reversed(node.contents))
+        elif not skipped and type(node) in _TEXT_TYPES:
+            text = node.strip()
+            if text:
+                text_parts.append(text)
+
+    return {
+        "title": title,
+        "content": ' '.join(text_parts),
+        "links": links,
+        "anchors": anchors,
+    }
+
+
+def _parse_in_worker(content, base_url, parser, scope):
+    # Proses spawn tidak mewarisi konfigurasi runtime parent, jadi scope dikirim per halaman
+    urlnorm.SCOPE_HOST_SUFFIXES = scope
+    return parse_page(content, base_url, parser)
+
+
+class ParsePool:
+    """Parse HTML di process pool agar parsing tidak menahan GIL thread fetch.
+
+    submit() memblokir jika sudah ada max_queued response yang menunggu atau
+    sedang di-parse, sehingga fetcher ikut melambat dan memory tetap terbatas.
+    Proses worker dibuat dengan context spawn (PARSE_START_METHOD): submit
+    dipanggil dari thread fetch, dan fork dari proses multi-thread bisa
+    mewarisi lock yang sedang dipegang thread lain.
+    """
+
+    def __init__(self, processes=None, max_queued=None, parser=None, start_method=None):
+        self.processes = processes or os.cpu_count() or 1
+        self.max_queued = max_queued or PARSE_QUEUE_SIZE or self.processes * 2
+        self.parser = parser
+        self.context = multiprocessing.get_context(start_method or PARSE_START_METHOD)
+        self._slots = threading.BoundedSemaphore(self.max_queued)
+        self._lock = threading.Lock()
+        self._executor = self._new_executor()
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(self.processes, mp_context=self.context)
+
+    def submit(self, content, base_url=None):
+        """Jadwalkan parse_page di process pool, return Future hasil parse"""
+        self._slots.acquire()
+        try:
+            args = (_parse_in_worker, content, base_url, self.parser, urlnorm.SCOPE_HOST_SUFFIXES)
+            with self._lock:
+                if self._executor is None:
+                    self._executor = self._new_executor()
+                try:
+                    future = self._executor.submit(*args)
+                except BrokenExecutor:
+                    # Worker mati (misalnya di-kill OOM): ganti pool, halaman berikutnya tetap di-parse
+                    self._executor.shutdown(wait=False, cancel_futures=True)
+                    self._executor = self._new_executor()
+                    future = self._executor.submit(*args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool():
+    """Process pool parser bersama, None jika PARSE_PROCESSES = 0"""
+    global _parse_pool
+    if PARSE_PROCESSES == 0:
+        return None
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ParsePool(PARSE_PROCESSES)
+        return _parse_pool
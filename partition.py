@@ -0,0 +1,344 @@
+"""Crawl terpartisi: beberapa proses worker, masing-masing memiliki sebagian URL.
+
+URL dibagi ke partisi berdasarkan hash host + path kanonik-nya. Setiap worker
+punya frontier, visited set dan store (shard) sendiri di direktori
+shard-<i>; link yang ditemukan tetapi milik partisi lain dikirim lewat
+FileQueue ke inbox partisi tersebut. FileQueue hanya memakai rename atomik di
+satu direktori, jadi bisa diganti broker jaringan atau dipakai antar node
+lewat filesystem bersama tanpa mengubah worker.
+
+Koordinator (crawl_partitioned) mengirim start URL, lalu menunggu sampai
+semua worker idle dan jumlah pesan terkirim sama dengan jumlah pesan yang
+diterima (tidak ada link yang masih di jalan). Shard lalu digabung ke cache
+utama oleh pemanggil (lihat app.partitioned_crawl).
+"""
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from itertools import islice
+from urllib.parse import urlsplit
+
+from crawl_log import logger
+from urlnorm import canonicalize, fingerprint, localize_url
+
+# Direktori kerja crawl terpartisi (relatif terhadap cwd), satu subdirektori per run
+PARTITION_DIR = "crawl_partitions"
+# Periode cek inbox dan status worker (detik)
+POLL_INTERVAL = 0.05
+# Link untuk partisi lain dikirim per batch sebanyak ini (atau setiap FLUSH_INTERVAL)
+BATCH_SIZE = 256
+FLUSH_INTERVAL = 0.2
+# Periode tulis file status worker saat sedang crawl (detik)
+STATUS_INTERVAL = 0.5
+# Batas waktu worker berhenti setelah diminta (detik)
+STOP_TIMEOUT = 30
+
+# Modul di-import ulang oleh proses spawn; root repo dicatat sebelum worker pindah cwd
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def partition_of(url, partitions):
+    """Partisi pemilik URL: hash host + path (query dan scheme tidak memindahkan URL)"""
+    parts = urlsplit(url)
+    return fingerprint((parts.hostname or "") + parts.path) % partitions
+
+
+def _write_json_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class FileQueue:
+    """Antrian pesan satu konsumen di atas direktori spool.
+
+    put() menulis satu file JSONL per batch ke file sementara lalu rename,
+    sehingga get() hanya pernah melihat batch yang lengkap. Banyak producer
+    (proses lain atau node lain di filesystem bersama) boleh menulis ke
+    direktori yang sama.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.sequence = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def put(self, messages):
+        if not messages:
+            return
+        self.sequence += 1
+        name = f"{time.time_ns():020d}-{os.getpid()}-{self.sequence}"
+        tmp_path = os.path.join(self.directory, name + ".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for message in messages:
+                f.write(json.dumps(message, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, os.path.join(self.directory, name + ".jsonl"))
+
+    def get(self):
+        """Ambil dan hapus semua batch yang sudah lengkap, urut waktu kirim"""
+        messages = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".jsonl"):
+                continue
+            path = os.path.join(self.directory, name)
+            with open(path, encoding='utf-8') as f:
+                messages.extend(json.loads(line) for line in f if line.strip())
+            os.remove(path)
+        return messages
+
+
+def new_run_dir():
+    return os.path.join(os.path.abspath(PARTITION_DIR), f"run-{time.time_ns()}-{os.getpid()}")
+
+
+def inbox_dir(run_dir, partition):
+    return os.path.join(run_dir, f"inbox-{partition}")
+
+
+def shard_dir(run_dir, partition):
+    return os.path.join(run_dir, f"shard-{partition}")
+
+
+def status_path(run_dir, partition):
+    return os.path.join(run_dir, f"status-{partition}.json")
+
+
+def stop_path(run_dir):
+    return os.path.join(run_dir, "STOP")
+
+
+class PartitionWorker:
+    """Crawl BFS untuk URL milik satu partisi.
+
+    Pesan inbox dan link lokal masuk antrian yang sama; depth[url] menyimpan
+    depth terkecil yang diketahui. Halaman yang sudah diproses dan kemudian
+    ditemukan lewat jalur lebih pendek tidak di-fetch ulang, link-nya saja
+    yang diteruskan ulang dengan depth baru (dari metadata shard).
+    """
+
+    def __init__(self, crawler, partition, partitions, run_dir, max_depth=-1, use_english=False):
+        self.crawler = crawler
+        self.partition = partition
+        self.partitions = partitions
+        self.run_dir = run_dir
+        self.max_depth = max_depth
+        self.use_english = use_english
+        self.inbox = FileQueue(inbox_dir(run_dir, partition))
+        self.outboxes = [FileQueue(inbox_dir(run_dir, p)) for p in range(partitions)]
+        self.outgoing = {}  # partisi -> [[url, depth], ...] yang belum dikirim
+        self.outgoing_count = 0
+        self.queue = deque()
+        self.depth = {}  # url -> depth terkecil yang diketahui (URL partisi ini)
+        self.expanded = {}  # url -> depth saat link-nya diteruskan
+        self.sent_depth = {}  # url partisi lain -> depth terkecil yang sudah dikirim
+        self.stats = {"partition": partition, "pages": 0, "fetched": 0, "sent": 0, "received": 0}
+        self.last_status = None
+
+    def push(self, url, depth):
+        if self.max_depth != -1 and depth > self.max_depth:
+            return
+        partition = partition_of(url, self.partitions)
+        if partition != self.partition:
+            if self.sent_depth.get(url, depth + 1) > depth:
+                self.sent_depth[url] = depth
+                self.outgoing.setdefault(partition, []).append([url, depth])
+                self.outgoing_count += 1
+            return
+        if self.depth.get(url, depth + 1) > depth:
+            self.depth[url] = depth
+            self.queue.append(url)
+
+    def receive(self):
+        messages = self.inbox.get()
+        self.stats["received"] += len(messages)
+        for url, depth in messages:
+            self.push(url, depth)
+
+    def flush(self):
+        """Kirim semua link milik partisi lain yang masih dibuffer"""
+        for partition, messages in self.outgoing.items():
+            self.outboxes[partition].put(messages)
+            self.stats["sent"] += len(messages)
+        self.outgoing = {}
+        self.outgoing_count = 0
+
+    def write_status(self, idle, finished=False):
+        status = dict(self.stats, queued=len(self.queue), idle=idle, finished=finished)
+        if status != self.last_status:
+            _write_json_atomic(status_path(self.run_dir, self.partition), status)
+            self.last_status = status
+
+    def prefetch(self, fetcher):
+        """Jadwalkan fetch URL berikutnya di antrian yang belum diproses"""
+        upcoming = (localize_url(url, self.use_english)
+                    for url in islice(self.queue, fetcher.max_pending * 4) if url not in self.expanded)
+        fetcher.prefetch(islice(upcoming, fetcher.max_pending))
+
+    def step(self, fetcher):
+        """Proses satu URL dari antrian"""
+        url = self.queue.popleft()
+        depth = self.depth[url]
+        expanded = self.expanded.get(url)
+        if expanded is not None:
+            if depth >= expanded:
+                return
+            # Jalur lebih pendek ke halaman yang sudah di-crawl: teruskan ulang link-nya saja
+            meta = self.crawler.cache_manager.cache_data["urls"].get(localize_url(url, self.use_english))
+            links = meta.get("links", []) if meta else []
+        else:
+            self.prefetch(fetcher)
+            page = self.crawler.process_page(url, self.use_english, use_cache=False, fetcher=fetcher)
+            self.stats["pages"] += 1
+            self.stats["fetched"] += page is not None
+            links = page.get("links", []) if page else []
+        self.expanded[url] = depth
+        for link in links:
+            self.push(link, depth + 1)
+
+    def run(self):
+        fetcher = self.crawler.PageFetcher(parse_pool=self.crawler.parse_pool)
+        last_poll = last_flush = last_status = 0.0
+        try:
+            while not os.path.exists(stop_path(self.run_dir)):
+                now = time.monotonic()
+                if not self.queue or now - last_poll >= POLL_INTERVAL:
+                    self.receive()
+                    last_poll = now
+                if not self.queue:
+                    # Idle hanya dilaporkan setelah semua link keluar terkirim
+                    self.flush()
+                    self.write_status(idle=True)
+                    time.sleep(POLL_INTERVAL)
+                    continue
+                self.step(fetcher)
+                if self.outgoing_count >= BATCH_SIZE or now - last_flush >= FLUSH_INTERVAL:
+                    self.flush()
+                    last_flush = now
+                if now - last_status >= STATUS_INTERVAL:
+                    self.write_status(idle=False)
+                    last_status = now
+        finally:
+            fetcher.close()
+            self.crawler.cache_manager.save_cache()
+            self.crawler.cache_manager.store.close()
+            self.write_status(idle=True, finished=True)
+
+
+def run_worker(partition, partitions, run_dir, options):
+    """Entry point proses worker: cache, index dan job milik worker ada di shard-<partition>"""
+    sys.path.insert(0, REPO_ROOT)
+    os.makedirs(shard_dir(run_dir, partition), exist_ok=True)
+    os.chdir(shard_dir(run_dir, partition))
+    # Konfigurasi runtime koordinator (misalnya scope host) tidak ikut terbawa proses spawn
+    import urlnorm
+    urlnorm.SCOPE_HOST_SUFFIXES = tuple(options["scope"])
+    import fetcher
+    # Anggaran politeness per host dibagi rata ke semua worker
+    fetcher.politeness.rate = options["host_rate"] / partitions
+    fetcher.politeness.burst = max(1, options["host_burst"] // partitions)
+    fetcher.politeness.max_per_host = max(1, -(-options["max_per_host"] // partitions))
+    import page_parser
+    # Worker sudah proses sendiri: parse langsung di thread fetch, tanpa process pool per worker
+    page_parser.PARSE_PROCESSES = 0
+    import app as crawler
+    crawler.logger.setLevel(options["log_level"])
+    # Shard di-index sekali setelah digabung, bukan per worker
+    crawler.cache_manager.indexer = None
+    crawler.cache_manager.link_graph = None
+    crawler.cache_manager.load_cache()
+    worker = PartitionWorker(crawler, partition, partitions, run_dir,
+                             options["max_depth"], options["use_english"])
+    worker.run()
+
+
+def crawl_partitioned(start_url, max_depth=-1, workers=2, use_english=False, run_dir=None,
+                      should_stop=None, progress_callback=None):
+    """Crawl start_url dengan `workers` proses; return (direktori shard, statistik per worker).
+
+    Direktori run_dir (default: direktori baru di PARTITION_DIR) berisi
+    inbox, status dan shard setiap worker; pemanggil menghapusnya setelah
+    shard digabung.
+    """
+    import fetcher
+    import urlnorm
+
+    start_url = canonicalize(start_url) or start_url
+    run_dir = run_dir or new_run_dir()
+    os.makedirs(run_dir, exist_ok=True)
+    options = {
+        "max_depth": max_depth,
+        "use_english": use_english,
+        "scope": list(urlnorm.SCOPE_HOST_SUFFIXES),
+        "host_rate": fetcher.politeness.rate,
+        "host_burst": fetcher.politeness.burst,
+        "max_per_host": fetcher.politeness.max_per_host,
+        "log_level": logger.getEffectiveLevel(),
+    }
+    # Start URL dihitung sebagai satu pesan terkirim agar terminasi menunggu worker pemiliknya
+    FileQueue(inbox_dir(run_dir, partition_of(start_url, workers))).put([[start_url, 0]])
+    sent_seed = 1
+
+    # spawn: worker tidak mewarisi cache, index dan thread proses ini
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=run_worker, args=(i, workers, run_dir, options), name=f"partition-{i}")
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    logger.info(f"[PARTITIONED] Crawling {start_url} with {workers} workers in {run_dir}")
+
+    statuses = [None] * workers
+    previous = None
+    reported = None
+    try:
+        while True:
+            time.sleep(POLL_INTERVAL)
+            statuses = [_read_json(status_path(run_dir, i)) or statuses[i] for i in range(workers)]
+            failed = [i for i, process in enumerate(processes) if process.exitcode not in (None, 0)]
+            if failed:
+                raise RuntimeError(f"Partition worker {failed[0]} exited with code {processes[failed[0]].exitcode}")
+            if should_stop is not None and should_stop():
+                logger.info("[PARTITIONED] Crawl cancelled")
+                break
+            pages = sum(status["pages"] for status in statuses if status)
+            if progress_callback and pages != reported:
+                reported = pages
+                progress_callback({
+                    'status': 'partitions',
+                    'workers': workers,
+                    'visited_count': pages,
+                    'pages_per_worker': [status["pages"] if status else 0 for status in statuses],
+                    'log': f"[PARTITIONED] {pages} pages crawled by {workers} workers"
+                })
+            if any(status is None or not status["idle"] for status in statuses):
+                previous = None
+                continue
+            counters = [(status["sent"], status["received"]) for status in statuses]
+            in_flight = sent_seed + sum(sent for sent, _ in counters) - sum(received for _, received in counters)
+            # Dua pembacaan berturut-turut sama: tidak ada worker yang sempat bangun di antaranya
+            if in_flight == 0 and counters == previous:
+                break
+            previous = counters
+    finally:
+        _write_json_atomic(stop_path(run_dir), {"stopped": time.time()})
+        for process in processes:
+            process.join(STOP_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+
+    statuses = [_read_json(status_path(run_dir, i)) or {} for i in range(workers)]
+    return [shard_dir(run_dir, i) for i in range(workers)], statuses
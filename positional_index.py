@@ -0,0 +1,608 @@
+import json
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from fnmatch import fnmatchcase
+
+import numpy as np
+
+import shared_dir
+from crawl_log import logger
+from indexer import Segment, SegmentedIndex
+
+# Direktori untuk menyimpan positional index
+POSITIONAL_DIR = "crawl_positional"
+
+# Token = rangkaian karakter kata; offset menunjuk ke content asli
+TOKEN_PATTERN = re.compile(r"\w+")
+# Query: "frase dalam tanda kutip" atau satu kata, term boleh memakai * dan ?
+QUERY_PATTERN = re.compile(r'"([^"]*)"|([^\s"]+)')
+QUERY_TERM_PATTERN = re.compile(r"[\w*?]+")
+WILDCARDS = "*?"
+
+# Batas term hasil ekspansi prefix/wildcard (yang paling banyak dokumennya dipakai)
+MAX_EXPANSIONS = 256
+SUGGEST_LIMIT = 10
+# Panjang snippet (karakter) dan jumlah highlight maksimum per snippet
+SNIPPET_CHARS = 160
+SNIPPET_SPANS = 5
+
+
+def is_structured_query(query):
+    """True jika query memakai frase ("...") atau wildcard (*, ?)"""
+    return '"' in query or any(c in query for c in WILDCARDS)
+
+
+def parse_query(query):
+    """Pecah query menjadi clause; setiap clause adalah list pola term.
+
+    Frase dalam tanda kutip menjadi satu clause (term harus berurutan), kata
+    lain masing-masing satu clause. Semua clause harus cocok (AND).
+    """
+    clauses = []
+    for phrase, word in QUERY_PATTERN.findall(query):
+        terms = [term.lower() for term in QUERY_TERM_PATTERN.findall(phrase or word)]
+        if phrase:
+            if terms:
+                clauses.append(terms)
+        else:
+            clauses.extend([term] for term in terms)
+    return clauses
+
+
+def make_snippet(text, spans, width=SNIPPET_CHARS):
+    """Potongan text di sekitar span pertama; highlights relatif terhadap awal snippet"""
+    if not spans:
+        return None
+    start, end = spans[0]
+    lo = max(0, start - width // 2)
+    hi = min(len(text), max(end, lo + width))
+    # Geser batas ke spasi terdekat agar kata tidak terpotong (hanya mencari di tepi window)
+    if lo > 0:
+        space = text.find(" ", lo, start)
+        if space != -1:
+            lo = space + 1
+    if hi < len(text):
+        space = text.rfind(" ", end, hi)
+        if space != -1:
+            hi = space
+    highlights = [[s - lo, e - lo] for s, e in spans[:SNIPPET_SPANS] if s >= lo and e <= hi]
+    return {"text": text[lo:hi], "offset": lo, "highlights": highlights}
+
+
+class TermDictionary:
+    """Daftar term terurut di atas buffer UTF-8 + offset (bisa di-memory-map).
+
+    Urutan byte UTF-8 sama dengan urutan code point, jadi bisect langsung
+    memberi rentang term untuk satu prefix tanpa memuat semua term ke memory.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_terms(cls, terms):
+        encoded = [term.encode("utf-8") for term in terms]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(term) for term in encoded], out=offsets[1:])
+        return cls(np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        raw = self.data.tobytes()
+        offsets = self.offsets.tolist()
+        return (raw[lo:hi].decode("utf-8") for lo, hi in zip(offsets, offsets[1:]))
+
+    def find(self, term):
+        i = bisect_left(self, term)
+        return i if i < len(self) and self[i] == term else None
+
+    def prefix_range(self, prefix):
+        """Rentang [lo, hi) term yang diawali prefix"""
+        return bisect_left(self, prefix), bisect_left(self, prefix + "\U0010ffff")
+
+
+class PositionalSegment:
+    """Positional index sekumpulan dokumen (base atau satu segment inkremental).
+
+    Term dictionary terurut (TermDictionary) memetakan prefix ke rentang term
+    id. Posting disusun bertingkat seperti CSR: term -> (term, dokumen) ->
+    kemunculan, dan setiap kemunculan menyimpan posisi token serta offset
+    karakter awal/akhir di content, sehingga frase dicocokkan dari posisi dan
+    snippet di-highlight dari offset tanpa scan ulang content. Doc id lokal
+    terhadap segment.
+    """
+
+    ARRAYS = ("term_ptr", "post_docs", "post_ptr", "positions", "starts", "ends")
+
+    def __init__(self):
+        self.terms = TermDictionary.from_terms([])
+        self.urls = []
+        self.term_ptr = None   # term id -> rentang di post_docs
+        self.post_docs = None  # doc id per pasangan (term, dokumen)
+        self.post_ptr = None   # (term, dokumen) -> rentang di positions/starts/ends
+        self.positions = None
+        self.starts = None
+        self.ends = None
+
+    @classmethod
+    def build(cls, documents):
+        """Index dari iterable (url, content), di-stream satu kali; halaman tanpa content dilewati"""
+        term_ids = {}
+        columns = tuple(array('i') for _ in range(5))  # term, dokumen, posisi, start, end
+        tids, docs, positions, starts, ends = columns
+        urls = []
+        for url, content in documents:
+            if not content:
+                continue
+            doc_id = len(urls)
+            urls.append(url)
+            for position, match in enumerate(TOKEN_PATTERN.finditer(content)):
+                tids.append(term_ids.setdefault(match.group().lower(), len(term_ids)))
+                docs.append(doc_id)
+                positions.append(position)
+                starts.append(match.start())
+                ends.append(match.end())
+
+        sorted_terms = sorted(term_ids)
+        rank = np.empty(len(term_ids), dtype=np.int32)
+        rank[[term_ids[term] for term in sorted_terms]] = np.arange(len(sorted_terms), dtype=np.int32)
+        tids, docs, positions, starts, ends = (np.frombuffer(column, dtype=np.intc).astype(np.int32)
+                                               for column in columns)
+        segment = cls()
+        segment._assemble(sorted_terms, urls, rank[tids], docs, positions, starts, ends)
+        return segment
+
+    @classmethod
+    def merge(cls, parts):
+        """Gabungkan list (segment, live) menjadi satu segment; dokumen dengan live False dibuang"""
+        terms = sorted(set().union(*(segment.terms for segment, _ in parts)))
+        term_ids = {term: i for i, term in enumerate(terms)}
+        columns = [[] for _ in range(5)]
+        urls = []
+        for segment, live in parts:
+            if segment.term_ptr is None or not len(segment.urls):
+                continue
+            mapping = np.fromiter((term_ids[term] for term in segment.terms), dtype=np.int32,
+                                  count=len(segment.terms))
+            per_term = segment.post_ptr[segment.term_ptr[1:]] - segment.post_ptr[segment.term_ptr[:-1]]
+            tids = np.repeat(mapping, per_term)
+            docs = np.repeat(segment.post_docs, np.diff(segment.post_ptr))
+            keep = live[docs]
+            # Doc id baru: urut sesuai urutan part, dokumen mati dilewati
+            doc_ids = (np.cumsum(live) - 1 + len(urls)).astype(np.int32)
+            for column, values in zip(columns, (tids, doc_ids[docs], segment.positions,
+                                                segment.starts, segment.ends)):
+                column.append(np.asarray(values[keep], dtype=np.int32))
+            urls.extend(url for url, alive in zip(segment.urls, live.tolist()) if alive)
+        tids, docs, positions, starts, ends = (np.concatenate(column) if column else np.empty(0, dtype=np.int32)
+                                               for column in columns)
+        # Term yang hanya muncul di dokumen mati ikut dibuang
+        used, tids = np.unique(tids, return_inverse=True)
+        merged = cls()
+        merged._assemble([terms[i] for i in used.tolist()], urls, tids.astype(np.int32),
+                         docs, positions, starts, ends)
+        return merged
+
+    def _assemble(self, terms, urls, tids, docs, positions, starts, ends):
+        # Sort stabil per term: dokumen dan posisi sudah urut sesuai urutan input
+        order = np.argsort(tids, kind='stable')
+        tids, docs = tids[order], docs[order]
+        group = np.ones(len(tids), dtype=bool)
+        group[1:] = (tids[1:] != tids[:-1]) | (docs[1:] != docs[:-1])
+        group_starts = np.flatnonzero(group)
+
+        self.terms = TermDictionary.from_terms(terms)
+        self.urls = urls
+        self.term_ptr = np.searchsorted(tids[group_starts], np.arange(len(terms) + 1)).astype(np.int64)
+        self.post_docs = docs[group_starts]
+        self.post_ptr = np.append(group_starts, len(tids)).astype(np.int64)
+        self.positions = positions[order]
+        self.starts = starts[order]
+        self.ends = ends[order]
+
+    def write(self, path, meta):
+        with open(os.path.join(path, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump(dict(meta, urls=self.urls), f, ensure_ascii=False)
+        for name in self.ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        np.save(os.path.join(path, "terms.npy"), self.terms.data)
+        np.save(os.path.join(path, "term_offsets.npy"), self.terms.offsets)
+
+    @classmethod
+    def read(cls, path):
+        """(segment, meta) dari direktori versi; array di-memory-map"""
+        def mapped(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+
+        with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        segment = cls()
+        for name in cls.ARRAYS:
+            setattr(segment, name, mapped(name))
+        segment.terms = TermDictionary(mapped("terms"), mapped("term_offsets"))
+        segment.urls = meta.pop("urls")
+        return segment, meta
+
+    def document_counts(self, lo, hi):
+        """Jumlah dokumen yang memuat term id lo..hi-1"""
+        return np.diff(self.term_ptr[lo:hi + 1])
+
+    def expand(self, pattern):
+        """Term id yang cocok dengan pola: term biasa, prefix* atau wildcard (*, ?)"""
+        cut = min((pattern.index(c) for c in WILDCARDS if c in pattern), default=-1)
+        if cut < 0:
+            term_id = self.terms.find(pattern)
+            return [] if term_id is None else [term_id]
+        prefix = pattern[:cut]
+        lo, hi = self.terms.prefix_range(prefix)
+        term_ids = np.arange(lo, hi)
+        if pattern.rstrip("*") != prefix:
+            term_ids = term_ids[np.fromiter((fnmatchcase(self.terms[i], pattern) for i in range(lo, hi)),
+                                            dtype=bool, count=hi - lo)]
+        if len(term_ids) > MAX_EXPANSIONS:
+            counts = np.diff(self.term_ptr)[term_ids]
+            term_ids = np.sort(term_ids[np.argpartition(-counts, MAX_EXPANSIONS)[:MAX_EXPANSIONS]])
+        return term_ids.tolist()
+
+    def _occurrences(self, term_ids, doc_id=None):
+        """(doc, posisi, start, end) semua kemunculan term_ids, opsional di satu dokumen saja"""
+        ranges = []
+        for term_id in term_ids:
+            lo, hi = int(self.term_ptr[term_id]), int(self.term_ptr[term_id + 1])
+            if doc_id is not None:
+                # Dokumen dalam satu term terurut, cukup binary search
+                lo += int(np.searchsorted(self.post_docs[lo:hi], doc_id))
+                if lo >= hi or self.post_docs[lo] != doc_id:
+                    continue
+                hi = lo + 1
+            ranges.append((lo, hi))
+        if not ranges:
+            empty = np.empty(0, dtype=np.int32)
+            return empty, empty, empty, empty
+        docs = [np.repeat(self.post_docs[lo:hi], np.diff(self.post_ptr[lo:hi + 1])) for lo, hi in ranges]
+        slices = [slice(int(self.post_ptr[lo]), int(self.post_ptr[hi])) for lo, hi in ranges]
+        return (np.concatenate(docs),
+                np.concatenate([self.positions[s] for s in slices]),
+                np.concatenate([self.starts[s] for s in slices]),
+                np.concatenate([self.ends[s] for s in slices]))
+
+    def clause_matches(self, clause, doc_id=None):
+        """(docs, starts, ends) kemunculan satu clause; frase = term di posisi berurutan"""
+        if self.term_ptr is None:
+            empty = np.empty(0, dtype=np.int32)
+            return empty, empty, empty
+        docs, positions, starts, ends = self._occurrences(self.expand(clause[0]), doc_id)
+        for offset, pattern in enumerate(clause[1:], 1):
+            if not len(docs):
+                break
+            next_docs, next_positions, _, next_ends = self._occurrences(self.expand(pattern), doc_id)
+            keys = (next_docs.astype(np.int64) << 32) | next_positions
+            order = np.argsort(keys)
+            keys = keys[order]
+            wanted = (docs.astype(np.int64) << 32) | (positions + offset)
+            found = np.searchsorted(keys, wanted)
+            hit = found < len(keys)
+            hit[hit] = keys[found[hit]] == wanted[hit]
+            docs, positions, starts = docs[hit], positions[hit], starts[hit]
+            # Akhir frase = akhir term terakhir yang cocok
+            ends = next_ends[order][found[hit]]
+        return docs, starts, ends
+
+    def matching_docs(self, clauses):
+        """Doc id yang cocok dengan semua clause, beserta kemunculan per clause"""
+        matches = [self.clause_matches(clause) for clause in clauses]
+        candidates = np.unique(matches[0][0])
+        for docs, _, _ in matches[1:]:
+            candidates = np.intersect1d(candidates, docs)
+        return candidates, matches
+
+    def contains(self, doc_id, clauses):
+        return bool(clauses) and all(len(self.clause_matches(clause, doc_id)[0]) for clause in clauses)
+
+
+class PositionalIndex(SegmentedIndex):
+    """Positional index semua halaman di cache untuk frase, prefix dan autocomplete.
+
+    Terdiri dari base (PositionalSegment dari build penuh atau disk, di-load
+    dengan memory-map saat pertama kali dipakai) ditambah segment inkremental
+    dari IncrementalIndexer; query dijalankan per bagian lalu digabung dengan
+    doc id global. Merge segment ke base bersifat persis.
+    """
+
+    name = "positional"
+
+    def __init__(self, index_dir=POSITIONAL_DIR):
+        self.index_dir = index_dir
+        self.lock = threading.RLock()
+        self.reset()
+        self.pending_load = True
+
+    def reset(self):
+        self.base = None
+        self.source_version = None
+        self.reset_docs()
+
+    def ensure_loaded(self):
+        """Load index dari disk sekali, saat index pertama kali dipakai"""
+        if self.pending_load:
+            with self.lock:
+                if self.pending_load:
+                    self.load()
+                    self.pending_load = False
+        return self
+
+    @property
+    def is_built(self):
+        self.ensure_loaded()
+        return self.base is not None
+
+    def _set_base(self, base, source_version):
+        with self.lock:
+            self.pending_load = False
+            self.reset()
+            self.base = base
+            self.reset_docs(base.urls)
+            self.source_version = source_version
+
+    def build(self, documents, source_version=None):
+        """Bangun index dari iterable (url, content), di-stream satu kali.
+
+        Halaman tanpa content (near-duplicate) dilewati.
+        """
+        base = PositionalSegment.build(documents)
+        self._set_base(base, source_version)
+        logger.info(f"[INDEX] Built positional index: {len(base.urls)} documents, "
+                    f"{len(base.terms)} terms, {len(base.positions)} positions")
+        return self
+
+    def save(self):
+        """Publikasikan base index ke disk sebagai versi baru (array .npy, di-memory-map saat load).
+
+        Return path versi yang ditulis, None jika gagal.
+        """
+        if not self.is_built:
+            return None
+        try:
+            path = shared_dir.publish(self.index_dir, lambda path: self.base.write(
+                path, {"source_version": self.source_version}))
+            logger.info(f"Positional index saved to {self.index_dir}")
+            return path
+        except Exception as e:
+            logger.error(f"Error saving positional index: {e}")
+            return None
+
+    def load(self, path=None):
+        """Load versi index terbaru (atau versi di path) dari disk jika ada"""
+        path = path or shared_dir.current_dir(self.index_dir)
+        if path is None:
+            return False
+        try:
+            base, meta = PositionalSegment.read(path)
+        except Exception as e:
+            logger.error(f"Error loading positional index: {e}")
+            with self.lock:
+                self.reset()
+            return False
+        self._set_base(base, meta.get("source_version"))
+        logger.info(f"Positional index loaded from {self.index_dir}: {len(base.urls)} documents")
+        return True
+
+    def clear(self):
+        """Hapus index dari memory dan disk"""
+        with self.lock:
+            self.pending_load = False
+            self.reset()
+        shared_dir.clear(self.index_dir)
+
+    def make_segment(self, documents):
+        segment = PositionalSegment.build(documents)
+        return Segment(segment.urls, {url for url, _ in documents}, segment)
+
+    def combine_segments(self, segments):
+        # Dokumen mati ikut disimpan agar doc id global tidak berubah
+        combined = PositionalSegment.merge([(segment.data, np.ones(len(segment.urls), dtype=bool))
+                                            for segment in segments])
+        return Segment(combined.urls, set().union(*(segment.touched for segment in segments)), combined)
+
+    def merged(self, count, live):
+        """Index baru: base + count segment pertama, tanpa dokumen mati (live = snapshot tombstone)"""
+        parts = [(self.base, live[:self.base_docs])]
+        offset = self.base_docs
+        for segment in self.segments[:count]:
+            parts.append((segment.data, live[offset:offset + len(segment.urls)]))
+            offset += len(segment.urls)
+        merged = PositionalIndex(self.index_dir)
+        merged._set_base(PositionalSegment.merge(parts), self.source_version)
+        return merged
+
+    def _parts(self):
+        """Snapshot [(segment, offset doc id global)], live dan urls"""
+        with self.lock:
+            parts = [(self.base, 0)]
+            offset = self.base_docs
+            for segment in self.segments:
+                parts.append((segment.data, offset))
+                offset += len(segment.urls)
+            return parts, self.live, self.urls
+
+    def _locate(self, url):
+        """(segment, doc id lokal) dokumen hidup untuk url, None jika tidak ter-index"""
+        if not self.is_built:
+            return None
+        with self.lock:
+            doc_id = self.url_ids.get(url)
+            if doc_id is None:
+                return None
+            parts, _, _ = self._parts()
+        segment, offset = parts[bisect_right([offset for _, offset in parts], doc_id) - 1]
+        return segment, doc_id - offset
+
+    def expand_query(self, query):
+        """Query sebagai teks biasa: frase tanpa tanda kutip, wildcard diganti term hasil ekspansi"""
+        parts = self._parts()[0] if self.is_built else []
+        words = []
+        for clause in parse_query(query):
+            for pattern in clause:
+                if any(c in pattern for c in WILDCARDS):
+                    terms = set()
+                    for segment, _ in parts:
+                        terms.update(segment.terms[term_id] for term_id in segment.expand(pattern))
+                    words.extend(sorted(terms))
+                else:
+                    words.append(pattern)
+        return " ".join(words)
+
+    def _matching_docs(self, query):
+        """Doc id global dokumen hidup yang cocok dengan semua clause, beserta (docs, starts, ends)"""
+        clauses = parse_query(query)
+        empty = np.empty(0, dtype=np.int64)
+        if not clauses or not self.is_built:
+            return empty, (empty, empty, empty), []
+        parts, live, urls = self._parts()
+        candidates, docs, starts, ends = [empty], [empty], [empty], [empty]
+        for segment, offset in parts:
+            part_candidates, matches = segment.matching_docs(clauses)
+            candidates.append(part_candidates.astype(np.int64) + offset)
+            for match_docs, match_starts, match_ends in matches:
+                docs.append(match_docs.astype(np.int64) + offset)
+                starts.append(match_starts.astype(np.int64))
+                ends.append(match_ends.astype(np.int64))
+        candidates = np.concatenate(candidates)
+        candidates = candidates[live[candidates]]
+        return candidates, (np.concatenate(docs), np.concatenate(starts), np.concatenate(ends)), urls
+
+    def match_urls(self, query):
+        """Set URL dokumen yang cocok dengan semua clause query"""
+        candidates, _, urls = self._matching_docs(query)
+        return {urls[doc] for doc in candidates.tolist()}
+
+    def search(self, query, k=10, urls=None):
+        """Dokumen yang cocok dengan semua clause, urut jumlah kemunculan.
+
+        Return list (url, jumlah kemunculan, spans) dengan spans = offset
+        (start, end) kemunculan di content, urut posisi.
+        """
+        candidates, (docs, starts, ends), index_urls = self._matching_docs(query)
+        if urls is not None:
+            with self.lock:
+                allowed = np.fromiter((self.url_ids[url] for url in urls if url in self.url_ids), dtype=np.int64)
+            candidates = np.intersect1d(candidates, allowed)
+        if candidates.size == 0:
+            return []
+
+        counts = np.bincount(docs, minlength=len(index_urls))[candidates]
+        if k < candidates.size:
+            top = np.argpartition(-counts, k)[:k]
+        else:
+            top = np.arange(candidates.size)
+        top = top[np.lexsort((candidates[top], -counts[top]))]
+
+        top_docs = candidates[top]
+        keep = np.isin(docs, top_docs)
+        docs, starts, ends = docs[keep], starts[keep], ends[keep]
+        order = np.lexsort((starts, docs))
+        spans = {}
+        for doc, start, end in zip(docs[order].tolist(), starts[order].tolist(), ends[order].tolist()):
+            spans.setdefault(doc, []).append((start, end))
+        return [(index_urls[doc], int(count), spans.get(doc, []))
+                for doc, count in zip(top_docs.tolist(), counts[top].tolist())]
+
+    def spans(self, url, query):
+        """Offset (start, end) kemunculan term/frase query di satu dokumen, untuk highlight"""
+        located = self._locate(url)
+        if located is None:
+            return []
+        segment, doc_id = located
+        spans = set()
+        for clause in parse_query(query):
+            _, starts, ends = segment.clause_matches(clause, doc_id)
+            spans.update(zip(starts.tolist(), ends.tolist()))
+        return sorted(spans)
+
+    def contains(self, url, query):
+        """True/False jika dokumen cocok dengan semua clause query, None jika belum ter-index"""
+        located = self._locate(url)
+        if located is None:
+            return None
+        segment, doc_id = located
+        return segment.contains(doc_id, parse_query(query))
+
+    def document_frequency(self, terms):
+        """Jumlah dokumen yang memuat setiap term (persis, tanpa wildcard).
+
+        Seperti suggest, dokumen yang sudah diganti/dihapus masih terhitung
+        sampai segment-nya di-merge.
+        """
+        frequencies = dict.fromkeys(terms, 0)
+        if not self.is_built:
+            return frequencies
+        for segment, _ in self._parts()[0]:
+            for term in terms:
+                term_id = segment.terms.find(term)
+                if term_id is not None:
+                    frequencies[term] += int(segment.document_counts(term_id, term_id + 1)[0])
+        return frequencies
+
+    def term_counts(self, url, terms):
+        """Jumlah kemunculan setiap term (persis, tanpa wildcard) di dokumen url; None jika belum ter-index"""
+        located = self._locate(url)
+        if located is None:
+            return None
+        segment, doc_id = located
+        counts = []
+        for term in terms:
+            term_id = segment.terms.find(term)
+            counts.append(0 if term_id is None else len(segment._occurrences([term_id], doc_id)[0]))
+        return counts
+
+    def suggest(self, text, k=SUGGEST_LIMIT):
+        """Lengkapi kata terakhir text dengan term berawalan sama, urut jumlah dokumen.
+
+        Jumlah dokumen dari segment inkremental masih menghitung dokumen yang
+        sudah diganti/dihapus sampai segment di-merge.
+        """
+        match = re.search(r"\w+$", text)
+        if match is None or not self.is_built:
+            return []
+        head = text[:match.start()]
+        prefix = match.group().lower()
+        parts = self._parts()[0]
+        base = parts[0][0]
+        lo, hi = base.terms.prefix_range(prefix)
+        counts = base.document_counts(lo, hi)
+        top = np.argpartition(-counts, k)[:k] if k < counts.size else np.arange(counts.size)
+        totals = {base.terms[lo + i]: int(counts[i]) for i in top.tolist()}
+        # Term segment dijumlahkan dengan jumlahnya di base (term base di luar top-k juga dihitung)
+        for segment, _ in parts[1:]:
+            segment_lo, segment_hi = segment.terms.prefix_range(prefix)
+            segment_counts = segment.document_counts(segment_lo, segment_hi).tolist()
+            for i, count in enumerate(segment_counts):
+                term = segment.terms[segment_lo + i]
+                if term not in totals:
+                    base_id = base.terms.find(term)
+                    totals[term] = 0 if base_id is None else int(base.document_counts(base_id, base_id + 1)[0])
+                totals[term] += count
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [{"text": head + term, "term": term, "documents": count} for term, count in ranked]
+
+
+def match_text(query, text):
+    """Cocokkan query dengan teks yang belum ter-index (satu dokumen, tokenisasi sama dengan index)"""
+    return PositionalSegment.build([("", text)]).contains(0, parse_query(query))
+
+
+if __name__ == '__main__':
+    # Rebuild positional index dari cache
+    from app import cache_manager, positional_index
+
+    positional_index.build(cache_manager.iter_contents(), cache_manager.cache_version())
+    positional_index.save()
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from crawl_log import logger
+
+# Batas result cache /search di memory
+RESULT_CACHE_ENTRIES = 128
+RESULT_CACHE_BYTES = 32 * 1024 * 1024
+RESULT_CACHE_TTL = 600   # detik
+
+# Direktori spill entri yang terdorong keluar dari memory (None = tanpa spill)
+RESULT_CACHE_DIR = None
+
+# Jumlah hasil pencarian lengkap yang disimpan untuk pagination cursor
+SEARCH_RESULTS_KEPT = 32
+
+
+class ResultCache:
+    """LRU hasil pencarian (JSON ter-encode) dengan batas jumlah entri, ukuran dan TTL.
+
+    Setiap entri dicatat bersama generation cache halaman saat hasil dibuat;
+    entri dengan generation berbeda dianggap basi. Entri yang terdorong keluar
+    dari memory di-spill ke spill_dir jika diset. Generation hanya berlaku
+    dalam satu proses, jadi spill_dir dikosongkan saat start.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_ENTRIES, max_bytes=RESULT_CACHE_BYTES,
+                 ttl=RESULT_CACHE_TTL, spill_dir=RESULT_CACHE_DIR):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.spill_dir = spill_dir
+        self.entries = OrderedDict()  # key -> (generation, expires, body)
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        if spill_dir:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(params):
+        return json.dumps(params, sort_keys=True, ensure_ascii=False)
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, hashlib.sha1(key.encode("utf-8")).hexdigest())
+
+    def get(self, key, generation):
+        """Ambil body hasil untuk key, None jika tidak ada, basi atau kadaluarsa"""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] == generation and entry[1] > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[2]
+                self._discard(key)
+        body = self._load_spilled(key, generation) if self.spill_dir else None
+        with self.lock:
+            if body is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if body is not None:
+            self.put(key, generation, body)
+        return body
+
+    def put(self, key, generation, body):
+        if len(body) > self.max_bytes:
+            return
+        evicted = []
+        with self.lock:
+            self._discard(key)
+            self.entries[key] = (generation, time.monotonic() + self.ttl, body)
+            self.size_bytes += len(body)
+            while len(self.entries) > self.max_entries or self.size_bytes > self.max_bytes:
+                old_key, old_entry = self.entries.popitem(last=False)
+                self.size_bytes -= len(old_entry[2])
+                self.evictions += 1
+                evicted.append((old_key, old_entry))
+        if self.spill_dir:
+            for old_key, old_entry in evicted:
+                self._spill(old_key, old_entry)
+
+    def _discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size_bytes -= len(entry[2])
+
+    def _spill(self, key, entry):
+        generation, expires, body = entry
+        # Sisa TTL disimpan sebagai waktu wall-clock
+        header = {"generation": generation, "expires": time.time() + expires - time.monotonic()}
+        try:
+            with open(self._spill_path(key), 'wb') as f:
+                f.write(json.dumps(header).encode("utf-8") + b"\n" + body)
+        except OSError as e:
+            logger.error(f"Error spilling result cache entry: {e}")
+
+    def _load_spilled(self, key, generation):
+        path = self._spill_path(key)
+        try:
+            with open(path, 'rb') as f:
+                header = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        # Entri disk dipakai sekali lalu kembali ke memory
+        os.remove(path)
+        if header["generation"] != generation or header["expires"] <= time.time():
+            return None
+        return body
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size_bytes = 0
+        if self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "size_mb": self.size_bytes / 1024 / 1024,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "spilled_entries": len(os.listdir(self.spill_dir)) if self.spill_dir else 0
+            }
+
+
+class SearchResultStore:
+    """LRU hasil pencarian lengkap (objek Python) untuk endpoint pagination.
+
+    Response /search hanya berisi halaman pertama; sisa hits, links dan log
+    diambil per halaman dengan search_id dari store ini sampai entri
+    terdorong keluar atau kadaluarsa.
+    """
+
+    def __init__(self, max_results=SEARCH_RESULTS_KEPT, ttl=RESULT_CACHE_TTL):
+        self.max_results = max_results
+        self.ttl = ttl
+        self.results = OrderedDict()  # search_id -> (expires, result)
+        self.lock = threading.Lock()
+
+    def add(self, result, search_id=None):
+        """Simpan hasil; search_id lama dipakai lagi jika diberikan (hasil dipulihkan dari result cache)"""
+        search_id = search_id or uuid.uuid4().hex[:12]
+        with self.lock:
+            self.results[search_id] = (time.monotonic() + self.ttl, result)
+            while len(self.results) > self.max_results:
+                self.results.popitem(last=False)
+        return search_id
+
+    def get(self, search_id):
+        with self.lock:
+            entry = self.results.get(search_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.results[search_id]
+                return None
+            self.results.move_to_end(search_id)
+            return entry[1]
+
+    def clear(self):
+        with self.lock:
+            self.results.clear()
@@ -0,0 +1,480 @@
+import json
+import os
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+import shared_dir
+from crawl_log import logger
+from indexer import Segment, SegmentedIndex
+
+# Direktori untuk menyimpan index TF-IDF korpus
+INDEX_DIR = "crawl_index"
+
+
+def tfidf_vectorizer(**options):
+    # scikit-learn (dan scipy) di-import saat pertama dipakai agar import app tetap cepat
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    return TfidfVectorizer(stop_words='english', **options)
+
+
+class SearchIndex(SegmentedIndex):
+    """Index TF-IDF tingkat korpus untuk semua halaman di cache.
+
+    Menyimpan satu vocabulary/IDF hasil fit, matriks dokumen-term (CSR) dan
+    posting list per term (CSC). Query cukup di-vectorize sekali lalu diskor
+    terhadap semua dokumen dengan satu sparse product. Index tersimpan baru
+    di-load dari disk saat pertama kali dipakai.
+
+    Halaman baru masuk sebagai segment (baris CSR yang di-vectorize dengan
+    vocabulary/IDF base) lewat IncrementalIndexer. Perubahan IDF baru
+    terlihat setelah fit ulang; sampai saat itu term query di luar
+    vocabulary diberi IDF dari document frequency di term_index (positional
+    index) dan dokumen yang memuatnya diskor dari term frequency di sana.
+    """
+
+    name = "index"
+    exact_merge = False
+
+    def __init__(self, index_dir=INDEX_DIR, query_cache_size=32):
+        self.index_dir = index_dir
+        self.query_cache_size = query_cache_size
+        self.lock = threading.RLock()
+        # Index dengan term dictionary lengkap (positional index): document/term frequency term di luar vocabulary
+        self.term_index = None
+        self.reset()
+        self.pending_load = True
+
+    def reset(self):
+        """Kosongkan index di memory"""
+        self.vectorizer = None
+        self.doc_term = None  # CSR: baris = dokumen, kolom = term
+        self.postings = None  # CSC: kolom = posting list satu term
+        self.source_version = None
+        # Jumlah dokumen saat vocabulary/IDF di-fit
+        self.fitted_docs = 0
+        self.reset_docs()
+        self._query_cache = OrderedDict()
+        self._vocabulary_terms = None  # (vectorizer, term per kolom)
+
+    def ensure_loaded(self):
+        """Load index dari disk sekali, saat index pertama kali dipakai"""
+        if self.pending_load:
+            with self.lock:
+                if self.pending_load:
+                    self.load()
+                    self.pending_load = False
+        return self
+
+    @property
+    def is_built(self):
+        self.ensure_loaded()
+        return self.vectorizer is not None and self.doc_term is not None
+
+    def build(self, documents, source_version=None):
+        """Fit vocabulary/IDF sekali untuk seluruh halaman di cache.
+
+        documents: iterable (url, content), di-stream satu kali.
+        """
+        urls = []
+
+        def texts():
+            for url, content in documents:
+                if content:
+                    urls.append(url)
+                    yield content
+
+        vectorizer = tfidf_vectorizer(dtype=np.float32)
+        try:
+            doc_term = vectorizer.fit_transform(texts())
+        except ValueError as e:
+            # Vocabulary kosong (misalnya semua stop words)
+            logger.error(f"Error building search index: {e}")
+            doc_term = vectorizer = None
+
+        with self.lock:
+            # Index baru menggantikan index tersimpan yang belum sempat di-load
+            self.pending_load = False
+            self.reset()
+            if vectorizer is None:
+                return self
+            self.vectorizer = vectorizer
+            self._set_base(urls, doc_term.tocsr(), source_version)
+            self.fitted_docs = len(urls)
+        logger.info(f"[INDEX] Built TF-IDF index: {len(urls)} documents, {len(vectorizer.vocabulary_)} terms")
+        return self
+
+    def _set_base(self, urls, doc_term, source_version):
+        # Index tersimpan di-mmap read-only, jadi urutkan sekarang (bukan in-place saat query)
+        doc_term.sort_indices()
+        self.reset_docs(urls)
+        self.doc_term = doc_term
+        self.postings = doc_term.tocsc()
+        self.source_version = source_version
+
+    def save(self):
+        """Publikasikan base index ke disk sebagai versi baru (vocabulary, IDF, CSR dan posting list).
+
+        Matriks disimpan sebagai array .npy terpisah agar bisa di-memory-map
+        read-only oleh semua worker (dibagi lewat page cache OS). Return path
+        versi yang ditulis, None jika gagal.
+        """
+        if not self.is_built:
+            return None
+
+        def write(path):
+            vocabulary = {term: int(i) for term, i in self.vectorizer.vocabulary_.items()}
+            with open(os.path.join(path, "vocabulary.json"), 'w', encoding='utf-8') as f:
+                json.dump(vocabulary, f, ensure_ascii=False)
+            with open(os.path.join(path, "meta.json"), 'w', encoding='utf-8') as f:
+                json.dump({
+                    "urls": self.urls[:self.base_docs],
+                    "source_version": self.source_version,
+                    "shape": list(self.doc_term.shape),
+                    "fitted_docs": self.fitted_docs
+                }, f, ensure_ascii=False)
+            np.save(os.path.join(path, "idf.npy"), self.vectorizer.idf_)
+            for name, matrix in (("doc_term", self.doc_term), ("postings", self.postings)):
+                for part in ("data", "indices", "indptr"):
+                    np.save(os.path.join(path, f"{name}_{part}.npy"), getattr(matrix, part))
+
+        try:
+            path = shared_dir.publish(self.index_dir, write)
+            logger.info(f"Search index saved to {self.index_dir}")
+            return path
+        except Exception as e:
+            logger.error(f"Error saving search index: {e}")
+            return None
+
+    def load(self, path=None):
+        """Load versi index terbaru (atau versi di path) dari disk jika ada (array matriks di-memory-map)"""
+        path = path or shared_dir.current_dir(self.index_dir)
+        if path is None:
+            return False
+        from scipy import sparse
+
+        def mapped(name, shape, matrix_class):
+            parts = [np.load(os.path.join(path, f"{name}_{part}.npy"), mmap_mode='r')
+                     for part in ("data", "indices", "indptr")]
+            return matrix_class(tuple(parts), shape=shape, copy=False)
+
+        try:
+            with open(os.path.join(path, "meta.json"), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(os.path.join(path, "vocabulary.json"), 'r', encoding='utf-8') as f:
+                vocabulary = json.load(f)
+            vectorizer = tfidf_vectorizer(dtype=np.float32, vocabulary=vocabulary)
+            vectorizer.idf_ = np.load(os.path.join(path, "idf.npy"))
+            shape = tuple(meta["shape"])
+            doc_term = mapped("doc_term", shape, sparse.csr_matrix)
+            postings = mapped("postings", shape, sparse.csc_matrix)
+        except Exception as e:
+            logger.error(f"Error loading search index: {e}")
+            with self.lock:
+                self.reset()
+            return False
+
+        with self.lock:
+            self.reset()
+            self.vectorizer = vectorizer
+            self.reset_docs(meta["urls"])
+            self.doc_term = doc_term
+            self.postings = postings
+            self.source_version = meta.get("source_version")
+            self.fitted_docs = meta.get("fitted_docs", len(self.urls))
+        return True
+
+    def clear(self):
+        """Hapus index dari memory dan disk"""
+        with self.lock:
+            self.pending_load = False
+            self.reset()
+        shared_dir.clear(self.index_dir)
+
+    def make_segment(self, documents):
+        """Segment dari (url, content) memakai vocabulary/IDF base; None jika base belum ada"""
+        if not self.is_built:
+            return None
+        urls = [url for url, content in documents if content]
+        rows = None
+        if urls:
+            rows = self.vectorizer.transform([content for _, content in documents if content]).tocsr()
+            rows.sort_indices()
+        return Segment(urls, {url for url, _ in documents}, rows)
+
+    def combine_segments(self, segments):
+        from scipy import sparse
+        rows = [segment.data for segment in segments if segment.data is not None]
+        return Segment([url for segment in segments for url in segment.urls],
+                       set().union(*(segment.touched for segment in segments)),
+                       sparse.vstack(rows, format='csr') if rows else None)
+
+    def merged(self, count, live):
+        """Index baru: base + count segment pertama, tanpa dokumen mati (live = snapshot tombstone)"""
+        from scipy import sparse
+        segments = self.segments[:count]
+        rows = [self.doc_term] + [segment.data for segment in segments if segment.data is not None]
+        size = self.base_docs + sum(len(segment.urls) for segment in segments)
+        keep = np.flatnonzero(live[:size])
+        merged = SearchIndex(self.index_dir, self.query_cache_size)
+        merged.pending_load = False
+        merged.vectorizer = self.vectorizer
+        merged._set_base([self.urls[i] for i in keep.tolist()],
+                         sparse.vstack(rows, format='csr')[keep], self.source_version)
+        merged.fitted_docs = self.fitted_docs
+        return merged
+
+    def replay(self, segment):
+        with self.lock:
+            super().replay(segment)
+            self._query_cache.clear()
+
+    def compact_segments(self):
+        with self.lock:
+            super().compact_segments()
+            self._query_cache.clear()
+
+    def query_scores(self, keyword):
+        """Cosine similarity query terhadap semua dokumen (base + segment); dokumen mati bernilai 0"""
+        result = self._query_scores(keyword)
+        return None if result is None else result[0]
+
+    def _query_scores(self, keyword):
+        """(skor, base_revision saat skor dihitung); None jika index belum ada.
+
+        Bagian vocabulary diskor dengan satu sparse product di bawah lock.
+        Dokumen yang memuat term di luar vocabulary diskor ulang setelah lock
+        dilepas (lihat _score_new_terms), jadi pencarian lain tidak menunggu.
+        """
+        if not self.is_built:
+            return None
+        with self.lock:
+            cached = self._query_cache.get(keyword)
+            if cached is not None:
+                self._query_cache.move_to_end(keyword)
+                return cached
+
+            revision, base_revision = self.revision, self.base_revision
+            missing = self.missing_terms(keyword) if self.term_index is not None else None
+            if missing:
+                # Norm query ikut memperhitungkan term baru, seperti score_text
+                query = self.transform([keyword], missing)
+                vocabulary_size = len(self.vectorizer.idf_)
+                new_weights = query[:, vocabulary_size:].toarray().ravel()
+                query = query[:, :vocabulary_size]
+            else:
+                query = self.vectorizer.transform([keyword])
+            if query.nnz:
+                # Hanya posting list dari term yang ada di query yang disentuh
+                parts = [self.postings[:, query.indices] @ query.data]
+                parts.extend(segment.data[:, query.indices] @ query.data
+                             for segment in self.segments if segment.data is not None)
+                scores = np.concatenate([np.asarray(part, dtype=np.float32).ravel() for part in parts])
+                if self.dead_docs:
+                    scores[~self.live] = 0
+            else:
+                scores = np.zeros(len(self.urls), dtype=np.float32)
+
+        if missing:
+            self._score_new_terms(scores, missing, new_weights, base_revision)
+
+        with self.lock:
+            # Index berubah selama skor dihitung: hasil tetap dipakai pemanggil, tapi tidak di-cache
+            if self.revision == revision:
+                self._query_cache[keyword] = (scores, base_revision)
+                if len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+        return scores, base_revision
+
+    def _score_new_terms(self, scores, terms, query_weights, base_revision):
+        """Skor ulang (in-place) dokumen yang memuat term di luar vocabulary.
+
+        Bobot term baru = term frequency di term_index x extra_idf. Baris
+        TF-IDF dokumen ternormalisasi terhadap bagian vocabulary saja; norm
+        itu dipulihkan dari term frequency satu term di barisnya, sehingga
+        hasilnya cosine dengan vektor dokumen lengkap tanpa membaca content.
+        """
+        urls = set()
+        for term in terms:
+            urls.update(self.term_index.match_urls(term))
+        rows = self._document_rows(urls, base_revision)
+        if not rows:
+            return
+        idf = self.extra_idf(terms)
+        corpus_idf = self.vectorizer.idf_
+        vocabulary_terms = self._column_terms()
+        for url, (doc_id, columns, weights) in rows.items():
+            counts = self.term_index.term_counts(url, terms)
+            if doc_id >= len(scores) or counts is None:
+                continue
+            new_weights = np.asarray(counts, dtype=np.float64) * idf
+            corpus_norm = 0.0
+            if len(columns):
+                # weights[j] = tf_j x idf_j / norm
+                j = int(np.argmax(weights))
+                tf = self.term_index.term_counts(url, [vocabulary_terms[columns[j]]])
+                if not tf or not tf[0]:
+                    continue
+                corpus_norm = tf[0] * corpus_idf[columns[j]] / weights[j]
+            norm = np.sqrt(corpus_norm ** 2 + new_weights @ new_weights)
+            if norm:
+                scores[doc_id] = (corpus_norm * scores[doc_id] + new_weights @ query_weights) / norm
+
+    def _document_rows(self, urls, base_revision):
+        """{url: (doc id, kolom, bobot)} baris TF-IDF dokumen hidup; kosong jika base sudah diganti"""
+        rows = {}
+        with self.lock:
+            if self.base_revision != base_revision:
+                return rows
+            starts = [self.base_docs]
+            for segment in self.segments:
+                starts.append(starts[-1] + len(segment.urls))
+            for url in urls:
+                doc_id = self.url_ids.get(url)
+                if doc_id is None:
+                    continue
+                if doc_id < self.base_docs:
+                    matrix, row = self.doc_term, doc_id
+                else:
+                    i = bisect_right(starts, doc_id) - 1
+                    matrix, row = self.segments[i].data, doc_id - starts[i]
+                lo, hi = int(matrix.indptr[row]), int(matrix.indptr[row + 1])
+                rows[url] = (doc_id, np.asarray(matrix.indices[lo:hi]), np.asarray(matrix.data[lo:hi]))
+        return rows
+
+    def _column_terms(self):
+        """Term per kolom vocabulary, dibuat sekali per vectorizer"""
+        vectorizer = self.vectorizer
+        cached = self._vocabulary_terms
+        if cached is None or cached[0] is not vectorizer:
+            terms = [None] * len(vectorizer.vocabulary_)
+            for term, column in vectorizer.vocabulary_.items():
+                terms[column] = term
+            cached = self._vocabulary_terms = (vectorizer, terms)
+        return cached[1]
+
+    @contextmanager
+    def locked_scores(self, keyword):
+        """Skor query (dihitung tanpa lock), lalu lock index dipegang selama blok with.
+
+        Base di dalam blok sama dengan saat skor dihitung, jadi doc id
+        < len(scores) merujuk ke dokumen yang sama; dokumen yang masuk
+        setelahnya belum punya skor. Yield None jika index belum ada.
+        """
+        while True:
+            result = self._query_scores(keyword)
+            self.lock.acquire()
+            if result is None or result[1] == self.base_revision:
+                break
+            # Base diganti (merge/load) selama skor dihitung: doc id berubah, hitung ulang
+            self.lock.release()
+        try:
+            yield None if result is None else result[0]
+        finally:
+            self.lock.release()
+
+    def score(self, url, keyword):
+        """Skor satu URL dari index, None jika URL belum ter-index"""
+        self.ensure_loaded()
+        if url not in self.url_ids:
+            return None
+        with self.locked_scores(keyword) as scores:
+            doc_id = self.url_ids.get(url)
+            if scores is None or doc_id is None or doc_id >= len(scores):
+                return None
+            return float(scores[doc_id])
+
+    def missing_terms(self, keyword):
+        """Term keyword yang tidak ada di vocabulary hasil fit (semua term jika index belum ada)"""
+        if not self.is_built:
+            return None
+        vocabulary = self.vectorizer.vocabulary_
+        return sorted({term for term in self.vectorizer.build_analyzer()(keyword) if term not in vocabulary})
+
+    def extra_idf(self, terms):
+        """IDF term di luar vocabulary dari document frequency korpus.
+
+        Rumusnya sama dengan TfidfVectorizer (smooth_idf) atas jumlah dokumen
+        hidup, sehingga bobotnya sebanding dengan IDF hasil fit.
+        """
+        frequencies = self.term_index.document_frequency(terms) if self.term_index is not None else {}
+        count = self.document_count
+        # Positional index masih menghitung dokumen mati sampai merge
+        df = np.minimum([frequencies.get(term, 0) for term in terms], count)
+        return np.log((1 + count) / (1 + df)) + 1
+
+    def transform(self, texts, extra_terms=()):
+        """Vektor TF-IDF (baris ter-normalisasi L2) dengan vocabulary/IDF korpus.
+
+        extra_terms (term di luar vocabulary) menjadi kolom tambahan setelah
+        kolom vocabulary, dengan IDF dari extra_idf; tidak ada fit ulang.
+        """
+        from scipy import sparse
+        from sklearn.feature_extraction.text import CountVectorizer
+        from sklearn.preprocessing import normalize
+        texts = list(texts)
+        # Bobot tf x idf sebelum normalisasi, agar kolom tambahan ikut dinormalisasi
+        weights = sparse.csr_matrix(CountVectorizer.transform(self.vectorizer, texts).multiply(self.vectorizer.idf_))
+        if extra_terms:
+            analyzer = self.vectorizer.build_analyzer()
+            columns = {term: i for i, term in enumerate(extra_terms)}
+            counts = np.zeros((len(texts), len(extra_terms)), dtype=np.float32)
+            for row, text in enumerate(texts):
+                for term in analyzer(text):
+                    column = columns.get(term)
+                    if column is not None:
+                        counts[row, column] += 1
+            weights = sparse.hstack([weights, sparse.csr_matrix(counts * self.extra_idf(extra_terms))], format='csr')
+        return normalize(weights, copy=False)
+
+    def score_text(self, content, keyword):
+        """Skor teks yang belum ter-index memakai IDF korpus.
+
+        Term keyword di luar vocabulary korpus diberi IDF dari document
+        frequency-nya di korpus (lihat transform); dengan vocabulary saja
+        term itu selalu bernilai 0 walaupun ada di teks.
+        """
+        if self.is_built:
+            missing = self.missing_terms(keyword)
+            vectors = self.transform([content, keyword], missing) if missing else \
+                self.vectorizer.transform([content, keyword])
+            return float(vectors[0].multiply(vectors[1]).sum())
+        # Belum ada korpus, fit pada dokumen dan keyword saja
+        vectorizer = tfidf_vectorizer()
+        vectors = vectorizer.fit_transform([content, keyword])
+        return float(vectors[0].multiply(vectors[1]).sum())
+
+    def top_k(self, keyword, k=10, urls=None):
+        """Ambil k dokumen dengan skor tertinggi, opsional dibatasi ke kumpulan URL"""
+        with self.locked_scores(keyword) as scores:
+            if scores is None:
+                return []
+            if urls is not None:
+                doc_ids = np.fromiter(
+                    (self.url_ids[url] for url in urls if url in self.url_ids), dtype=np.int64
+                )
+                doc_ids = doc_ids[doc_ids < len(scores)]
+            else:
+                doc_ids = np.arange(len(scores))
+            index_urls = self.urls
+        if doc_ids.size == 0:
+            return []
+
+        candidate_scores = scores[doc_ids]
+        if k < doc_ids.size:
+            top = np.argpartition(-candidate_scores, k)[:k]
+        else:
+            top = np.arange(doc_ids.size)
+        top = top[np.argsort(-candidate_scores[top])]
+        return [(index_urls[doc_ids[i]], float(candidate_scores[i])) for i in top if candidate_scores[i] > 0]
+
+
+if __name__ == '__main__':
+    # Rebuild index dari crawl_cache.json
+    from app import cache_manager, search_index
+
+    search_index.build(cache_manager.iter_contents(), cache_manager.cache_version())
+    search_index.save()
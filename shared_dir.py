@@ -0,0 +1,125 @@
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: tanpa lock antar proses
+    fcntl = None
+
+# Pointer ke direktori versi yang sedang dipakai
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+
+
+# Direktori yang lock-nya sedang dipegang thread ini (file_lock reentrant)
+_held = threading.local()
+
+
+@contextmanager
+def file_lock(directory):
+    """Lock eksklusif antar proses (flock) untuk direktori yang dipakai bersama worker.
+
+    Reentrant di thread yang sama: pemegang lock boleh memanggil fungsi yang
+    mengambil lock yang sama (misalnya save -> publish).
+    """
+    key = os.path.abspath(directory)
+    held = getattr(_held, "directories", None)
+    if held is None:
+        held = _held.directories = set()
+    if key in held:
+        yield
+        return
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK_FILE), 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        held.add(key)
+        try:
+            yield
+        finally:
+            held.discard(key)
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def current_dir(directory):
+    """Direktori versi yang sedang dipublikasikan, None jika belum ada"""
+    try:
+        with open(os.path.join(directory, CURRENT_FILE), 'r', encoding='utf-8') as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    path = os.path.join(directory, name)
+    return path if name and os.path.isdir(path) else None
+
+
+def _version_time(name):
+    """Waktu publikasi dari nama versi v<time_ns>-<pid>, None untuk nama lain"""
+    try:
+        return int(name[1:].split("-", 1)[0]) if name.startswith("v") else None
+    except ValueError:
+        return None
+
+
+def publish(directory, write):
+    """Tulis versi baru lewat write(path), lalu ganti pointer CURRENT secara atomik.
+
+    Reader tidak pernah melihat versi yang setengah ditulis. Isi versi
+    ditulis tanpa lock; nama versi, rename, pointer CURRENT dan penghapusan
+    versi lama dilakukan di bawah file_lock, jadi versi yang dipublikasikan
+    selalu yang terbaru dan hanya versi yang lebih lama yang dihapus. Worker
+    yang masih me-mmap file versi lama tetap aman karena file yang sudah
+    dibuka baru hilang setelah ditutup.
+    """
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, f"write-{time.time_ns()}-{os.getpid()}-{threading.get_ident()}.tmp")
+    os.makedirs(tmp_path)
+    try:
+        write(tmp_path)
+        with file_lock(directory):
+            name = f"v{time.time_ns()}-{os.getpid()}"
+            path = os.path.join(directory, name)
+            os.rename(tmp_path, path)
+            pointer_tmp = os.path.join(directory, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+            with open(pointer_tmp, 'w', encoding='utf-8') as f:
+                f.write(name)
+            os.replace(pointer_tmp, os.path.join(directory, CURRENT_FILE))
+            _prune(directory, _version_time(name))
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    return path
+
+
+def _prune(directory, published):
+    """Hapus versi yang lebih lama dari published dan file format lama (file_lock dipegang)"""
+    for entry in os.listdir(directory):
+        # .tmp: versi atau pointer yang sedang ditulis proses lain
+        if entry in (CURRENT_FILE, LOCK_FILE) or entry.endswith(".tmp"):
+            continue
+        version = _version_time(entry)
+        if version is not None and version >= published:
+            continue
+        entry_path = os.path.join(directory, entry)
+        if os.path.isdir(entry_path):
+            shutil.rmtree(entry_path, ignore_errors=True)
+        else:
+            os.remove(entry_path)
+
+
+def clear(directory):
+    """Hapus semua versi dan pointer (lock file dibiarkan)"""
+    if not os.path.isdir(directory):
+        return
+    with file_lock(directory):
+        for entry in os.listdir(directory):
+            if entry == LOCK_FILE:
+                continue
+            path = os.path.join(directory, entry)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
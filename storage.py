@@ -0,0 +1,562 @@
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import zlib
+from collections.abc import Mapping
+from contextlib import contextmanager
+
+from crawl_log import configure_logging, logger
+from urlnorm import canonicalize, in_scope
+
+# Level kompresi zlib untuk isi halaman
+COMPRESSION_LEVEL = 6
+
+# Snapshot biner metadata halaman di samping database (load cepat saat start)
+SNAPSHOT_ENABLED = True
+SNAPSHOT_SUFFIX = ".snapshot"
+
+# Lama menunggu lock tulis proses worker lain (detik) sebelum flush gagal
+BUSY_TIMEOUT = 30
+# Ukuran mmap SQLite (byte)
+SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+
+
+def compress_text(text):
+    return zlib.compress(text.encode('utf-8'), COMPRESSION_LEVEL)
+
+
+def decompress_text(value):
+    # Baris lama (sebelum kompresi) masih tersimpan sebagai TEXT
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode('utf-8')
+    return value or ""
+
+
+def compact_metadata(record):
+    """Metadata ringkas yang disimpan di memory (tanpa isi halaman)"""
+    return {
+        "title": sys.intern(record["title"]) if record.get("title") else record.get("title"),
+        "links": tuple(sys.intern(link) for link in record.get("links", ())),
+        "timestamp": record.get("timestamp"),
+        "content_length": record.get("content_length", 0),
+        "etag": record.get("etag"),
+        "last_modified": record.get("last_modified"),
+        "simhash": record.get("simhash"),
+        "duplicate_of": record.get("duplicate_of")
+    }
+
+
+def _to_signed64(value):
+    # SQLite INTEGER bertanda 64-bit; SimHash disimpan dalam bentuk two's complement
+    return value - (1 << 64) if value is not None and value >= 1 << 63 else value
+
+
+def _from_signed64(value):
+    return value + (1 << 64) if value is not None and value < 0 else value
+
+
+class CachedPage(Mapping):
+    """View satu halaman di cache; content baru di-load saat diakses"""
+
+    __slots__ = ("url", "meta", "_loader")
+
+    def __init__(self, url, meta, loader):
+        self.url = url
+        self.meta = meta
+        self._loader = loader
+
+    def __getitem__(self, key):
+        if key == "content":
+            return self._loader(self.url)
+        return self.meta[key]
+
+    def __iter__(self):
+        yield "content"
+        yield from self.meta
+
+    def __len__(self):
+        return len(self.meta) + 1
+
+
+class JsonStore:
+    """Backend lama: seluruh cache dalam satu file JSON yang ditulis ulang saat flush.
+
+    Hanya untuk satu proses; generation dan epoch dihitung di memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.data = {"urls": {}, "metadata": {}}
+        self.dirty = False
+        self.epoch = 0
+        self.generation = 0
+
+    def load_all(self):
+        """Load semua halaman lengkap (dengan content) dari file JSON"""
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except Exception as e:
+                logger.error(f"Error loading cache: {e}")
+                self.data = {"urls": {}, "metadata": {}}
+        self.data.setdefault("urls", {})
+        self.data.setdefault("metadata", {})
+        return self.data
+
+    def save_snapshot(self, urls, epoch, generation):
+        # File JSON sudah menjadi sumber tunggal, tidak perlu snapshot
+        pass
+
+    def state(self):
+        return self.epoch, self.generation
+
+    def changes_since(self, generation):
+        # Tidak ada writer lain: perubahan sudah ada di memory proses ini
+        return {"urls": {}, "deleted": [], "metadata": dict(self.data["metadata"]),
+                "epoch": self.epoch, "generation": self.generation}
+
+    def is_pending(self, url):
+        return False
+
+    def load(self):
+        """Load metadata halaman; content tetap di store dan diambil lewat get_content"""
+        data = self.load_all()
+        return {
+            "urls": {url: compact_metadata(record) for url, record in data["urls"].items()},
+            "metadata": dict(data["metadata"]),
+            "epoch": self.epoch,
+            "generation": self.generation
+        }
+
+    def get_content(self, url):
+        record = self.data["urls"].get(url)
+        return record.get("content", "") if record else ""
+
+    def iter_contents(self):
+        for url, record in self.data["urls"].items():
+            yield url, record.get("content", "")
+
+    def iter_records(self):
+        for url, record in self.data["urls"].items():
+            yield url, dict(record, content=record.get("content", ""))
+
+    def put(self, url, record):
+        self.data["urls"][url] = record
+        self.dirty = True
+
+    def touch(self, url, timestamp):
+        record = self.data["urls"].get(url)
+        if record is not None:
+            record["timestamp"] = timestamp
+            self.dirty = True
+
+    def delete(self, url):
+        if self.data["urls"].pop(url, None) is not None:
+            self.dirty = True
+
+    def set_metadata(self, metadata):
+        self.data["metadata"] = metadata
+        self.dirty = True
+
+    def flush(self):
+        """Tulis ulang file secara atomik (tulis ke file sementara lalu rename)"""
+        if not self.dirty:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+        self.generation += 1
+
+    def clear(self):
+        self.data = {"urls": {}, "metadata": {}}
+        self.dirty = False
+        self.epoch += 1
+        self.generation += 1
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def size_bytes(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def close(self):
+        self.flush()
+
+
+class SqliteStore:
+    """Backend SQLite (WAL) yang aman dipakai bersama beberapa proses worker.
+
+    Satu writer, banyak reader: penulisan dibuffer di memory lalu ditulis per
+    batch dalam satu transaksi pendek (BEGIN IMMEDIATE). Lock tulis hanya
+    ditahan selama flush, dan writer lain menunggu sampai BUSY_TIMEOUT
+    alih-alih gagal. Jika flush gagal, buffer tetap disimpan untuk flush
+    berikutnya.
+
+    Setiap flush menaikkan generation di tabel state dan menandai baris yang
+    ditulis dengan generation itu, sehingga worker lain cukup mengambil
+    changes_since(generation) tanpa load ulang semuanya; halaman yang dihapus
+    dicatat di tabel deleted_pages (tombstone) dengan generation yang sama.
+    clear() menaikkan
+    epoch. Snapshot pickle metadata (path + SNAPSHOT_SUFFIX) mencatat epoch
+    dan generation-nya; baris yang lebih baru diambil dari tabel pages.
+    """
+
+    def __init__(self, path, batch_size=50):
+        self.path = path
+        self.batch_size = batch_size
+        self.lock = threading.RLock()
+        self.pending_pages = {}  # url -> baris yang belum ditulis
+        self.pending_touches = {}  # url -> timestamp
+        self.pending_deletes = set()
+        self.pending_metadata = None
+        self.snapshot_state = None  # (epoch, generation) snapshot yang terakhir ditulis/dibaca
+        # Transaksi diatur manual (isolation_level=None) agar tulis memakai BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=BUSY_TIMEOUT, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # Halaman database dibaca lewat mmap: dibagi antar worker lewat page cache OS
+        self.conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        with self.transaction():
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    title TEXT,
+                    content BLOB,
+                    links TEXT,
+                    timestamp TEXT,
+                    content_length INTEGER,
+                    etag TEXT,
+                    last_modified TEXT,
+                    simhash INTEGER,
+                    duplicate_of TEXT,
+                    generation INTEGER DEFAULT 0
+                )
+            """)
+            self.conn.execute("CREATE TABLE IF NOT EXISTS deleted_pages (url TEXT PRIMARY KEY, generation INTEGER)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER)")
+            self.conn.execute("INSERT OR IGNORE INTO state (key, value) VALUES ('epoch', 0), ('generation', 0)")
+            # Database lama belum punya kolom validator HTTP, fingerprint duplikat dan generation
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(pages)")}
+            for column, column_type in (("etag", "TEXT"), ("last_modified", "TEXT"),
+                                        ("simhash", "INTEGER"), ("duplicate_of", "TEXT"),
+                                        ("generation", "INTEGER DEFAULT 0")):
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE pages ADD COLUMN {column} {column_type}")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS pages_generation ON pages (generation)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS deleted_pages_generation ON deleted_pages (generation)")
+
+    @contextmanager
+    def transaction(self):
+        """Transaksi tulis; BEGIN IMMEDIATE mengambil lock tulis di awal (menunggu writer lain)"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    @property
+    def snapshot_path(self):
+        return self.path + SNAPSHOT_SUFFIX
+
+    def _read_state(self):
+        state = dict(self.conn.execute("SELECT key, value FROM state"))
+        return state["epoch"], state["generation"]
+
+    def state(self):
+        """(epoch, generation) store saat ini; query kecil untuk deteksi perubahan dari worker lain"""
+        with self.lock:
+            return self._read_state()
+
+    def changes_since(self, generation):
+        """Metadata halaman dengan generation > generation, URL yang dihapus, plus epoch/generation dan metadata store"""
+        data = {"urls": {}, "deleted": [], "metadata": {}}
+        with self.lock:
+            # Satu read transaction: state dan baris dari snapshot database yang sama
+            self.conn.execute("BEGIN")
+            try:
+                data["epoch"], data["generation"] = self._read_state()
+                rows = self.conn.execute(
+                    "SELECT url, title, links, timestamp, content_length, etag, last_modified, simhash, duplicate_of "
+                    "FROM pages WHERE generation > ?", (generation,)
+                )
+                for url, title, links, timestamp, content_length, etag, last_modified, simhash, duplicate_of in rows:
+                    data["urls"][url] = compact_metadata({
+                        "title": title,
+                        "links": json.loads(links) if links else [],
+                        "timestamp": timestamp,
+                        "content_length": content_length,
+                        "etag": etag,
+                        "last_modified": last_modified,
+                        "simhash": _from_signed64(simhash),
+                        "duplicate_of": duplicate_of
+                    })
+                data["deleted"] = [row[0] for row in self.conn.execute(
+                    "SELECT url FROM deleted_pages WHERE generation > ?", (generation,)
+                )]
+                for key, value in self.conn.execute("SELECT key, value FROM metadata"):
+                    data["metadata"][key] = json.loads(value)
+            finally:
+                self.conn.execute("COMMIT")
+        return data
+
+    def save_snapshot(self, urls, epoch, generation):
+        """Tulis snapshot metadata halaman yang mencakup semua baris sampai generation"""
+        if not SNAPSHOT_ENABLED or self.snapshot_state == (epoch, generation):
+            return
+        # Nama file sementara unik per proses; rename atomik menggantikan snapshot lama
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({"epoch": epoch, "generation": generation, "urls": dict(urls)},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.snapshot_path)
+            self.snapshot_state = (epoch, generation)
+        except Exception as e:
+            logger.error(f"Error saving cache snapshot: {e}")
+
+    def _load_snapshot(self):
+        if not SNAPSHOT_ENABLED or not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = pickle.load(f)
+            return snapshot if "generation" in snapshot else None
+        except Exception as e:
+            logger.error(f"Error loading cache snapshot: {e}")
+            return None
+
+    def load(self):
+        """Load metadata semua halaman dari snapshot + perubahan setelahnya; content tetap di disk"""
+        snapshot = self._load_snapshot()
+        if snapshot is not None:
+            data = self.changes_since(snapshot["generation"])
+            # Epoch berbeda: cache sudah dikosongkan setelah snapshot dibuat
+            if data["epoch"] == snapshot["epoch"]:
+                self.snapshot_state = (snapshot["epoch"], snapshot["generation"])
+                urls = snapshot["urls"]
+                for url in data.pop("deleted"):
+                    urls.pop(url, None)
+                urls.update(data["urls"])
+                data["urls"] = urls
+                return data
+        data = self.changes_since(-1)
+        del data["deleted"]
+        # Start berikutnya cukup membaca snapshot
+        self.save_snapshot(data["urls"], data["epoch"], data["generation"])
+        return data
+
+    def get_content(self, url):
+        """Ambil dan decompress content satu halaman"""
+        with self.lock:
+            pending = self.pending_pages.get(url)
+            if pending is not None:
+                return decompress_text(pending[2])
+            if url in self.pending_deletes:
+                return ""
+            row = self.conn.execute("SELECT content FROM pages WHERE url = ?", (url,)).fetchone()
+        return decompress_text(row[0]) if row else ""
+
+    def iter_contents(self):
+        """Stream (url, content) semua halaman tanpa memuat semuanya ke memory"""
+        self.flush()
+        with self.lock:
+            urls = [row[0] for row in self.conn.execute("SELECT url FROM pages")]
+        for url in urls:
+            yield url, self.get_content(url)
+
+    def iter_records(self):
+        """Stream (url, record lengkap dengan content) semua halaman, untuk menyalin ke store lain"""
+        self.flush()
+        with self.lock:
+            urls = [row[0] for row in self.conn.execute("SELECT url FROM pages")]
+        for url in urls:
+            with self.lock:
+                row = self.conn.execute(
+                    "SELECT title, content, links, timestamp, content_length, etag, last_modified, simhash, "
+                    "duplicate_of FROM pages WHERE url = ?", (url,)
+                ).fetchone()
+            if row is None:
+                continue
+            title, content, links, timestamp, content_length, etag, last_modified, simhash, duplicate_of = row
+            yield url, {
+                "content": decompress_text(content),
+                "title": title,
+                "links": json.loads(links) if links else [],
+                "timestamp": timestamp,
+                "content_length": content_length,
+                "etag": etag,
+                "last_modified": last_modified,
+                "simhash": _from_signed64(simhash),
+                "duplicate_of": duplicate_of
+            }
+
+    def is_pending(self, url):
+        return url in self.pending_pages or url in self.pending_deletes
+
+    def _pending_count(self):
+        return len(self.pending_pages) + len(self.pending_touches) + len(self.pending_deletes)
+
+    def put(self, url, record):
+        """Upsert satu halaman (dibuffer); ditulis otomatis setiap batch_size penulisan"""
+        row = (url, record.get("title"), compress_text(record.get("content", "")),
+               json.dumps(record.get("links", []), ensure_ascii=False),
+               record.get("timestamp"), record.get("content_length", 0),
+               record.get("etag"), record.get("last_modified"),
+               _to_signed64(record.get("simhash")), record.get("duplicate_of"))
+        with self.lock:
+            self.pending_pages[url] = row
+            self.pending_touches.pop(url, None)
+            self.pending_deletes.discard(url)
+            if self._pending_count() >= self.batch_size:
+                self.flush()
+
+    def delete(self, url):
+        """Hapus satu halaman (dibuffer); worker lain melihatnya lewat tombstone di changes_since"""
+        with self.lock:
+            self.pending_pages.pop(url, None)
+            self.pending_touches.pop(url, None)
+            self.pending_deletes.add(url)
+            if self._pending_count() >= self.batch_size:
+                self.flush()
+
+    def touch(self, url, timestamp):
+        """Update timestamp halaman yang tidak berubah (HTTP 304)"""
+        with self.lock:
+            pending = self.pending_pages.get(url)
+            if pending is not None:
+                self.pending_pages[url] = pending[:4] + (timestamp,) + pending[5:]
+            else:
+                self.pending_touches[url] = timestamp
+            if self._pending_count() >= self.batch_size:
+                self.flush()
+
+    def set_metadata(self, metadata):
+        with self.lock:
+            self.pending_metadata = dict(metadata)
+
+    def flush(self):
+        """Tulis semua penulisan yang tertunda dalam satu transaksi pendek"""
+        with self.lock:
+            if (not self.pending_pages and not self.pending_touches and not self.pending_deletes
+                    and self.pending_metadata is None):
+                return
+            with self.transaction():
+                if self.pending_pages or self.pending_deletes:
+                    # Timestamp saja (touch) tidak mengubah isi, jadi tidak menaikkan generation
+                    self.conn.execute("UPDATE state SET value = value + 1 WHERE key = 'generation'")
+                    generation = self._read_state()[1]
+                if self.pending_deletes:
+                    deleted = [(url,) for url in self.pending_deletes]
+                    self.conn.executemany("DELETE FROM pages WHERE url = ?", deleted)
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO deleted_pages (url, generation) VALUES (?, ?)",
+                        [(url, generation) for url in self.pending_deletes]
+                    )
+                if self.pending_pages:
+                    self.conn.executemany("DELETE FROM deleted_pages WHERE url = ?",
+                                          [(url,) for url in self.pending_pages])
+                    self.conn.executemany(
+                        "INSERT OR REPLACE INTO pages "
+                        "(url, title, content, links, timestamp, content_length, etag, last_modified, simhash, "
+                        "duplicate_of, generation) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [row + (generation,) for row in self.pending_pages.values()]
+                    )
+                if self.pending_touches:
+                    self.conn.executemany(
+                        "UPDATE pages SET timestamp = ? WHERE url = ?",
+                        [(timestamp, url) for url, timestamp in self.pending_touches.items()]
+                    )
+                if self.pending_metadata is not None:
+                    self.conn.execute("DELETE FROM metadata")
+                    self.conn.executemany(
+                        "INSERT INTO metadata (key, value) VALUES (?, ?)",
+                        [(key, json.dumps(value, ensure_ascii=False)) for key, value in self.pending_metadata.items()]
+                    )
+            self.pending_pages = {}
+            self.pending_touches = {}
+            self.pending_deletes = set()
+            self.pending_metadata = None
+
+    def clear(self):
+        with self.lock:
+            self.pending_pages = {}
+            self.pending_touches = {}
+            self.pending_deletes = set()
+            self.pending_metadata = None
+            with self.transaction():
+                self.conn.execute("DELETE FROM pages")
+                self.conn.execute("DELETE FROM deleted_pages")
+                self.conn.execute("DELETE FROM metadata")
+                self.conn.execute("UPDATE state SET value = value + 1")
+            if os.path.exists(self.snapshot_path):
+                os.remove(self.snapshot_path)
+            self.snapshot_state = None
+            try:
+                self.conn.execute("VACUUM")
+            except sqlite3.OperationalError as e:
+                # Worker lain sedang membaca; ruang kosong dipakai ulang oleh penulisan berikutnya
+                logger.warning(f"Skipping VACUUM: {e}")
+
+    def size_bytes(self):
+        return sum(
+            os.path.getsize(path)
+            for path in (self.path, self.path + "-wal")
+            if os.path.exists(path)
+        )
+
+    def close(self):
+        with self.lock:
+            self.flush()
+            self.conn.close()
+
+
+def open_store(path, backend=None):
+    """Buat backend storage berdasarkan nama backend atau ekstensi file"""
+    backend = backend or ("json" if path.endswith(".json") else "sqlite")
+    if backend == "json":
+        return JsonStore(path)
+    if backend == "sqlite":
+        return SqliteStore(path)
+    raise ValueError(f"Unknown cache backend: {backend}")
+
+
+def import_json_cache(json_path, store):
+    """Import crawl_cache.json format lama ke backend storage lain.
+
+    URL dan links dikanonikalisasi agar cocok dengan key yang dipakai crawler.
+    """
+    data = JsonStore(json_path).load_all()
+    for url, record in data["urls"].items():
+        # seen untuk cek duplikat O(1); links menjaga urutan asli
+        links, seen = [], set()
+        for link in record.get("links", []):
+            link = canonicalize(link, url)
+            if link and link not in seen and in_scope(link):
+                seen.add(link)
+                links.append(link)
+        record = dict(record, links=links)
+        store.put(canonicalize(url) or url, record)
+    store.set_metadata(data.get("metadata", {}))
+    store.flush()
+    logger.info(f"Imported {len(data['urls'])} URLs from {json_path}")
+    return len(data["urls"])
+
+
+if __name__ == '__main__':
+    # Usage: python storage.py import crawl_cache.json crawl_cache.db
+    if len(sys.argv) != 4 or sys.argv[1] != "import":
+        print("Usage: python storage.py import <crawl_cache.json> <crawl_cache.db>")
+        sys.exit(1)
+    configure_logging()
+    target = open_store(sys.argv[3])
+    import_json_cache(sys.argv[2], target)
+    target.close()
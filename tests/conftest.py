@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(TESTS_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """Modul app di-import dari direktori sementara (cache global dan crawl_jobs dibuat di cwd)"""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("app"))
+    try:
+        import app
+    finally:
+        os.chdir(cwd)
+    return app
+
+
+@pytest.fixture
+def make_cache(app_module, tmp_path):
+    """WebCrawlerCache baru di atas database sementara"""
+    def make(name="shared.db"):
+        return app_module.WebCrawlerCache(cache_file=str(tmp_path / name), legacy_file=None)
+    return make
+
+
+@pytest.fixture
+def run_process(tmp_path):
+    """Jalankan kode Python di proses terpisah (worker lain) dengan cwd tmp_path"""
+    def run(code):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([REPO_ROOT, TESTS_DIR]))
+        result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env,
+                                capture_output=True, text=True, timeout=120)
+        assert result.returncode == 0, result.stderr
+        return result.stdout
+    return run
+
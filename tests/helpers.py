@@ -0,0 +1,14 @@
+"""Halaman sintetis untuk test; di-import juga oleh proses worker yang dijalankan run_process"""
+import random
+
+WORDS = "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima mike november oscar".split()
+
+
+def page(seed, extra=""):
+    """Teks halaman deterministik per seed, cukup panjang untuk SimHash"""
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(60)) + extra
+
+
+def url(i):
+    return f"https://a.test/page/{i}"
@@ -0,0 +1,123 @@
+import pytest
+
+from helpers import page, url
+from indexer import IncrementalIndexer
+
+
+@pytest.fixture
+def writer(tmp_path, run_process):
+    """Jalankan perintah terhadap cache yang sama dari proses worker lain"""
+    path = str(tmp_path / "shared.db")
+
+    def run(body, save=True):
+        return run_process(f"""
+from app import WebCrawlerCache
+from helpers import page
+cache = WebCrawlerCache(cache_file={path!r}, legacy_file=None)
+{body}
+{"cache.save_cache()" if save else ""}
+""")
+    return run
+
+
+def test_refresh_picks_up_pages_and_deletes_from_other_process(make_cache, writer):
+    cache = make_cache()
+    cache.store_content(url(1), page(1), title="one")
+    cache.store_content(url(2), page(2), title="two")
+    cache.save_cache()
+    cache.indexer = IncrementalIndexer(cache, [], interval=3600)
+    assert not cache.refresh()
+
+    writer("""
+cache.store_content("https://a.test/page/3", page(3), title="three", links=["https://a.test/page/1"])
+cache.store_content("https://a.test/page/1", page(1, " updated"), title="one v2")
+cache.delete_page("https://a.test/page/2")
+""")
+    generation = cache.generation
+    assert cache.refresh()
+    assert cache.generation == generation + 1
+    urls = cache.cache_data["urls"]
+    assert set(urls) == {url(1), url(3)}
+    assert urls[url(1)]["title"] == "one v2"
+    assert urls[url(3)]["links"] == (url(1),)
+    assert cache.get_cached_content(url(1))["content"] == page(1, " updated")
+    assert cache.get_cached_content(url(2)) is None
+    # Halaman berubah dan terhapus diteruskan ke indexer
+    assert dict(cache.indexer.pending) == {url(3): None, url(1): None, url(2): ""}
+    assert cache.cache_version() == "%d:%d" % cache.store.state()
+
+
+def test_refresh_keeps_unflushed_local_write(make_cache, writer):
+    cache = make_cache()
+    cache.store_content(url(1), page(1), title="base")
+    cache.save_cache()
+    cache.store_content(url(1), page(1, " local"), title="local")
+
+    writer("""cache.store_content("https://a.test/page/1", page(1, " remote"), title="remote")""")
+    assert cache.refresh()
+    assert cache.cache_data["urls"][url(1)]["title"] == "local"
+    assert cache.get_cached_content(url(1))["content"] == page(1, " local")
+
+
+def test_refresh_reloads_after_clear_in_other_process(make_cache, writer):
+    cache = make_cache()
+    cache.store_content(url(1), page(1))
+    cache.save_cache()
+    cache.indexer = IncrementalIndexer(cache, [], interval=3600)
+    cache.indexer.add(url(1))
+
+    writer("""
+cache.clear_cache()
+cache.store_content("https://a.test/page/5", page(5))
+""")
+    assert cache.refresh()
+    assert set(cache.cache_data["urls"]) == {url(5)}
+    assert cache.store_state[0] == 1
+    assert not cache.indexer.pending
+
+
+def test_duplicates_from_other_process_are_linked(make_cache, writer):
+    cache = make_cache()
+    cache.store_content(url(1), page(1))
+    cache.save_cache()
+
+    writer("""assert cache.store_content("https://a.test/page/9", page(1, " copy")) == "https://a.test/page/1" """)
+    assert cache.refresh()
+    assert cache.cache_data["urls"][url(9)]["duplicate_of"] == url(1)
+    assert cache.duplicate_count == 1
+    assert cache.canonical_url(url(9)) == url(1)
+    assert cache.get_cached_content(url(9))["content"] == page(1)
+
+
+def test_new_worker_loads_snapshot_plus_later_changes(make_cache, writer):
+    cache = make_cache()
+    for i in range(5):
+        cache.store_content(url(i), page(i))
+    cache.save_cache()
+    snapshot_state = cache.store_state
+    assert cache.store.snapshot_state == snapshot_state
+
+    # Worker lain hanya menulis ke store, snapshot tidak diperbarui
+    writer("""
+cache.store.put("https://a.test/page/7", {"content": page(7), "title": "seven"})
+cache.store.delete("https://a.test/page/0")
+cache.store.flush()
+""", save=False)
+    other = make_cache()
+    assert set(other.cache_data["urls"]) == {url(1), url(2), url(3), url(4), url(7)}
+    assert other.store.snapshot_state == snapshot_state
+    assert other.store_state == (snapshot_state[0], snapshot_state[1] + 1)
+    assert other.get_cached_content(url(7))["content"] == page(7)
+
+
+def test_save_cache_snapshot_matches_committed_state(make_cache):
+    cache = make_cache()
+    for i in range(3):
+        cache.store_content(url(i), page(i))
+    cache.delete_page(url(0))
+    cache.save_cache()
+    cache.store.close()
+
+    other = make_cache()
+    assert other.cache_data["urls"] == cache.cache_data["urls"]
+    assert other.store.snapshot_state == cache.store_state
@@ -0,0 +1,68 @@
+from dedup import DEDUP_MIN_TOKENS, SIMHASH_DISTANCE, DuplicateIndex, hamming_distance, simhash
+
+ARTICLE = ("the quick brown fox jumps over the lazy dog while the farmer watches from the porch "
+           "and the cat sleeps in the warm afternoon sun near the old red barn by the river")
+OTHER = ("stock markets fell sharply on monday as investors worried about rising interest rates "
+         "and slowing growth in several large economies across europe and asia this quarter")
+
+
+def test_short_text_has_no_fingerprint():
+    assert simhash("") is None
+    assert simhash(" ".join(["word"] * (DEDUP_MIN_TOKENS - 1))) is None
+
+
+def test_simhash_is_stable_and_case_insensitive():
+    assert simhash(ARTICLE) == simhash(ARTICLE.upper())
+    assert 0 <= simhash(ARTICLE) < 1 << 64
+
+
+def test_small_edit_stays_within_distance():
+    edited = ARTICLE + " today"
+    assert hamming_distance(simhash(ARTICLE), simhash(edited)) <= SIMHASH_DISTANCE
+    assert hamming_distance(simhash(ARTICLE), simhash(OTHER)) > SIMHASH_DISTANCE
+
+
+def test_find_returns_near_duplicate_only():
+    index = DuplicateIndex()
+    index.add("https://a.test/article", simhash(ARTICLE))
+    index.add("https://a.test/news", simhash(OTHER))
+    assert len(index) == 2
+    assert index.find(simhash(ARTICLE + " today")) == "https://a.test/article"
+    assert index.find(simhash(ARTICLE), exclude="https://a.test/article") is None
+
+
+def test_find_matches_every_fingerprint_within_distance():
+    index = DuplicateIndex()
+    base = simhash(ARTICLE)
+    index.add("https://a.test/article", base)
+    # Bit yang dibalik tersebar di band berbeda maupun di band yang sama
+    for bits in ([0], [0, 1, 2], [5, 21, 40], [63, 47, 31]):
+        flipped = base
+        for bit in bits:
+            flipped ^= 1 << bit
+        assert index.find(flipped) == "https://a.test/article"
+    far = base ^ 0b1111
+    assert index.find(far) is None
+
+
+def test_find_prefers_closest_then_smallest_url():
+    index = DuplicateIndex()
+    base = simhash(ARTICLE)
+    index.add("https://a.test/b", base ^ 1)
+    index.add("https://a.test/a", base ^ 2)
+    index.add("https://a.test/exact", base)
+    assert index.find(base) == "https://a.test/exact"
+    index.remove("https://a.test/exact")
+    assert index.find(base) == "https://a.test/a"
+
+
+def test_add_replaces_and_remove_forgets():
+    index = DuplicateIndex()
+    index.add("https://a.test/page", simhash(ARTICLE))
+    index.add("https://a.test/page", simhash(OTHER))
+    assert len(index) == 1
+    assert index.find(simhash(ARTICLE)) is None
+    index.remove("https://a.test/page")
+    assert len(index) == 0
+    assert all(not band for band in index.bands)
+    index.remove("https://a.test/missing")
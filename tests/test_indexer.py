@@ -0,0 +1,200 @@
+import random
+
+import pytest
+
+import indexer as indexer_module
+from indexer import IncrementalIndexer
+from positional_index import PositionalIndex
+from search_index import SearchIndex
+
+WORDS = ("river mountain forest ocean desert valley island canyon meadow glacier volcano prairie "
+         "harbor lagoon plateau tundra savanna marsh delta reef cliff dune fjord geyser "
+         "python crawler index search graph cache segment merge query token vector matrix").split()
+QUERIES = ["river", "ocean forest", '"search graph"', "glac*", "python -missing", "token vector"]
+
+
+def page(rng, extra=()):
+    return " ".join(rng.choice(WORDS) for _ in range(60)) + " " + " ".join(extra)
+
+
+def url(i):
+    return f"https://a.test/page/{i}"
+
+
+@pytest.fixture
+def crawl(make_cache, tmp_path):
+    """Cache dengan IncrementalIndexer (tanpa thread merge periodik) atas index di tmp_path"""
+    def make(name="shared.db"):
+        cache = make_cache(name)
+        indexes = [SearchIndex(str(tmp_path / "index")), PositionalIndex(str(tmp_path / "positional"))]
+        cache.indexer = IncrementalIndexer(cache, indexes, interval=3600)
+        return cache, cache.indexer
+    return make
+
+
+def fresh_indexes(cache, tmp_path):
+    search = SearchIndex(str(tmp_path / "fresh-index")).build(cache.iter_contents())
+    positional = PositionalIndex(str(tmp_path / "fresh-positional")).build(cache.iter_contents())
+    return search, positional
+
+
+def positional_results(index):
+    return {query: sorted(index.search(query, k=1000)) for query in QUERIES}
+
+
+def search_results(index):
+    return {query: sorted((url, round(score, 5)) for url, score in index.top_k(query, k=1000))
+            for query in QUERIES}
+
+
+def change_pages(cache, rng, start, count):
+    """Tambah count halaman, ubah dua halaman lama dan hapus satu"""
+    for i in range(start, start + count):
+        cache.store_content(url(i), page(rng), links=[url(i - 1)])
+    cache.store_content(url(start - 1), page(rng, ["changed"]))
+    cache.store_content(url(1), page(rng, ["changed"]))
+    cache.delete_page(url(start - 2))
+
+
+def test_segments_search_like_full_build(crawl, tmp_path):
+    rng = random.Random(1)
+    cache, indexer = crawl()
+    for i in range(40):
+        cache.store_content(url(i), page(rng))
+    indexer.sync()
+    search, positional = indexer.indexes
+    assert search.base_docs == positional.base_docs == 40 and not positional.segments
+
+    change_pages(cache, rng, 40, 20)
+    indexer.sync()
+    assert positional.segments and positional.dead_docs == 3
+    assert positional.document_count == 59
+
+    _, fresh = fresh_indexes(cache, tmp_path)
+    assert positional_results(positional) == positional_results(fresh)
+    assert url(38) not in positional.match_urls("river ocean forest desert")
+    assert positional.match_urls("changed") == {url(1), url(39)}
+
+
+def test_merge_keeps_results_and_drops_dead_documents(crawl, tmp_path):
+    rng = random.Random(2)
+    cache, indexer = crawl()
+    for i in range(40):
+        cache.store_content(url(i), page(rng))
+    indexer.sync()
+    search, positional = indexer.indexes
+    # Sedikit perubahan: TF-IDF di-merge tanpa fit ulang
+    change_pages(cache, rng, 40, 4)
+    indexer.sync()
+    before = positional_results(positional), search_results(search)
+
+    for index in indexer.indexes:
+        indexer.merge(index)
+        assert not index.segments and index.dead_docs == 0
+        assert index.base_docs == index.document_count == 43
+    assert search.fitted_docs == 40
+    assert (positional_results(positional), search_results(search)) == before
+
+    # Versi hasil merge sudah dipublikasikan ke disk
+    loaded = PositionalIndex(str(tmp_path / "positional"))
+    assert loaded.load() and positional_results(loaded) == before[0]
+
+
+def test_merge_refits_tfidf_after_corpus_growth(crawl, tmp_path):
+    rng = random.Random(3)
+    cache, indexer = crawl()
+    for i in range(20):
+        cache.store_content(url(i), page(rng))
+    indexer.sync()
+    search = indexer.indexes[0]
+    for i in range(20, 30):
+        cache.store_content(url(i), page(rng, ["zeppelin"]))
+    indexer.sync()
+    assert search.missing_terms("zeppelin") == ["zeppelin"]
+
+    indexer.merge(search)
+    assert search.fitted_docs == 30 and not search.missing_terms("zeppelin")
+    fresh, _ = fresh_indexes(cache, tmp_path)
+    assert search_results(search) == search_results(fresh)
+    assert len(search.top_k("zeppelin", k=100)) == 10
+
+
+def test_segments_added_during_merge_are_kept(crawl):
+    rng = random.Random(4)
+    cache, indexer = crawl()
+    for i in range(30):
+        cache.store_content(url(i), page(rng))
+    indexer.sync()
+    positional = indexer.indexes[1]
+    cache.store_content(url(30), page(rng, ["early"]))
+    indexer.sync()
+    merged = positional.merged
+
+    def merged_with_late_write(count, live):
+        result = merged(count, live)
+        # Halaman yang masuk selama merge berjalan
+        cache.store_content(url(31), page(rng, ["late"]))
+        indexer.seal()
+        return result
+
+    positional.merged = merged_with_late_write
+    indexer.merge(positional)
+    assert positional.base_docs == 31 and len(positional.segments) == 1
+    assert positional.match_urls("early") == {url(30)}
+    assert positional.match_urls("late") == {url(31)}
+
+
+def test_maintain_compacts_and_merges(crawl, monkeypatch):
+    rng = random.Random(5)
+    cache, indexer = crawl()
+    for i in range(30):
+        cache.store_content(url(i), page(rng))
+    indexer.sync()
+    positional = indexer.indexes[1]
+    monkeypatch.setattr(indexer_module, "MERGE_MIN_DOCS", 1000)
+    for i in range(30, 30 + indexer_module.MERGE_SEGMENTS):
+        cache.store_content(url(i), page(rng))
+        indexer.seal()
+    expected = positional_results(positional)
+    indexer.maintain()
+    assert len(positional.segments) == 1 and positional.base_docs == 30
+    assert positional_results(positional) == expected
+
+    monkeypatch.setattr(indexer_module, "MERGE_MIN_DOCS", 1)
+    indexer.maintain()
+    assert not positional.segments and positional.base_docs == 38
+    assert positional_results(positional) == expected
+
+
+def test_other_worker_loads_published_index_and_catches_up(crawl, tmp_path):
+    rng = random.Random(6)
+    cache, indexer = crawl()
+    for i in range(40):
+        cache.store_content(url(i), page(rng))
+    indexer.sync()
+    change_pages(cache, rng, 40, 5)
+    cache.save_cache()
+
+    # Worker lain: store dan direktori index yang sama, index di-load lalu ditambah changes_since
+    other, other_indexer = crawl()
+    version = other_indexer.sync()
+    assert version == indexer.sync()
+    positional = other_indexer.indexes[1]
+    assert positional.base_docs == 40 and positional.segments
+    assert positional_results(positional) == positional_results(indexer.indexes[1])
+    assert search_results(other_indexer.indexes[0]) == search_results(indexer.indexes[0])
+
+
+def test_clear_resets_indexes_to_new_epoch(crawl):
+    rng = random.Random(7)
+    cache, indexer = crawl()
+    for i in range(10):
+        cache.store_content(url(i), page(rng))
+    indexer.sync()
+    cache.clear_cache()
+    cache.store_content(url(100), page(rng, ["fresh"]))
+    version = indexer.sync()
+    assert version.startswith("1:")
+    positional = indexer.indexes[1]
+    assert positional.document_count == 1
+    assert positional.match_urls("fresh") == {url(100)}
@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+import time
+
+from conftest import REPO_ROOT
+from jobs import CrawlJobManager
+
+
+WORKER = """
+import os, sys, time
+from jobs import CrawlJobManager
+
+def runner(job, resume_state, checkpoint):
+    job.add_event({"status": "fetching", "url": "https://a.test/1", "visited_count": 1})
+    checkpoint({"frontier": ["https://a.test/2"]})
+    while not job.should_stop():
+        if os.environ.get("DIE_WHILE_RUNNING"):
+            os._exit(0)
+        time.sleep(0.05)
+    return {"stopped": True}
+
+manager = CrawlJobManager(runner, jobs_dir=sys.argv[1])
+job = manager.submit({"start_url": "https://a.test/"})
+print(job.id, flush=True)
+while not job.finished:
+    time.sleep(0.05)
+manager.executor.shutdown()
+"""
+
+
+def start_worker(jobs_dir, **env):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, **env)
+    process = subprocess.Popen([sys.executable, "-c", WORKER, jobs_dir], env=env,
+                               stdout=subprocess.PIPE, text=True)
+    return process, process.stdout.readline().strip()
+
+
+def wait_for(predicate, timeout=30):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def finished_runner(calls):
+    def runner(job, resume_state, checkpoint):
+        calls.append(resume_state)
+        return {"resumed": True}
+    return runner
+
+
+def test_job_of_live_worker_is_shared_and_cancelled_through_files(tmp_path):
+    jobs_dir = str(tmp_path / "jobs")
+    process, job_id = start_worker(jobs_dir)
+    try:
+        manager = CrawlJobManager(finished_runner([]), jobs_dir=jobs_dir)
+        wait_for(lambda: manager.get(job_id).status == "running")
+        assert [job.id for job in manager.list()] == [job_id]
+        # Masih berjalan di worker lain: tidak boleh dijalankan kedua kali
+        assert manager.resume(job_id) is None
+        events, job = manager.events_since(job_id, 0, timeout=5)
+        assert [event["url"] for event in events] == ["https://a.test/1"]
+        assert job.status == "running"
+        assert manager.cancel(job_id).id == job_id
+        assert process.wait(timeout=30) == 0
+    finally:
+        process.kill()
+    job = manager.get(job_id)
+    assert job.status == "cancelled"
+    assert job.result == {"stopped": True}
+    assert not os.path.exists(os.path.join(jobs_dir, f"{job_id}.cancel"))
+
+
+def test_job_of_dead_worker_is_interrupted_and_resumed_once(tmp_path):
+    jobs_dir = str(tmp_path / "jobs")
+    process, job_id = start_worker(jobs_dir, DIE_WHILE_RUNNING="1")
+    assert process.wait(timeout=30) == 0
+    calls = []
+    manager = CrawlJobManager(finished_runner(calls), jobs_dir=jobs_dir)
+    assert manager.get(job_id).status == "interrupted"
+    job = manager.resume(job_id)
+    assert job.owner["pid"] == os.getpid()
+    assert job.resumed == 1
+    wait_for(lambda: manager.get(job_id).status == "completed")
+    assert calls == [{"frontier": ["https://a.test/2"]}]
+    # Event lama dari worker yang mati tetap bisa dibaca setelah job selesai
+    events, job = manager.events_since(job_id, 0)
+    assert [event["seq"] for event in events] == [1]
+    assert job.result == {"resumed": True}
+    assert manager.resume(job_id) is None
@@ -0,0 +1,52 @@
+import os
+
+from partition import FileQueue, partition_of
+
+
+def test_get_returns_batches_in_send_order_and_consumes_them(tmp_path):
+    queue = FileQueue(str(tmp_path / "inbox"))
+    queue.put([{"url": "https://a.test/1", "depth": 1}])
+    queue.put([{"url": "https://a.test/2", "depth": 2}, {"url": "https://a.test/3", "depth": 2}])
+    assert [message["url"] for message in queue.get()] == [
+        "https://a.test/1", "https://a.test/2", "https://a.test/3"
+    ]
+    assert queue.get() == []
+    assert os.listdir(tmp_path / "inbox") == []
+
+
+def test_empty_batch_writes_nothing(tmp_path):
+    queue = FileQueue(str(tmp_path / "inbox"))
+    queue.put([])
+    assert os.listdir(tmp_path / "inbox") == []
+
+
+def test_incomplete_batch_is_not_read(tmp_path):
+    queue = FileQueue(str(tmp_path / "inbox"))
+    (tmp_path / "inbox" / "00000000000000000001-1-1.tmp").write_text('{"url": "https://a.test/half"')
+    queue.put([{"url": "https://a.test/1"}])
+    assert queue.get() == [{"url": "https://a.test/1"}]
+    assert os.listdir(tmp_path / "inbox") == ["00000000000000000001-1-1.tmp"]
+
+
+def test_batches_from_several_producers_and_processes(tmp_path, run_process):
+    directory = str(tmp_path / "inbox")
+    consumer = FileQueue(directory)
+    FileQueue(directory).put([{"url": "https://a.test/local-1"}])
+    FileQueue(directory).put([{"url": "https://a.test/local-2"}])
+    run_process(f"""
+from partition import FileQueue
+FileQueue({directory!r}).put([{{"url": "https://a.test/remote", "text": "caf\\u00e9"}}])
+""")
+    messages = consumer.get()
+    assert sorted(message["url"] for message in messages) == [
+        "https://a.test/local-1", "https://a.test/local-2", "https://a.test/remote"
+    ]
+    assert {"url": "https://a.test/remote", "text": "café"} in messages
+
+
+def test_partition_ignores_scheme_and_query():
+    url = "https://a.test/docs/page"
+    owner = partition_of(url, 4)
+    assert 0 <= owner < 4
+    assert partition_of("http://a.test/docs/page?x=1", 4) == owner
+    assert partition_of(url, 1) == 0
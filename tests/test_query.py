@@ -0,0 +1,21 @@
+import pytest
+
+
+@pytest.mark.parametrize("k", ["ten", None, [3]])
+def test_query_rejects_non_integer_k(app_module, k):
+    response = app_module.app.test_client().post('/query', json={'keyword': 'data', 'k': k})
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
+
+
+@pytest.mark.parametrize("k, expected", [(-5, 1), ("3", 3), (10 ** 9, None)])
+def test_query_clamps_k(app_module, monkeypatch, tmp_path, k, expected):
+    # Index dibangun di direktori relatif terhadap cwd
+    monkeypatch.chdir(tmp_path)
+    calls = []
+    index = app_module.ensure_search_index()
+    monkeypatch.setattr(index, "top_k", lambda keyword, k: calls.append(k) or [])
+    response = app_module.app.test_client().post('/query', json={'keyword': 'data', 'k': k})
+    assert response.status_code == 200
+    # None: dibatasi MAX_PAGE_SIZE
+    assert calls == [expected or app_module.MAX_PAGE_SIZE]
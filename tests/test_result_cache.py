@@ -0,0 +1,27 @@
+import json
+
+from crawl_log import SearchLog
+
+
+def test_packed_search_restores_evicted_result_from_json(app_module):
+    result = {
+        'keyword': 'data',
+        'all_links': ['https://a.test/', 'https://a.test/1'],
+        'keyword_found_urls': ['https://a.test/1'],
+        'search_log': SearchLog(['Visiting https://a.test/', 'Visiting https://a.test/1']),
+        'visited_count': 2,
+        'path_info': {'https://a.test/1': ['https://a.test/', 'https://a.test/1']},
+        'similarity_scores': {'https://a.test/1': 0.5}
+    }
+    search_id = app_module.search_results.add(result)
+    payload = {'search_id': search_id, 'found_total': 1}
+    entry = app_module.pack_search(payload, result)
+    # Bagian hasil lengkap adalah JSON biasa, bukan pickle
+    full = json.loads(entry.split(b"\n", 2)[2][len(app_module.encode_result(payload)):])
+    assert full['search_log'] == {'lines': list(result['search_log']), 'total': 2}
+
+    app_module.search_results.clear()
+    assert json.loads(app_module.unpack_search(entry)) == payload
+    restored = app_module.search_results.get(search_id)
+    assert restored['path_info'] == result['path_info']
+    assert restored['search_log'].page(1, 10) == (['Visiting https://a.test/1'], None)
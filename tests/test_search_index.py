@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+import search_index as search_index_module
+from positional_index import PositionalIndex
+from search_index import SearchIndex
+
+DOCUMENTS = [
+    ("https://a.test/1", "river valley forest river trail"),
+    ("https://a.test/2", "ocean harbor lighthouse ocean waves"),
+    ("https://a.test/3", "forest canyon river meadow"),
+    ("https://a.test/4", "python crawler index search"),
+]
+
+
+@pytest.fixture
+def indexes(tmp_path):
+    search = SearchIndex(str(tmp_path / "index")).build(DOCUMENTS)
+    positional = PositionalIndex(str(tmp_path / "positional")).build(DOCUMENTS)
+    search.term_index = positional
+    return search, positional
+
+
+def cosine(a, b):
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def test_score_text_with_known_terms_uses_corpus_vectorizer(indexes):
+    search, _ = indexes
+    vectors = search.vectorizer.transform(["river forest walk", "river"])
+    assert search.score_text("river forest walk", "river") == pytest.approx(
+        float(vectors[0].multiply(vectors[1]).sum()))
+
+
+def test_score_text_weights_new_terms_with_corpus_df(indexes, monkeypatch):
+    search, positional = indexes
+    # Segment baru memuat term di luar vocabulary hasil fit
+    positional.add_documents([("https://a.test/5", "zeppelin river zeppelin")])
+    search.add_documents([("https://a.test/5", "zeppelin river zeppelin")])
+    assert search.missing_terms("zeppelin river") == ["zeppelin"]
+    monkeypatch.setattr(search_index_module, "tfidf_vectorizer", None)
+
+    vocabulary = search.vectorizer.vocabulary_
+    river_idf = search.vectorizer.idf_[vocabulary["river"]]
+    zeppelin_idf = np.log((1 + 5) / (1 + 1)) + 1
+    content = np.array([1 * river_idf, 2 * zeppelin_idf])
+    query = np.array([river_idf, zeppelin_idf])
+    assert search.score_text("zeppelin river zeppelin", "zeppelin river") == pytest.approx(cosine(content, query),
+                                                                                            rel=1e-5)
+    assert search.score_text("river valley", "zeppelin") == 0.0
+
+
+def test_extra_idf_of_unknown_term_is_maximal(indexes):
+    search, _ = indexes
+    assert search.extra_idf(["nowhere"])[0] == pytest.approx(np.log(5) + 1)
+
+
+def test_new_terms_in_segments_score_like_score_text(indexes):
+    search, positional = indexes
+    added = [("https://a.test/5", "zeppelin river zeppelin forest airship"),
+             ("https://a.test/6", "zeppelin harbor"),
+             ("https://a.test/7", "river forest trail")]
+    positional.add_documents(added)
+    search.add_documents(added)
+    for keyword in ("zeppelin river", "zeppelin", "airship zeppelin ocean"):
+        expected = {url: search.score_text(content, keyword) for url, content in DOCUMENTS + added}
+        for url, content in DOCUMENTS + added:
+            assert search.score(url, keyword) == pytest.approx(expected[url], rel=1e-4, abs=1e-6)
+        ranked = [url for url, _ in search.top_k(keyword, k=10)]
+        assert ranked == sorted((url for url in expected if expected[url] > 0), key=lambda url: -expected[url])
+
+
+def test_new_term_scores_follow_replaced_documents(indexes):
+    search, positional = indexes
+    for documents in ([("https://a.test/5", "zeppelin river")], [("https://a.test/5", "river only")]):
+        positional.add_documents(documents)
+        search.add_documents(documents)
+    assert search.score("https://a.test/5", "zeppelin") == 0.0
+    assert search.top_k("zeppelin") == []
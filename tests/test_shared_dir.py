@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+
+import pytest
+
+import shared_dir
+
+
+def write_file(name, text):
+    def write(path):
+        with open(os.path.join(path, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    return write
+
+
+def read_current(directory, name):
+    with open(os.path.join(shared_dir.current_dir(directory), name), encoding="utf-8") as f:
+        return f.read()
+
+
+def test_current_dir_is_none_before_publish(tmp_path):
+    assert shared_dir.current_dir(str(tmp_path / "index")) is None
+
+
+def test_publish_points_current_to_new_version(tmp_path):
+    directory = str(tmp_path / "index")
+    first = shared_dir.publish(directory, write_file("data.txt", "v1"))
+    assert shared_dir.current_dir(directory) == first
+    assert read_current(directory, "data.txt") == "v1"
+    with open(os.path.join(directory, shared_dir.CURRENT_FILE), encoding="utf-8") as f:
+        assert f.read() == os.path.basename(first)
+
+    second = shared_dir.publish(directory, write_file("data.txt", "v2"))
+    assert second != first
+    assert shared_dir.current_dir(directory) == second
+    assert read_current(directory, "data.txt") == "v2"
+    # Versi lama dibuang, pointer dan lock tetap ada
+    assert not os.path.exists(first)
+    assert sorted(os.listdir(directory)) == sorted([os.path.basename(second), shared_dir.CURRENT_FILE,
+                                                   shared_dir.LOCK_FILE])
+
+
+def test_open_file_of_old_version_stays_readable(tmp_path):
+    directory = str(tmp_path / "index")
+    shared_dir.publish(directory, write_file("data.txt", "v1"))
+    with open(os.path.join(shared_dir.current_dir(directory), "data.txt"), encoding="utf-8") as old:
+        shared_dir.publish(directory, write_file("data.txt", "v2"))
+        assert old.read() == "v1"
+
+
+def test_failed_write_keeps_current_version(tmp_path):
+    directory = str(tmp_path / "index")
+    first = shared_dir.publish(directory, write_file("data.txt", "v1"))
+
+    def broken(path):
+        write_file("data.txt", "partial")(path)
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        shared_dir.publish(directory, broken)
+    assert shared_dir.current_dir(directory) == first
+    assert read_current(directory, "data.txt") == "v1"
+    assert not any(entry.endswith(".tmp") for entry in os.listdir(directory))
+
+
+def test_current_dir_ignores_pointer_to_missing_version(tmp_path):
+    directory = tmp_path / "index"
+    directory.mkdir()
+    (directory / shared_dir.CURRENT_FILE).write_text("v-gone")
+    assert shared_dir.current_dir(str(directory)) is None
+
+
+def test_clear_removes_versions_but_keeps_lock(tmp_path):
+    directory = str(tmp_path / "index")
+    with shared_dir.file_lock(directory):
+        shared_dir.publish(directory, write_file("data.txt", "v1"))
+    shared_dir.clear(directory)
+    assert shared_dir.current_dir(directory) is None
+    assert os.listdir(directory) == [shared_dir.LOCK_FILE]
+
+
+def test_publish_inside_file_lock_does_not_deadlock(tmp_path):
+    directory = str(tmp_path / "index")
+    with shared_dir.file_lock(directory):
+        with shared_dir.file_lock(directory):
+            path = shared_dir.publish(directory, write_file("data.txt", "v1"))
+        assert shared_dir.current_dir(directory) == path
+
+
+def test_prune_keeps_newer_versions(tmp_path):
+    directory = tmp_path / "index"
+    newer = directory / f"v{time.time_ns() + 10 ** 12}-1"
+    newer.mkdir(parents=True)
+    (directory / "legacy_index.pkl").write_text("old format")
+    path = shared_dir.publish(str(directory), write_file("data.txt", "v1"))
+    assert sorted(os.listdir(directory)) == sorted([os.path.basename(path), newer.name, shared_dir.CURRENT_FILE,
+                                                   shared_dir.LOCK_FILE])
+
+
+def test_concurrent_publishers_never_lose_current(tmp_path, run_process):
+    directory = str(tmp_path / "index")
+    code = f"""
+import os
+import threading
+import time
+import shared_dir
+
+def write(path):
+    with open(os.path.join(path, "data.txt"), "w") as f:
+        f.write("x" * 100000)
+
+for _ in range(30):
+    path = shared_dir.publish({directory!r}, write)
+    # Versi yang baru dipublikasikan masih ada saat lock dipegang lagi
+    with shared_dir.file_lock({directory!r}):
+        current = shared_dir.current_dir({directory!r})
+        assert current is not None and os.path.exists(os.path.join(current, "data.txt"))
+"""
+    errors = []
+
+    def run():
+        try:
+            run_process(code)
+        except AssertionError as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=run) for _ in range(2)]
+    for worker in workers:
+        worker.start()
+    for _ in range(30):
+        with shared_dir.file_lock(directory):
+            path = shared_dir.publish(directory, write_file("data.txt", "local"))
+            assert shared_dir.current_dir(directory) == path
+    for worker in workers:
+        worker.join()
+    assert not errors
+    versions = [entry for entry in os.listdir(directory) if entry.startswith("v")]
+    assert len(versions) == 1
+    assert shared_dir.current_dir(directory) == os.path.join(directory, versions[0])
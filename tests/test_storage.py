@@ -0,0 +1,154 @@
+import json
+import os
+
+from storage import SqliteStore, import_json_cache
+
+
+def record(content, links=(), **extra):
+    return dict({"content": content, "title": "T", "links": list(links), "timestamp": "t0",
+                 "content_length": len(content)}, **extra)
+
+
+def test_flush_bumps_generation_and_marks_rows(tmp_path):
+    store = SqliteStore(str(tmp_path / "cache.db"))
+    assert store.state() == (0, 0)
+    store.put("https://a.test/1", record("one"))
+    store.put("https://a.test/2", record("two"))
+    store.flush()
+    assert store.state() == (0, 1)
+    store.put("https://a.test/3", record("three"))
+    store.flush()
+
+    changes = store.changes_since(1)
+    assert set(changes["urls"]) == {"https://a.test/3"}
+    assert (changes["epoch"], changes["generation"]) == (0, 2)
+    assert set(store.changes_since(0)["urls"]) == {"https://a.test/1", "https://a.test/2", "https://a.test/3"}
+    assert store.get_content("https://a.test/2") == "two"
+
+
+def test_touch_does_not_bump_generation(tmp_path):
+    store = SqliteStore(str(tmp_path / "cache.db"))
+    store.put("https://a.test/1", record("one"))
+    store.flush()
+    store.touch("https://a.test/1", "t1")
+    store.flush()
+    assert store.state() == (0, 1)
+    assert store.changes_since(1)["urls"] == {}
+    assert store.changes_since(0)["urls"]["https://a.test/1"]["timestamp"] == "t1"
+
+
+def test_delete_leaves_tombstone_until_page_is_written_again(tmp_path):
+    store = SqliteStore(str(tmp_path / "cache.db"))
+    store.put("https://a.test/1", record("one"))
+    store.put("https://a.test/2", record("two"))
+    store.flush()
+    store.delete("https://a.test/1")
+    assert store.is_pending("https://a.test/1")
+    assert store.get_content("https://a.test/1") == ""
+    store.flush()
+
+    changes = store.changes_since(1)
+    assert changes["deleted"] == ["https://a.test/1"]
+    assert changes["urls"] == {}
+    assert store.changes_since(2)["deleted"] == []
+
+    store.put("https://a.test/1", record("again"))
+    store.flush()
+    changes = store.changes_since(1)
+    assert changes["deleted"] == []
+    assert set(changes["urls"]) == {"https://a.test/1"}
+
+
+def test_clear_bumps_epoch_and_drops_tombstones(tmp_path):
+    store = SqliteStore(str(tmp_path / "cache.db"))
+    store.put("https://a.test/1", record("one"))
+    store.flush()
+    store.delete("https://a.test/1")
+    store.flush()
+    store.clear()
+    epoch, generation = store.state()
+    assert epoch == 1 and generation > 2
+    changes = store.changes_since(-1)
+    assert changes["urls"] == {} and changes["deleted"] == []
+
+
+def test_simhash_round_trips_as_unsigned(tmp_path):
+    store = SqliteStore(str(tmp_path / "cache.db"))
+    fingerprint = (1 << 64) - 5
+    store.put("https://a.test/1", record("one", simhash=fingerprint))
+    store.flush()
+    assert store.changes_since(0)["urls"]["https://a.test/1"]["simhash"] == fingerprint
+
+
+def test_load_uses_snapshot_plus_later_rows(tmp_path):
+    path = str(tmp_path / "cache.db")
+    store = SqliteStore(path)
+    store.put("https://a.test/1", record("one"))
+    store.put("https://a.test/2", record("two"))
+    store.flush()
+    data = store.load()
+    assert os.path.exists(store.snapshot_path)
+    assert store.snapshot_state == (0, 1)
+    assert set(data["urls"]) == {"https://a.test/1", "https://a.test/2"}
+
+    store.put("https://a.test/3", record("three", links=["https://a.test/1"]))
+    store.delete("https://a.test/2")
+    store.close()
+
+    reopened = SqliteStore(path)
+    data = reopened.load()
+    assert reopened.snapshot_state == (0, 1)
+    assert set(data["urls"]) == {"https://a.test/1", "https://a.test/3"}
+    assert data["urls"]["https://a.test/3"]["links"] == ("https://a.test/1",)
+    assert (data["epoch"], data["generation"]) == (0, 2)
+
+
+def test_load_ignores_snapshot_from_older_epoch(tmp_path):
+    path = str(tmp_path / "cache.db")
+    store = SqliteStore(path)
+    store.put("https://a.test/1", record("one"))
+    store.flush()
+    snapshot = store.load()
+    store.save_snapshot(snapshot["urls"], 0, 1)
+    stale = open(store.snapshot_path, "rb").read()
+    store.clear()
+    store.put("https://a.test/2", record("two"))
+    store.close()
+    # Snapshot epoch lama (misalnya ditulis worker lain sebelum clear)
+    with open(path + ".snapshot", "wb") as f:
+        f.write(stale)
+
+    data = SqliteStore(path).load()
+    assert set(data["urls"]) == {"https://a.test/2"}
+    assert data["epoch"] == 1
+
+
+def test_changes_from_other_process_are_visible(tmp_path, run_process):
+    path = str(tmp_path / "cache.db")
+    store = SqliteStore(path)
+    store.put("https://a.test/1", record("one"))
+    store.flush()
+
+    run_process(f"""
+from storage import SqliteStore, import_json_cache
+store = SqliteStore({path!r})
+store.put("https://a.test/2", {{"content": "two", "links": ["https://a.test/1"]}})
+store.delete("https://a.test/1")
+store.close()
+""")
+    assert store.state() == (0, 2)
+    changes = store.changes_since(1)
+    assert set(changes["urls"]) == {"https://a.test/2"}
+    assert changes["deleted"] == ["https://a.test/1"]
+    assert store.get_content("https://a.test/2") == "two"
+
+
+def test_import_json_cache_canonicalizes_and_dedups_links_in_order(tmp_path):
+    json_path = tmp_path / "crawl_cache.json"
+    json_path.write_text(json.dumps({"urls": {"https://www.ui.ac.id/a/": record("a", links=[
+        "/b", "https://www.ui.ac.id/c", "https://www.ui.ac.id/b?utm_source=x", "https://other.test/", "/c#top"
+    ])}, "metadata": {}}))
+    store = SqliteStore(str(tmp_path / "cache.db"))
+    assert import_json_cache(str(json_path), store) == 1
+    links = store.changes_since(0)["urls"]["https://www.ui.ac.id/a"]["links"]
+    assert list(links) == ["https://www.ui.ac.id/b", "https://www.ui.ac.id/c"]
@@ -0,0 +1,100 @@
+import hashlib
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# Host yang boleh di-crawl (host itu sendiri atau subdomain-nya)
+SCOPE_HOST_SUFFIXES = ("ui.ac.id",)
+
+# Host yang selalu diakses lewat https (http di-upgrade)
+HTTPS_HOST_SUFFIXES = ("ui.ac.id",)
+
+# Host dan prefix path untuk versi English
+ENGLISH_HOST = "www.ui.ac.id"
+ENGLISH_PREFIX = "/en"
+
+# Query parameter tracking yang tidak mengubah isi halaman
+TRACKING_PARAMS = frozenset(["fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "_ga", "_gl"])
+TRACKING_PREFIXES = ("utm_",)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def _host_matches(host, suffixes):
+    return any(host == suffix or host.endswith("." + suffix) for suffix in suffixes)
+
+
+def in_scope(url):
+    """Cek apakah host URL masuk scope crawl"""
+    return _host_matches(urlsplit(url).hostname or "", SCOPE_HOST_SUFFIXES)
+
+
+def _is_tracking_param(name):
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def _normalize_path(path):
+    segments = []
+    for segment in path.split("/")[1:] if path.startswith("/") else path.split("/"):
+        if segment == ".":
+            continue
+        if segment == "..":
+            if segments:
+                segments.pop()
+            continue
+        segments.append(segment)
+    while segments and segments[-1] == "":
+        segments.pop()
+    return "/" + "/".join(segments)
+
+
+def canonicalize(href, base_url=None):
+    """Normalisasi URL: resolve relatif, hapus fragment/tracking param, urutkan query.
+
+    Return None untuk link yang bukan http(s) (mailto:, javascript:, dsb).
+    """
+    href = href.strip()
+    if base_url:
+        href = urljoin(base_url, href)
+    try:
+        parts = urlsplit(href)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower().rstrip(".")
+    if port == DEFAULT_PORTS[scheme]:
+        port = None
+    if scheme == "http" and _host_matches(host, HTTPS_HOST_SUFFIXES):
+        scheme = "https"
+    netloc = host if port is None else f"{host}:{port}"
+
+    # Resolve segmen '.' dan '..', lalu buang trailing slash (kecuali root)
+    path = _normalize_path(parts.path)
+
+    query = ""
+    if parts.query:
+        params = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking_param(k)]
+        query = urlencode(sorted(params))
+
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def localize_url(url, use_english):
+    """Arahkan URL ke versi English jika diminta (idempoten)"""
+    if not use_english:
+        return url
+    parts = urlsplit(url)
+    if parts.hostname != ENGLISH_HOST:
+        return url
+    path = parts.path or "/"
+    if path == ENGLISH_PREFIX or path.startswith(ENGLISH_PREFIX + "/"):
+        return url
+    path = ENGLISH_PREFIX if path == "/" else ENGLISH_PREFIX + path
+    return urlunsplit((parts.scheme, parts.netloc, path, parts.query, parts.fragment))
+
+
+def fingerprint(url):
+    """Fingerprint 64-bit dari URL kanonik untuk visited set yang ringkas"""
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "little")